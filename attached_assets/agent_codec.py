@@ -0,0 +1,125 @@
+"""Compact binary encoding for moving agent positions.
+
+Positions are quantized to ``QUANTUM_M`` metres east/north of the campus origin
+(int16, so +-3.2 km) and agent types are one-byte enums; the 3D scene derives
+each agent's colour from its type. A frame is a 10-byte header (``<BBII``:
+version, kind, agent count, record count) followed by:
+
+* keyframe: one 5-byte record (x, y, type) per agent, in agent index order;
+* delta: a little-endian bitmap of ``ceil(count / 8)`` bytes marking the agents
+  that changed since the previous frame, then one record per set bit.
+
+``AgentStreamEncoder`` sends a keyframe first, whenever the agent count
+changes and every ``keyframe_interval`` frames so a client that missed frames
+recovers; everything else is a delta. Frames travel base64 encoded inside the
+scene's ``postMessage`` payload and ``campus3d.js`` decodes them straight into
+the typed arrays it renders from.
+"""
+
+import base64
+import math
+import struct
+
+import numpy as np
+
+VERSION = 1
+KEYFRAME, DELTA = 0, 1
+ORIGIN = (20.041264, 73.85038)
+QUANTUM_M = 0.1
+M_PER_DEG_LAT = 110_540.0
+M_PER_DEG_LNG = 111_320.0 * math.cos(math.radians(ORIGIN[0]))
+AGENT_TYPES = ("person", "vehicle")
+AGENT_COLORS = {"person": "#3b82f6", "vehicle": "#4f46e5"}
+
+HEADER = struct.Struct("<BBII")
+RECORD = np.dtype([("x", "<i2"), ("y", "<i2"), ("type", "u1")])
+
+
+def quantize(lat, lng, types) -> np.ndarray:
+    """Packs coordinates and type names into ``RECORD`` structs."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    records = np.empty(len(lat), dtype=RECORD)
+    limits = np.iinfo(np.int16)
+    east = (lng - ORIGIN[1]) * M_PER_DEG_LNG / QUANTUM_M
+    north = (lat - ORIGIN[0]) * M_PER_DEG_LAT / QUANTUM_M
+    records["x"] = np.clip(np.rint(east), limits.min, limits.max)
+    records["y"] = np.clip(np.rint(north), limits.min, limits.max)
+    type_ids = {name: i for i, name in enumerate(AGENT_TYPES)}
+    records["type"] = [type_ids.get(t, 0) for t in types]
+    return records
+
+
+def dequantize(records: np.ndarray) -> tuple[np.ndarray, np.ndarray, list[str]]:
+    lat = ORIGIN[0] + records["y"] * QUANTUM_M / M_PER_DEG_LAT
+    lng = ORIGIN[1] + records["x"] * QUANTUM_M / M_PER_DEG_LNG
+    return lat, lng, [AGENT_TYPES[t] for t in records["type"]]
+
+
+def encode_keyframe(records: np.ndarray) -> bytes:
+    return HEADER.pack(VERSION, KEYFRAME, len(records), len(records)) + records.tobytes()
+
+
+def encode_delta(records: np.ndarray, previous: np.ndarray) -> bytes:
+    changed = records != previous
+    bitmap = np.packbits(changed, bitorder="little")
+    return (
+        HEADER.pack(VERSION, DELTA, len(records), int(changed.sum()))
+        + bitmap.tobytes()
+        + records[changed].tobytes()
+    )
+
+
+def decode(frame: bytes, previous: np.ndarray | None = None) -> np.ndarray:
+    """Applies a frame to ``previous`` (required for deltas) and returns the records."""
+    version, kind, count, n_records = HEADER.unpack_from(frame)
+    if version != VERSION:
+        raise ValueError(f"Unsupported agent frame version {version}")
+    if kind == KEYFRAME:
+        return np.frombuffer(frame, dtype=RECORD, count=count, offset=HEADER.size).copy()
+    if previous is None or len(previous) != count:
+        raise ValueError("Delta frame does not match the previous agent state")
+    n_bitmap = (count + 7) // 8
+    bitmap = np.frombuffer(frame, dtype=np.uint8, count=n_bitmap, offset=HEADER.size)
+    changed = np.unpackbits(bitmap, count=count, bitorder="little").astype(bool)
+    records = previous.copy()
+    records[changed] = np.frombuffer(
+        frame, dtype=RECORD, count=n_records, offset=HEADER.size + n_bitmap
+    )
+    return records
+
+
+class AgentStreamEncoder:
+    """Per-client encoder remembering the last frame it sent."""
+
+    def __init__(self, keyframe_interval: int = 10):
+        self.keyframe_interval = keyframe_interval
+        self._previous: np.ndarray | None = None
+        self._frames = 0
+
+    def reset(self):
+        """Forces the next frame to be a keyframe (e.g. the client reloaded)."""
+        self._previous = None
+
+    def encode(self, records: np.ndarray) -> bytes:
+        keyframe = (
+            self._previous is None
+            or len(self._previous) != len(records)
+            or self._frames % self.keyframe_interval == 0
+        )
+        if keyframe:
+            frame = encode_keyframe(records)
+        else:
+            frame = encode_delta(records, self._previous)
+        self._previous = records
+        self._frames += 1
+        return frame
+
+    def encode_objects(self, objects: list[dict]) -> str:
+        """Encodes ``moving_objects`` style dicts to a base64 frame."""
+        records = quantize(
+            [o["lat"] for o in objects],
+            [o["lng"] for o in objects],
+            [o["type"] for o in objects],
+        )
+        return base64.b64encode(self.encode(records)).decode("ascii")
@@ -1,5 +1,5 @@
 import reflex as rx
-from app.state import CitiPulseState, SensorReading
+from app.state import AnalyticsState, CitiPulseState, SensorReading
 from datetime import datetime
 
 TOOLTIP_STYLE = {
@@ -31,7 +31,7 @@ def chart_component(data_key: str, stroke_color: str, name: str) -> rx.Component
             dot=False,
             name=name,
         ),
-        data=CitiPulseState.analytics_data,
+        data=AnalyticsState.analytics_data,
         height=250,
         margin=CHART_MARGIN,
     )
@@ -57,8 +57,8 @@ def analytics_header() -> rx.Component:
                         sensor["name"], value=sensor["id"].to_string()
                     ),
                 ),
-                on_change=CitiPulseState.set_analytics_sensor_id,
-                default_value=CitiPulseState.analytics_sensor_id.to_string(),
+                on_change=AnalyticsState.set_analytics_sensor_id,
+                default_value=AnalyticsState.analytics_sensor_id.to_string(),
                 size="3",
                 class_name="bg-white/80 backdrop-blur-md rounded-lg shadow-sm border-emerald-200",
             ),
@@ -1,3 +1,5 @@
+import contextlib
+
 import reflex as rx
 import reflex_enterprise as rxe
 from app.components.navbar import navbar
@@ -6,7 +8,14 @@ from app.pages.map_page import map_page
 from app.pages.alerts_page import alerts_page
 from app.pages.analytics_page import analytics_page
 from app.pages.green_initiatives_page import green_initiatives_page
-from app.state import CitiPulseState
+from app.broadcast import kiosk_api
+from app.campus_assets import campus3d_api
+from app.ingest import ingest_api
+from app.metrics import metrics_api
+from app.profiler import profiler_api
+from app.sharding import shutdown_pool
+from app.state import HEARTBEAT_S, PAGE_ROUTES, SCENARIO_ENGINE, CitiPulseState
+from app.store import FEEDS
 
 
 def hero_page() -> rx.Component:
@@ -75,29 +84,24 @@ def demo_mode_toggle() -> rx.Component:
     )
 
 
-def main_app_content() -> rx.Component:
+def app_layout(*content: rx.Component) -> rx.Component:
     return rx.el.div(
         navbar(),
-        rx.el.main(
-            rx.match(
-                CitiPulseState.active_page,
-                ("Dashboard", dashboard_page()),
-                ("Analytics", analytics_page()),
-                ("Alerts", alerts_page()),
-                ("Green Initiatives", green_initiatives_page()),
-                ("Map", map_page()),
-                dashboard_page(),
-            ),
-            class_name="p-6 md:p-8",
-        ),
+        rx.el.main(*content, class_name="p-6 md:p-8"),
         app_footer(),
         demo_mode_toggle(),
+        # Keeps the session's scheduler alive while the tab is open.
+        rx.moment(
+            interval=HEARTBEAT_S * 1000,
+            on_change=CitiPulseState.heartbeat,
+            display="none",
+        ),
         class_name="min-h-screen text-slate-800 font-['Montserrat'] bg-gradient-to-br from-slate-50 via-emerald-50 to-cyan-50",
     )
 
 
 def index() -> rx.Component:
-    return rx.cond(CitiPulseState.show_dashboard, main_app_content(), hero_page())
+    return hero_page()
 
 
 app = rxe.App(
@@ -109,16 +113,38 @@ app = rxe.App(
             href="https://fonts.googleapis.com/css2?family=Montserrat:wght@400;500;600;700&display=swap",
             rel="stylesheet",
         ),
-        rx.el.link(
-            rel="stylesheet",
-            href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css",
-            integrity="sha256-p4NxAoJBhIIN+hmNHrzRCf9tD/miZyoHS5obTRR9BMY=",
-            cross_origin="",
-        ),
         rx.el.link(rel="stylesheet", href="/animations.css"),
     ],
+    api_transformer=[ingest_api, campus3d_api, metrics_api, profiler_api, kiosk_api],
 )
+
+
+@contextlib.asynccontextmanager
+async def close_feeds():
+    """Frees the feeds' sharded engines and the worker pools at shutdown."""
+    yield
+    FEEDS.close()
+    shutdown_pool()
+    SCENARIO_ENGINE.close()
+
+
+app.register_lifespan_task(close_feeds)
 app.add_page(index)
+# One route per page so each compiles to its own bundle and the first load only
+# ships the Dashboard.
+for page_name, page_component in (
+    ("Dashboard", lambda: app_layout(dashboard_page())),
+    ("Analytics", lambda: app_layout(analytics_page())),
+    ("Alerts", lambda: app_layout(alerts_page())),
+    ("Green Initiatives", lambda: app_layout(green_initiatives_page())),
+    ("Map", lambda: app_layout(map_page())),
+):
+    app.add_page(
+        page_component,
+        route=PAGE_ROUTES[page_name],
+        title=f"CitiPulse | {page_name}",
+        on_load=CitiPulseState.load_page,
+    )
 if __name__ == "__main__":
     app.run()
 
@@ -0,0 +1,149 @@
+"""Breakpoint-based AQI and the one AQI classification every view uses.
+
+Sub-indices follow the US EPA breakpoint tables (2024 PM2.5 revision). A
+concentration is truncated to its table's precision, located among the upper
+breakpoints with ``np.searchsorted`` and linearly interpolated within its band.
+The AQI is the largest sub-index and that pollutant is the dominant one.
+
+``classify`` maps AQI values to the six standard categories and from there to
+labels and to the palettes the views draw with: sensor markers, the
+Environmental map mode, zone polygons, dashboard gradients and text. It works
+on arrays, so a tick classifies all of its sensors or zones in one call.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+# Sub-index range of each band; a table with fewer bands uses the first ones.
+INDEX_LOW = np.array([0, 51, 101, 151, 201, 301])
+INDEX_HIGH = np.array([50, 100, 150, 200, 300, 500])
+
+# Pollutant -> (band lower bounds, band upper bounds, truncation decimals).
+# PM in ug/m3 (24 h), NO2 and SO2 in ppb (1 h), CO and O3 in ppm (8 h).
+BREAKPOINTS = {
+    "pm25": (
+        np.array([0.0, 9.1, 35.5, 55.5, 125.5, 225.5]),
+        np.array([9.0, 35.4, 55.4, 125.4, 225.4, 325.4]),
+        1,
+    ),
+    "pm10": (
+        np.array([0, 55, 155, 255, 355, 425]),
+        np.array([54, 154, 254, 354, 424, 604]),
+        0,
+    ),
+    "no2": (
+        np.array([0, 54, 101, 361, 650, 1250]),
+        np.array([53, 100, 360, 649, 1249, 2049]),
+        0,
+    ),
+    "so2": (
+        np.array([0, 36, 76, 186, 305, 605]),
+        np.array([35, 75, 185, 304, 604, 1004]),
+        0,
+    ),
+    "co": (
+        np.array([0.0, 4.5, 9.5, 12.5, 15.5, 30.5]),
+        np.array([4.4, 9.4, 12.4, 15.4, 30.4, 50.4]),
+        1,
+    ),
+    "o3": (
+        np.array([0.0, 0.055, 0.071, 0.086, 0.106]),
+        np.array([0.054, 0.070, 0.085, 0.105, 0.200]),
+        3,
+    ),
+}
+POLLUTANTS = tuple(BREAKPOINTS)
+
+# Highest AQI of every category but the last.
+CATEGORY_UPPER = np.array([50, 100, 150, 200, 300])
+CATEGORIES = ("good", "moderate", "sensitive", "unhealthy", "very_unhealthy", "hazardous")
+LABELS = (
+    "Good",
+    "Moderate",
+    "Unhealthy for Sensitive Groups",
+    "Unhealthy",
+    "Very Unhealthy",
+    "Hazardous",
+)
+PALETTES = {
+    "sensor": ("#22C55E", "#EAB308", "#F97316", "#EF4444", "#A855F7", "#9F1239"),
+    "environmental": ("#00FF00", "#FFFF00", "#FFA500", "#FF0000", "#8F3F97", "#7E0023"),
+    "zone": ("#4ade80", "#facc15", "#fb923c", "#f87171", "#c084fc", "#be123c"),
+    "gradient": (
+        "from-green-400 to-green-600",
+        "from-yellow-400 to-yellow-600",
+        "from-orange-400 to-orange-600",
+        "from-red-400 to-red-600",
+        "from-purple-400 to-purple-600",
+        "from-rose-700 to-rose-900",
+    ),
+    "text": (
+        "text-green-600",
+        "text-yellow-600",
+        "text-orange-600",
+        "text-red-600",
+        "text-purple-600",
+        "text-rose-800",
+    ),
+}
+_LABELS = np.array(LABELS, dtype=object)
+_PALETTES = {name: np.array(colors, dtype=object) for name, colors in PALETTES.items()}
+
+
+def sub_index(pollutant: str, concentration) -> np.ndarray:
+    """AQI sub-index per concentration; NaN where the concentration is NaN."""
+    low, high, decimals = BREAKPOINTS[pollutant]
+    scale = 10.0**decimals
+    c = np.floor(np.asarray(concentration, dtype=np.float64) * scale + 1e-9) / scale
+    band = np.minimum(np.searchsorted(high, c, side="left"), len(high) - 1)
+    index = INDEX_LOW[band] + (INDEX_HIGH[band] - INDEX_LOW[band]) * (c - low[band]) / (
+        high[band] - low[band]
+    )
+    return np.clip(np.rint(index), 0, INDEX_HIGH[len(high) - 1])
+
+
+def aqi_from_concentrations(concentrations: dict[str, object]) -> tuple[np.ndarray, np.ndarray]:
+    """AQI and dominant pollutant from ``{pollutant: concentrations}``.
+
+    Missing measurements are NaN; a row without any gets AQI NaN and an empty
+    dominant pollutant.
+    """
+    names = [p for p in POLLUTANTS if p in concentrations]
+    if not names:
+        return np.empty(0), np.empty(0, dtype=object)
+    indices = np.stack([sub_index(p, concentrations[p]) for p in names])
+    measured = ~np.isnan(indices)
+    any_measured = measured.any(axis=0)
+    filled = np.where(measured, indices, -1.0)
+    aqi = np.where(any_measured, filled.max(axis=0), np.nan)
+    dominant = np.array(names, dtype=object)[filled.argmax(axis=0)]
+    return aqi, np.where(any_measured, dominant, "")
+
+
+@dataclass
+class AqiClasses:
+    # Index into ``CATEGORIES`` per value.
+    category: np.ndarray
+    label: np.ndarray
+    color: np.ndarray
+
+
+def category_of(aqi) -> np.ndarray:
+    return np.searchsorted(CATEGORY_UPPER, np.asarray(aqi, dtype=np.float64), side="left")
+
+
+def classify(aqi, palette: str = "sensor") -> AqiClasses:
+    """Category codes, labels and ``palette`` colours for every AQI value."""
+    codes = category_of(aqi)
+    return AqiClasses(codes, _LABELS[codes], _PALETTES[palette][codes])
+
+
+def legend(palette: str = "zone") -> list[dict[str, str]]:
+    """Colour, label and AQI range of every category, for map legends."""
+    ranges = [f"AQI ≤ {int(upper)}" for upper in CATEGORY_UPPER]
+    ranges.append(f"AQI > {int(CATEGORY_UPPER[-1])}")
+    return [
+        {"color": color, "label": label, "range": aqi_range}
+        for color, label, aqi_range in zip(PALETTES[palette], LABELS, ranges)
+    ]
@@ -0,0 +1,21 @@
+"""Bearer-token check for the admin and gateway HTTP endpoints.
+
+Requests must carry ``Authorization: Bearer <token>`` matching
+``CITIPULSE_ADMIN_TOKEN``. While that is unset the guarded endpoints are
+disabled and answer ``403``.
+"""
+
+import hmac
+import os
+
+from fastapi import Request
+
+TOKEN_ENV = "CITIPULSE_ADMIN_TOKEN"
+
+
+def authorized(request: Request) -> bool:
+    token = os.environ.get(TOKEN_ENV)
+    if not token:
+        return False
+    scheme, _, given = request.headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(given, token)
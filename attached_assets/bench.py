@@ -0,0 +1,378 @@
+"""Headless benchmarks for the sensor pipeline and the state.
+
+Usage::
+
+    python -m app.bench --sensors 10,1000,10000,100000 --history 100 --zones 6 \
+        --repeat 20 --output bench.json --compare bench-before.json
+
+Every combination of ``--sensors``, ``--history`` and ``--zones`` is a
+synthetic network. Each one runs in its own spawned process, with its config
+passed in through ``CITIPULSE_SENSOR_CONFIG``. The state module loads it just
+as it would in a deployment, and no network's memory carries over into the
+next. The cases are:
+
+* ``sensor_tick``: the compute stage of ``update_sensor_data``, on the path the
+  state takes for that many sensors (``compute_tick`` or the sharded engine);
+* ``alerts``: ``check_alerts`` over every sensor's latest reading;
+* ``zones``: ``zone_aggregates`` over the latest readings;
+* ``dispersion``: the plume evaluated onto every sensor;
+* ``commit``: ``CitiPulseState._commit_tick`` of one tick;
+* ``page:<name>``: every computed var of the state while that page is open;
+* ``serialize``: ``state.dict()``, what a full state sync sends.
+
+The state cases need reflex and are reported as skipped without it. Latency is
+wall time per call after ``--warmup`` calls. Peak memory is the tracemalloc
+peak of one extra call in the benchmarking process; shard workers are not
+included. Results are written as JSON along with the commit they were measured
+on. ``--compare`` prints the p50 change of every case against an earlier file.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+
+import numpy as np
+
+from app.registry import DEFAULT_CONFIG, SensorRegistry
+
+# Corners of the box synthetic zones tile, roughly the campus.
+CAMPUS_BOUNDS = ((20.0390, 73.8470), (20.0430, 73.8540))
+NEARBY_FRACTION = 0.1
+
+
+def synthetic_config(sensors: int, zones: int, seed: int = 0) -> dict:
+    """A sensor config with ``sensors`` sensors spread over a grid of ``zones`` zones."""
+    rng = np.random.default_rng(seed)
+    (lat0, lng0), (lat1, lng1) = CAMPUS_BOUNDS
+    cols = max(1, int(np.ceil(np.sqrt(zones))))
+    rows = max(1, int(np.ceil(zones / cols)))
+    dlat, dlng = (lat1 - lat0) / rows, (lng1 - lng0) / cols
+    zone_records = []
+    for z in range(zones):
+        south, west = lat0 + (z // cols) * dlat, lng0 + (z % cols) * dlng
+        zone_records.append(
+            {
+                "id": f"zone_{z}",
+                "name": f"Zone {z}",
+                "sensors": [],
+                "capacity": 40,
+                "polygon": [
+                    {"lat": south + dlat, "lng": west},
+                    {"lat": south + dlat, "lng": west + dlng},
+                    {"lat": south, "lng": west + dlng},
+                    {"lat": south, "lng": west},
+                ],
+            }
+        )
+    records = []
+    for i in range(sensors):
+        sensor_id = i + 1
+        zone = zone_records[i % zones] if zones else None
+        if zone is not None:
+            south, west = zone["polygon"][3]["lat"], zone["polygon"][3]["lng"]
+            zone["sensors"].append(sensor_id)
+        else:
+            south, west = lat0, lng0
+        records.append(
+            {
+                "id": sensor_id,
+                "name": f"Sensor {sensor_id}",
+                "type": "Nearby" if rng.random() < NEARBY_FRACTION else "Campus",
+                "lat": round(south + rng.random() * dlat, 6),
+                "lng": round(west + rng.random() * dlng, 6),
+                "factors": {
+                    "temperature": round(float(rng.uniform(-1, 1)), 2),
+                    "aqi": int(rng.integers(0, 15)),
+                    "co2": int(rng.integers(0, 80)),
+                },
+            }
+        )
+    with open(DEFAULT_CONFIG, encoding="utf-8") as f:
+        sources = json.load(f).get("sources", [])
+    return {"sensors": records, "zones": zone_records, "sources": sources}
+
+
+def synthetic_history(
+    registry: SensorRegistry, history: int, now: datetime, period: float, seed: int = 0
+) -> dict[int, list[dict]]:
+    """``history`` stored readings per sensor, one every ``period`` seconds up to ``now``."""
+    rng = np.random.default_rng(seed)
+    n = len(registry)
+    timestamps = [
+        (now - timedelta(seconds=period * (history - k))).isoformat() for k in range(history)
+    ]
+    temperature = np.round(28 + rng.normal(0, 1.5, (n, history)), 2).tolist()
+    humidity = np.round(55 + rng.normal(0, 5, (n, history)), 2).tolist()
+    aqi = np.clip(70 + rng.normal(0, 15, (n, history)), 0, 500).astype(int).tolist()
+    co2 = np.clip(500 + rng.normal(0, 60, (n, history)), 250, 5000).astype(int).tolist()
+    return {
+        sensor_id: [
+            {
+                "timestamp": timestamps[k],
+                "temperature": temperature[i][k],
+                "humidity": humidity[i][k],
+                "aqi": aqi[i][k],
+                "co2": co2[i][k],
+                "quality": "ok",
+            }
+            for k in range(history)
+        ]
+        for i, sensor_id in enumerate(registry.ids)
+    }
+
+
+def measure(fn, repeat: int, warmup: int, max_seconds: float) -> dict:
+    """Latency percentiles (ms) of ``fn`` and the peak memory of one more call."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (not samples or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    ms = np.array(samples) * 1000
+    return {
+        "iterations": len(samples),
+        "latency_ms": {
+            "p50": round(float(np.percentile(ms, 50)), 3),
+            "p95": round(float(np.percentile(ms, 95)), 3),
+            "p99": round(float(np.percentile(ms, 99)), 3),
+            "mean": round(float(ms.mean()), 3),
+            "max": round(float(ms.max()), 3),
+        },
+        "peak_memory_mb": round(peak / 2**20, 2),
+    }
+
+
+def run_network(sensors: int, history: int, zones: int, args: argparse.Namespace) -> list[dict]:
+    """Runs every case on one network; called in a fresh process."""
+    from app.dispersion import DispersionModel
+    from app.pipeline import (
+        ALERT_THRESHOLDS,
+        BASE_VALUES,
+        SENSOR_PERIOD_S,
+        SensorSnapshot,
+        TickSnapshot,
+        check_alerts,
+        compute_tick,
+        zone_aggregates,
+    )
+    from app.registry import REGISTRY
+    from app.sharding import SHARD_MIN_SENSORS, ShardedSimulation, shutdown_pool
+
+    network = {"sensors": sensors, "history": history, "zones": zones}
+    results = []
+
+    def record(case: str, fn, **extra):
+        stats = measure(fn, args.repeat, args.warmup, args.max_seconds)
+        results.append({"network": network, "case": case, **extra, **stats})
+        print(f"  {case:<22} p50 {stats['latency_ms']['p50']:>10.3f} ms", flush=True)
+
+    now = datetime.now(timezone.utc)
+    rng = random.Random(args.seed)
+    histories = synthetic_history(REGISTRY, history, now, SENSOR_PERIOD_S, args.seed)
+    zone_sensors = {z["id"]: list(z["sensors"]) for z in REGISTRY.zones}
+    dispersion = DispersionModel(REGISTRY)
+    aqi_field = dispersion.sensor_field(2.0, 225.0)
+    latest = {sensor_id: readings[-1] for sensor_id, readings in histories.items() if readings}
+
+    if sensors >= SHARD_MIN_SENSORS:
+        engine = ShardedSimulation(
+            REGISTRY.ids,
+            REGISTRY.factor_matrix,
+            zone_sensors,
+        )
+        names = {sensor_id: REGISTRY.get(sensor_id)["name"] for sensor_id in REGISTRY.ids}
+        loop = asyncio.new_event_loop()
+
+        def sensor_tick():
+            result = loop.run_until_complete(
+                engine.tick(
+                    now, rng.getrandbits(64), BASE_VALUES, ALERT_THRESHOLDS, aqi_field
+                )
+            )
+            return engine.to_tick_result(result, names, ALERT_THRESHOLDS, "Streets")
+
+        # The engine only forecasts once its history has a few ticks in it.
+        for _ in range(11):
+            sensor_tick()
+        path = "sharded"
+    else:
+        engine = loop = None
+        increments = dict(zip(REGISTRY.ids, aqi_field.tolist()))
+
+        def sensor_tick():
+            snapshot = TickSnapshot(
+                now=now,
+                seed=rng.getrandbits(64),
+                sensors=[
+                    SensorSnapshot(
+                        id=sensor_id,
+                        name=REGISTRY.get(sensor_id)["name"],
+                        readings=list(histories[sensor_id]),
+                        latest_alert=None,
+                        loc_factor=REGISTRY.loc_factor(sensor_id),
+                    )
+                    for sensor_id in REGISTRY.ids
+                ],
+                zones=zone_sensors,
+                map_view_mode="Streets",
+                aqi_field=increments,
+            )
+            return compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS)
+
+        path = "pipeline"
+    try:
+        record("sensor_tick", sensor_tick, path=path)
+        record(
+            "alerts",
+            lambda: [
+                check_alerts(str(sensor_id), reading, ALERT_THRESHOLDS, now)
+                for sensor_id, reading in latest.items()
+            ],
+        )
+        record("zones", lambda: zone_aggregates(zone_sensors, latest))
+        record("dispersion", lambda: dispersion.sensor_field(2.0, 225.0))
+        tick = sensor_tick()
+    finally:
+        if engine is not None:
+            engine.close()
+            shutdown_pool()
+            loop.close()
+
+    try:
+        from app.state import PAGE_ROUTES, CitiPulseState
+    except ImportError as e:
+        for case in ("commit", "page:*", "serialize"):
+            results.append({"network": network, "case": case, "skipped": str(e)})
+        print(f"  state cases skipped: {e}", flush=True)
+        return results
+    state = CitiPulseState(_reflex_internal_init=True)
+    feed = state._feed()
+    for sensor_id, sensor in feed.sensors.items():
+        sensor["readings"] = list(histories[sensor_id])
+    state._sync_feed(feed)
+    record("commit", lambda: state._commit_tick(tick))
+    computed_vars = list(CitiPulseState.computed_vars.values())
+    for page in PAGE_ROUTES:
+        state.active_page = page
+        record(f"page:{page}", lambda: [var.fget(state) for var in computed_vars])
+    record("serialize", state.dict)
+    return results
+
+
+def _network_worker(sensors: int, history: int, zones: int, args: argparse.Namespace):
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    results = run_network(sensors, history, zones, args)
+    if resource is not None:
+        # ru_maxrss is KiB on Linux.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        for result in results:
+            result["process_peak_rss_mb"] = round(rss, 1)
+    return results
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _case_key(result: dict) -> tuple:
+    network = result["network"]
+    return network["sensors"], network["history"], network["zones"], result["case"]
+
+
+def compare(previous: dict, current: dict):
+    before = {_case_key(r): r for r in previous["results"] if "latency_ms" in r}
+    print(f"\np50 vs {previous.get('commit') or 'previous run'}:")
+    for result in current["results"]:
+        old = before.get(_case_key(result))
+        if old is None or "latency_ms" not in result:
+            continue
+        a, b = old["latency_ms"]["p50"], result["latency_ms"]["p50"]
+        change = (b - a) / a * 100 if a else 0.0
+        sensors, history, zones, case = _case_key(result)
+        print(
+            f"  {sensors:>7} sensors {history:>4} hist {zones:>3} zones  {case:<22}"
+            f" {a:>10.3f} -> {b:>10.3f} ms ({change:+.1f}%)"
+        )
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sensors", type=_int_list, default=[10, 1000, 10000, 100000])
+    parser.add_argument("--history", type=_int_list, default=[100])
+    parser.add_argument("--zones", type=_int_list, default=[6])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument(
+        "--max-seconds", type=float, default=30, help="time budget per case"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "results": [],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for sensors, history, zones in itertools.product(args.sensors, args.history, args.zones):
+            print(f"{sensors} sensors, {history} readings, {zones} zones", flush=True)
+            path = os.path.join(tmp, f"sensors-{sensors}-{zones}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(synthetic_config(sensors, zones, args.seed), f)
+            # Spawned workers inherit the environment at the time they start.
+            os.environ["CITIPULSE_SENSOR_CONFIG"] = path
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                report["results"] += pool.submit(
+                    _network_worker, sensors, history, zones, args
+                ).result()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Read-only kiosk mode: one pre-serialized dashboard frame per tick per feed.
+
+Wall displays all show the same Dashboard. Here they do not get a Reflex
+session each. They open ``GET /kiosk`` (a static page), and that page
+subscribes to ``GET /kiosk/stream`` with ``EventSource``. Add
+``?source=&target=&speed=`` to either URL to pick a data feed other than the
+simulator.
+
+Whenever a session commits a tick or alerts to a feed (``FEEDS.commit``), and
+only while kiosks watch that feed, ``KIOSK`` does three things once: it builds
+``viewmodel.dashboard_view`` from the feed, encodes it with orjson (falling
+back to ``json``), and frames it as a server-sent event. Every subscriber is
+then woken and writes those same bytes. A viewer costs a wakeup and a socket
+write per tick, however many there are. A slow viewer skips straight to the
+newest frame rather than queueing old ones. ``GET /kiosk/dashboard.json``
+returns the latest frame's JSON for polling clients.
+
+The feed is driven by the sessions running it. A kiosk waits, with keepalive
+comments, until one does.
+"""
+
+import asyncio
+import json
+import os
+from collections.abc import AsyncIterator, Hashable
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+
+from app.metrics import TELEMETRY
+from app.store import FEEDS, SharedFeed, feed_key
+from app.viewmodel import dashboard_view
+
+try:
+    import orjson
+
+    def _encode(value) -> bytes:
+        return orjson.dumps(value)
+
+except ImportError:
+
+    def _encode(value) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+KIOSK_PAGE = os.path.join(os.path.dirname(__file__), "kiosk", "index.html")
+# Seconds without a frame before a stream sends a comment to keep proxies open.
+KEEPALIVE_S = 15
+
+
+class _Channel:
+    """Latest frame of one feed and the event its subscribers wait on."""
+
+    __slots__ = ("payload", "frame", "version", "changed", "subscribers")
+
+    def __init__(self):
+        self.payload = b""
+        self.frame = b""
+        self.version = 0
+        self.changed = asyncio.Event()
+        self.subscribers = 0
+
+
+class BroadcastHub:
+    def __init__(self):
+        self._channels: dict[Hashable, _Channel] = {}
+
+    def subscribers(self) -> int:
+        return sum(channel.subscribers for channel in self._channels.values())
+
+    def publish(self, feed: SharedFeed):
+        """Renders ``feed`` once for all of its subscribers; a no-op without any."""
+        channel = self._channels.get(feed.key)
+        if channel is None or not channel.subscribers:
+            return
+        self._render(channel, feed)
+
+    def _render(self, channel: _Channel, feed: SharedFeed):
+        with TELEMETRY.time("kiosk_render"):
+            view = dashboard_view(
+                feed.sensors, feed.all_alerts, feed.last_updated, datetime.now(timezone.utc)
+            )
+            channel.payload = _encode(view)
+            channel.frame = b"event: dashboard\ndata: " + channel.payload + b"\n\n"
+        channel.version += 1
+        changed, channel.changed = channel.changed, asyncio.Event()
+        changed.set()
+
+    def latest(self, key: Hashable) -> bytes | None:
+        """JSON of the feed's current dashboard, rendered now if nobody streams it."""
+        channel = self._channels.get(key)
+        if channel is not None and channel.payload:
+            return channel.payload
+        feed = FEEDS.get(key)
+        if feed is None:
+            return None
+        return _encode(
+            dashboard_view(
+                feed.sensors, feed.all_alerts, feed.last_updated, datetime.now(timezone.utc)
+            )
+        )
+
+    async def subscribe(self, key: Hashable) -> AsyncIterator[bytes]:
+        """Yields the feed's frames as server-sent events, newest first, until closed."""
+        channel = self._channels.setdefault(key, _Channel())
+        channel.subscribers += 1
+        try:
+            feed = FEEDS.get(key)
+            if not channel.frame and feed is not None:
+                self._render(channel, feed)
+            sent = 0
+            while True:
+                # Taken before the version check, so a publish in between still wakes us.
+                changed = channel.changed
+                if channel.version != sent:
+                    sent = channel.version
+                    yield channel.frame
+                    continue
+                try:
+                    await asyncio.wait_for(changed.wait(), KEEPALIVE_S)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+        finally:
+            channel.subscribers -= 1
+            if not channel.subscribers:
+                self._channels.pop(key, None)
+
+    def report(self) -> dict[str, float]:
+        return {"kiosk_subscribers": self.subscribers(), "kiosk_feeds": len(self._channels)}
+
+
+KIOSK = BroadcastHub()
+FEEDS.add_listener(KIOSK.publish)
+TELEMETRY.add_collector(KIOSK.report)
+
+kiosk_api = FastAPI()
+
+with open(KIOSK_PAGE, "rb") as f:
+    _page = f.read()
+
+
+@kiosk_api.get("/kiosk")
+async def kiosk_page() -> Response:
+    return Response(_page, media_type="text/html", headers={"Cache-Control": "no-cache"})
+
+
+@kiosk_api.get("/kiosk/stream")
+async def kiosk_stream(
+    source: str = "simulator", target: str = "", speed: float = 60.0
+) -> StreamingResponse:
+    return StreamingResponse(
+        KIOSK.subscribe(feed_key(source, target, speed)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@kiosk_api.get("/kiosk/dashboard.json")
+async def kiosk_dashboard(
+    source: str = "simulator", target: str = "", speed: float = 60.0
+) -> Response:
+    payload = KIOSK.latest(feed_key(source, target, speed))
+    if payload is None:
+        return Response(status_code=404)
+    return Response(payload, media_type="application/json")
@@ -0,0 +1,740 @@
+try {
+    console.log('🚀 Initializing 3D Campus...');
+
+    if (typeof THREE === 'undefined') {
+        throw new Error('THREE.js library failed to load');
+    }
+
+    const canvas = document.getElementById('canvas');
+    const renderer = new THREE.WebGLRenderer({ 
+        canvas, 
+        antialias: true,
+        alpha: false,
+        powerPreference: "high-performance"
+    });
+    renderer.setPixelRatio(Math.min(window.devicePixelRatio, 2));
+    renderer.setClearColor(0x0a0e1a, 1);
+    renderer.shadowMap.enabled = true;
+    renderer.shadowMap.type = THREE.PCFSoftShadowMap;
+
+    const scene = new THREE.Scene();
+    scene.fog = new THREE.Fog(0x0a0e1a, 200, 600);
+
+    const camera = new THREE.PerspectiveCamera(50, 1, 0.1, 2000);
+    camera.position.set(0, 150, 280);
+
+    // Custom orbit controls
+    class OrbitControls {
+        constructor(camera, domElement) {
+            this.camera = camera;
+            this.domElement = domElement;
+            this.target = new THREE.Vector3(0, 20, 0);
+            this.enableDamping = true;
+            this.dampingFactor = 0.08;
+            this.rotateSpeed = 0.5;
+            this.zoomSpeed = 1.2;
+
+            this.spherical = new THREE.Spherical();
+            this.sphericalDelta = new THREE.Spherical();
+            this.offset = new THREE.Vector3();
+
+            this.mouseButtons = { LEFT: 0, MIDDLE: 1, RIGHT: 2 };
+            this.state = { NONE: -1, ROTATE: 0, ZOOM: 1, PAN: 2 };
+            this.currentState = this.state.NONE;
+
+            this.rotateStart = new THREE.Vector2();
+            this.rotateEnd = new THREE.Vector2();
+            this.rotateDelta = new THREE.Vector2();
+
+            this.panStart = new THREE.Vector2();
+            this.panEnd = new THREE.Vector2();
+            this.panDelta = new THREE.Vector2();
+
+            this.scale = 1;
+
+            this.domElement.addEventListener('contextmenu', e => e.preventDefault());
+            this.domElement.addEventListener('mousedown', this.onMouseDown.bind(this));
+            this.domElement.addEventListener('mousemove', this.onMouseMove.bind(this));
+            this.domElement.addEventListener('mouseup', this.onMouseUp.bind(this));
+            this.domElement.addEventListener('wheel', this.onMouseWheel.bind(this));
+            this.domElement.addEventListener('touchstart', this.onTouchStart.bind(this));
+            this.domElement.addEventListener('touchmove', this.onTouchMove.bind(this));
+            this.domElement.addEventListener('touchend', this.onTouchEnd.bind(this));
+        }
+
+        onMouseDown(e) {
+            if (e.button === this.mouseButtons.LEFT) {
+                this.currentState = this.state.ROTATE;
+                this.rotateStart.set(e.clientX, e.clientY);
+            } else if (e.button === this.mouseButtons.RIGHT) {
+                this.currentState = this.state.PAN;
+                this.panStart.set(e.clientX, e.clientY);
+            }
+        }
+
+        onMouseMove(e) {
+            if (this.currentState === this.state.ROTATE) {
+                this.rotateEnd.set(e.clientX, e.clientY);
+                this.rotateDelta.subVectors(this.rotateEnd, this.rotateStart);
+
+                const element = this.domElement;
+                this.sphericalDelta.theta -= 2 * Math.PI * this.rotateDelta.x / element.clientHeight * this.rotateSpeed;
+                this.sphericalDelta.phi -= 2 * Math.PI * this.rotateDelta.y / element.clientHeight * this.rotateSpeed;
+
+                this.rotateStart.copy(this.rotateEnd);
+            } else if (this.currentState === this.state.PAN) {
+                this.panEnd.set(e.clientX, e.clientY);
+                this.panDelta.subVectors(this.panEnd, this.panStart);
+                this.pan(this.panDelta.x, this.panDelta.y);
+                this.panStart.copy(this.panEnd);
+            }
+        }
+
+        onMouseUp(e) {
+            this.currentState = this.state.NONE;
+        }
+
+        onMouseWheel(e) {
+            e.preventDefault();
+            if (e.deltaY < 0) {
+                this.scale /= 0.95;
+            } else {
+                this.scale *= 0.95;
+            }
+        }
+
+        onTouchStart(e) {
+            if (e.touches.length === 1) {
+                this.currentState = this.state.ROTATE;
+                this.rotateStart.set(e.touches[0].pageX, e.touches[0].pageY);
+            } else if (e.touches.length === 2) {
+                this.currentState = this.state.PAN;
+            }
+        }
+
+        onTouchMove(e) {
+            e.preventDefault();
+            if (e.touches.length === 1 && this.currentState === this.state.ROTATE) {
+                this.rotateEnd.set(e.touches[0].pageX, e.touches[0].pageY);
+                this.rotateDelta.subVectors(this.rotateEnd, this.rotateStart);
+
+                const element = this.domElement;
+                this.sphericalDelta.theta -= 2 * Math.PI * this.rotateDelta.x / element.clientHeight * this.rotateSpeed;
+                this.sphericalDelta.phi -= 2 * Math.PI * this.rotateDelta.y / element.clientHeight * this.rotateSpeed;
+
+                this.rotateStart.copy(this.rotateEnd);
+            }
+        }
+
+        onTouchEnd(e) {
+            this.currentState = this.state.NONE;
+        }
+
+        pan(deltaX, deltaY) {
+            const offset = new THREE.Vector3();
+            const panOffset = new THREE.Vector3();
+
+            offset.copy(this.camera.position).sub(this.target);
+            let targetDistance = offset.length();
+            targetDistance *= Math.tan((this.camera.fov / 2) * Math.PI / 180.0);
+
+            const factor = 2 * deltaX * targetDistance / this.domElement.clientHeight;
+            panOffset.setFromMatrixColumn(this.camera.matrix, 0);
+            panOffset.multiplyScalar(-factor);
+            this.target.add(panOffset);
+
+            const factor2 = 2 * deltaY * targetDistance / this.domElement.clientHeight;
+            panOffset.setFromMatrixColumn(this.camera.matrix, 1);
+            panOffset.multiplyScalar(factor2);
+            this.target.add(panOffset);
+        }
+
+        update() {
+            this.offset.copy(this.camera.position).sub(this.target);
+            this.spherical.setFromVector3(this.offset);
+
+            this.spherical.theta += this.sphericalDelta.theta * this.dampingFactor;
+            this.spherical.phi += this.sphericalDelta.phi * this.dampingFactor;
+            this.spherical.phi = Math.max(0.1, Math.min(Math.PI - 0.1, this.spherical.phi));
+
+            this.spherical.radius *= this.scale;
+            this.spherical.radius = Math.max(50, Math.min(800, this.spherical.radius));
+
+            this.sphericalDelta.theta *= (1 - this.dampingFactor);
+            this.sphericalDelta.phi *= (1 - this.dampingFactor);
+            this.scale = 1;
+
+            this.offset.setFromSpherical(this.spherical);
+            this.camera.position.copy(this.target).add(this.offset);
+            this.camera.lookAt(this.target);
+        }
+
+        reset() {
+            this.target.set(0, 20, 0);
+            this.sphericalDelta.set(0, 0, 0);
+            this.scale = 1;
+        }
+    }
+
+    const controls = new OrbitControls(camera, renderer.domElement);
+
+    // Enhanced lighting
+    const hemi = new THREE.HemisphereLight(0xffffff, 0x444444, 0.8);
+    scene.add(hemi);
+
+    const dirLight = new THREE.DirectionalLight(0xffffff, 1);
+    dirLight.position.set(-150, 300, 150);
+    dirLight.castShadow = true;
+    dirLight.shadow.camera.left = -250;
+    dirLight.shadow.camera.right = 250;
+    dirLight.shadow.camera.top = 250;
+    dirLight.shadow.camera.bottom = -250;
+    dirLight.shadow.mapSize.width = 2048;
+    dirLight.shadow.mapSize.height = 2048;
+    scene.add(dirLight);
+
+    const ambient = new THREE.AmbientLight(0x404040, 0.5);
+    scene.add(ambient);
+
+    // Ground with texture
+    const groundGeom = new THREE.PlaneGeometry(600, 500);
+    const groundMat = new THREE.MeshStandardMaterial({ 
+        color: 0x1a1f2e,
+        roughness: 0.8,
+        metalness: 0.2
+    });
+    const ground = new THREE.Mesh(groundGeom, groundMat);
+    ground.rotation.x = -Math.PI / 2;
+    ground.position.y = 0;
+    ground.receiveShadow = true;
+    scene.add(ground);
+
+    // Campus buildings group
+    const campusGroup = new THREE.Group();
+    scene.add(campusGroup);
+
+    // Merges positioned geometries into one BufferGeometry (one draw call),
+    // optionally baking a per-part vertex colour.
+    function mergeGeometries(parts, withColor) {
+        let count = 0;
+        const flat = parts.map(({ geometry, position, rotationY = 0, color }) => {
+            const g = geometry.index ? geometry.toNonIndexed() : geometry.clone();
+            if (rotationY) g.rotateY(rotationY);
+            g.translate(position[0], position[1], position[2]);
+            count += g.attributes.position.count;
+            return { g, color };
+        });
+        const pos = new Float32Array(count * 3);
+        const norm = flat[0] && flat[0].g.attributes.normal ? new Float32Array(count * 3) : null;
+        const col = withColor ? new Float32Array(count * 3) : null;
+        const c = new THREE.Color();
+        let offset = 0;
+        flat.forEach(({ g, color }) => {
+            const n = g.attributes.position.count;
+            pos.set(g.attributes.position.array, offset * 3);
+            if (norm) norm.set(g.attributes.normal.array, offset * 3);
+            if (col) {
+                c.set(color);
+                for (let i = 0; i < n; i++) {
+                    col[(offset + i) * 3] = c.r;
+                    col[(offset + i) * 3 + 1] = c.g;
+                    col[(offset + i) * 3 + 2] = c.b;
+                }
+            }
+            offset += n;
+            g.dispose();
+        });
+        const merged = new THREE.BufferGeometry();
+        merged.setAttribute('position', new THREE.BufferAttribute(pos, 3));
+        if (norm) merged.setAttribute('normal', new THREE.BufferAttribute(norm, 3));
+        if (col) merged.setAttribute('color', new THREE.BufferAttribute(col, 3));
+        merged.computeBoundingSphere();
+        return merged;
+    }
+
+    // Campus buildings: bodies, edges and roofs are each one merged mesh, so
+    // draw calls stay constant however many buildings the model has.
+    const buildings = [];
+
+    function addBuilding(x, z, w, d, h, color, label, hasRoof = true) {
+        buildings.push({ x, z, w, d, h, color, label, hasRoof });
+    }
+
+    function buildCampus() {
+        const bodies = [], edges = [], roofs = [];
+        buildings.forEach(({ x, z, w, d, h, color, hasRoof }) => {
+            const box = new THREE.BoxGeometry(w, h, d);
+            bodies.push({ geometry: box, position: [x, h/2 + 1, z], color });
+            edges.push({ geometry: new THREE.EdgesGeometry(box), position: [x, h/2 + 1, z] });
+            if (hasRoof) {
+                roofs.push({
+                    geometry: new THREE.ConeGeometry(w * 0.6, h * 0.2, 4),
+                    position: [x, h + 1 + (h * 0.1), z],
+                    rotationY: Math.PI / 4
+                });
+            }
+        });
+        const bodyMesh = new THREE.Mesh(
+            mergeGeometries(bodies, true),
+            new THREE.MeshStandardMaterial({ vertexColors: true, metalness: 0.3, roughness: 0.7 })
+        );
+        bodyMesh.castShadow = true;
+        bodyMesh.receiveShadow = true;
+        campusGroup.add(bodyMesh);
+        campusGroup.add(new THREE.LineSegments(
+            mergeGeometries(edges, false),
+            new THREE.LineBasicMaterial({ color: 0x000000, opacity: 0.4, transparent: true })
+        ));
+        if (roofs.length) {
+            const roofMesh = new THREE.Mesh(
+                mergeGeometries(roofs, false),
+                new THREE.MeshStandardMaterial({ color: 0x8B4513, roughness: 0.9 })
+            );
+            roofMesh.castShadow = true;
+            campusGroup.add(roofMesh);
+        }
+    }
+
+    // MET Bhujbal Campus Buildings (realistic layout)
+    addBuilding(-50, 0, 45, 35, 32, 0xd4d4d8, 'Knowledge City Main', false);
+    addBuilding(-140, 35, 35, 28, 26, 0x93c5fd, 'Pharmacy Institute');
+    addBuilding(70, 15, 42, 30, 28, 0xfca5a5, 'Science & Commerce');
+    addBuilding(-15, 100, 32, 22, 14, 0xa7f3d0, 'Sports Complex', false);
+    addBuilding(-110, 80, 30, 22, 22, 0xc4b5fd, 'Academic Block A');
+    addBuilding(100, 90, 32, 24, 24, 0xfcd34d, 'Engineering Block');
+    addBuilding(60, -45, 36, 28, 22, 0xfbbf24, 'Library & Research');
+    addBuilding(-90, -35, 28, 24, 18, 0x86efac, 'Student Cafeteria', false);
+    addBuilding(15, 50, 25, 20, 16, 0xfda4af, 'Administrative Office');
+    addBuilding(-160, -20, 22, 18, 20, 0xa5b4fc, 'Hostel Block 1');
+    addBuilding(130, -30, 24, 20, 22, 0xa5b4fc, 'Hostel Block 2');
+
+    buildCampus();
+
+    // Trees and landscaping, drawn as two instanced meshes
+    const treePositions = [
+        [30, 60], [-30, -60], [50, -20], [-70, 50],
+        [110, 40], [-130, -50], [20, -80], [-100, 110]
+    ];
+    const trunks = new THREE.InstancedMesh(
+        new THREE.CylinderGeometry(0.5, 0.8, 4),
+        new THREE.MeshStandardMaterial({ color: 0x8B4513 }),
+        treePositions.length
+    );
+    const foliage = new THREE.InstancedMesh(
+        new THREE.SphereGeometry(3, 8, 8),
+        new THREE.MeshStandardMaterial({ color: 0x2d5016, roughness: 0.9 }),
+        treePositions.length
+    );
+    const placement = new THREE.Matrix4();
+    treePositions.forEach(([x, z], i) => {
+        trunks.setMatrixAt(i, placement.makeTranslation(x, 2, z));
+        foliage.setMatrixAt(i, placement.makeTranslation(x, 5.5, z));
+    });
+    trunks.castShadow = true;
+    foliage.castShadow = true;
+    scene.add(trunks);
+    scene.add(foliage);
+
+    // Ambient crowd: positions are animated in the vertex shader (straight
+    // lines bouncing off the campus bounds), so there is no per-frame JS loop.
+    const agentCount = 150;
+    const positions = new Float32Array(agentCount * 3);
+    const colors = new Float32Array(agentCount * 3);
+    const agentSpeeds = new Float32Array(agentCount * 2);
+
+    for (let i = 0; i < agentCount; i++) {
+        positions[i*3] = (Math.random() - 0.5) * 280;
+        positions[i*3+1] = 1.8;
+        positions[i*3+2] = (Math.random() - 0.5) * 200;
+
+        // Units per second (the old per-frame step was speed * 0.6 at 60 fps)
+        agentSpeeds[i*2] = (Math.random() - 0.5) * 1.2 * 36;
+        agentSpeeds[i*2+1] = (Math.random() - 0.5) * 1.2 * 36;
+
+        const hue = Math.random() * 0.15 + 0.55;
+        const col = new THREE.Color().setHSL(hue, 0.8, 0.6);
+        colors[i*3] = col.r;
+        colors[i*3+1] = col.g;
+        colors[i*3+2] = col.b;
+    }
+
+    const agentsGeom = new THREE.BufferGeometry();
+    agentsGeom.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+    agentsGeom.setAttribute('color', new THREE.BufferAttribute(colors, 3));
+    agentsGeom.setAttribute('velocity', new THREE.BufferAttribute(agentSpeeds, 2));
+    const agentsMat = new THREE.ShaderMaterial({
+        uniforms: {
+            time: { value: 0 },
+            size: { value: 5 },
+            scale: { value: 300 },
+            bounds: { value: new THREE.Vector2(240, 200) }
+        },
+        vertexShader: `
+            attribute vec2 velocity;
+            attribute vec3 color;
+            uniform float time;
+            uniform float size;
+            uniform float scale;
+            uniform vec2 bounds;
+            varying vec3 vColor;
+            void main() {
+                vec2 p = position.xz + velocity * time;
+                // Triangle wave: reflects p back and forth within [-bounds, bounds]
+                p = abs(mod(p - bounds, 4.0 * bounds) - 2.0 * bounds) - bounds;
+                vec4 mvPosition = modelViewMatrix * vec4(p.x, position.y, p.y, 1.0);
+                gl_PointSize = size * (scale / -mvPosition.z);
+                gl_Position = projectionMatrix * mvPosition;
+                vColor = color;
+            }
+        `,
+        fragmentShader: `
+            varying vec3 vColor;
+            void main() {
+                gl_FragColor = vec4(vColor, 0.9);
+            }
+        `,
+        transparent: true
+    });
+    const agents = new THREE.Points(agentsGeom, agentsMat);
+    agents.frustumCulled = false;
+    scene.add(agents);
+
+    // Enhanced grid
+    const grid = new THREE.GridHelper(500, 50, 0x1e3a5f, 0x0f1f3a);
+    grid.position.y = 0.05;
+    scene.add(grid);
+
+    // Resize handler
+    function resize() {
+        const w = canvas.clientWidth;
+        const h = canvas.clientHeight;
+        if (canvas.width !== w || canvas.height !== h) {
+            renderer.setSize(w, h, false);
+            camera.aspect = w / h;
+            camera.updateProjectionMatrix();
+        }
+    }
+    window.addEventListener('resize', resize);
+    resize();
+
+    // Camera presets, one per map view mode (``CitiPulseState.map_view_mode``)
+    const cameraPresets = {
+        '3d': { pos: [0, 150, 280], target: [0, 20, 0], fov: 50 },
+        'satellite': { pos: [0, 450, 10], target: [0, 0, 0], fov: 60 },
+        'heatmap': { pos: [-40, 180, 180], target: [0, 20, 0], fov: 52 },
+        'aqi': { pos: [100, 160, 70], target: [40, 20, 30], fov: 54 },
+        'crowd': { pos: [0, 260, 120], target: [0, 0, 0], fov: 55 }
+    };
+
+    let currentMode = '3d';
+
+    function setViewMode(mode) {
+        currentMode = mode;
+        console.log('📍 View mode:', mode);
+
+        // Update UI buttons
+        Object.keys(cameraPresets).forEach(m => {
+            const btn = document.getElementById('btn' + m);
+            if (btn) {
+                if (m === mode) {
+                    btn.classList.add('active');
+                    btn.classList.remove('secondary');
+                } else {
+                    btn.classList.remove('active');
+                    btn.classList.add('secondary');
+                }
+            }
+        });
+
+        const preset = cameraPresets[mode] || cameraPresets['3d'];
+        const steps = 60;
+        let step = 0;
+
+        const startPos = camera.position.clone();
+        const startTarget = controls.target.clone();
+        const endPos = new THREE.Vector3(...preset.pos);
+        const endTarget = new THREE.Vector3(...preset.target);
+        const startFov = camera.fov;
+        const endFov = preset.fov;
+
+        const animId = setInterval(() => {
+            step++;
+            const progress = Math.min(1, step / steps);
+            const eased = 1 - Math.pow(1 - progress, 3);
+
+            camera.position.lerpVectors(startPos, endPos, eased);
+            controls.target.lerpVectors(startTarget, endTarget, eased);
+            camera.fov = startFov + (endFov - startFov) * eased;
+            camera.updateProjectionMatrix();
+
+            if (progress >= 1) clearInterval(animId);
+        }, 16);
+    }
+
+    window.setViewMode = setViewMode;
+
+    function resetView() {
+        console.log('🔄 Resetting view');
+        setViewMode('3d');
+        controls.reset();
+    }
+
+    window.resetView = resetView;
+
+    // Live sensor and agent data pushed from the app with postMessage
+    const ORIGIN = { lat: 20.041264, lng: 73.85038 };
+    const M_PER_DEG_LAT = 110540;
+    const M_PER_DEG_LNG = 111320 * Math.cos(ORIGIN.lat * Math.PI / 180);
+
+    function toScene(lat, lng) {
+        return [(lng - ORIGIN.lng) * M_PER_DEG_LNG, -(lat - ORIGIN.lat) * M_PER_DEG_LAT];
+    }
+
+    // Sensors share one instanced sphere; the buffer doubles when it fills up.
+    const sensorGeom = new THREE.SphereGeometry(2.5, 16, 16);
+    const sensorMat = new THREE.MeshStandardMaterial({ emissive: 0x222222 });
+    let sensorMesh = null;
+    const sensorSlots = new Map();
+
+    function ensureSensorCapacity(count) {
+        if (sensorMesh && sensorMesh.count >= count) return;
+        const capacity = Math.max(16, 2 ** Math.ceil(Math.log2(count)));
+        const grown = new THREE.InstancedMesh(sensorGeom, sensorMat, capacity);
+        grown.instanceMatrix.setUsage(THREE.DynamicDrawUsage);
+        grown.setColorAt(0, new THREE.Color());
+        if (sensorMesh) {
+            grown.instanceMatrix.array.set(sensorMesh.instanceMatrix.array);
+            grown.instanceColor.array.set(sensorMesh.instanceColor.array);
+            scene.remove(sensorMesh);
+            sensorMesh.dispose();
+        }
+        grown.count = sensorSlots.size;
+        sensorMesh = grown;
+        scene.add(sensorMesh);
+    }
+
+    function updateSensors(sensors) {
+        const c = new THREE.Color();
+        sensors.forEach(s => {
+            let slot = sensorSlots.get(s.id);
+            if (slot === undefined) {
+                const [x, z] = toScene(s.lat, s.lng);
+                if (Math.abs(x) > 300 || Math.abs(z) > 250) return;
+                slot = sensorSlots.size;
+                ensureSensorCapacity(slot + 1);
+                sensorSlots.set(s.id, slot);
+                sensorMesh.setMatrixAt(slot, placement.makeTranslation(x, 8, z));
+                sensorMesh.count = sensorSlots.size;
+                sensorMesh.instanceMatrix.needsUpdate = true;
+            }
+            sensorMesh.setColorAt(slot, c.set(s.color));
+        });
+        if (sensorMesh) sensorMesh.instanceColor.needsUpdate = true;
+    }
+
+    // Live agents are written straight into typed buffers that are reused
+    // between updates and only reallocated when the agent count outgrows them.
+    const liveAgentsGeom = new THREE.BufferGeometry();
+    let liveCapacity = 0;
+    let liveCount = 0;
+    const liveAgents = new THREE.Points(liveAgentsGeom, new THREE.PointsMaterial({
+        size: 7,
+        vertexColors: true,
+        sizeAttenuation: true
+    }));
+    liveAgents.frustumCulled = false;
+    scene.add(liveAgents);
+
+    function ensureAgentCapacity(count) {
+        if (count <= liveCapacity) return;
+        liveCapacity = Math.max(64, 2 ** Math.ceil(Math.log2(count)));
+        const pos = new THREE.BufferAttribute(new Float32Array(liveCapacity * 3), 3);
+        const col = new THREE.BufferAttribute(new Float32Array(liveCapacity * 3), 3);
+        pos.setUsage(THREE.DynamicDrawUsage);
+        col.setUsage(THREE.DynamicDrawUsage);
+        liveAgentsGeom.setAttribute('position', pos);
+        liveAgentsGeom.setAttribute('color', col);
+    }
+
+    // Binary agent frames (see app/agent_codec.py): a <BBII header (version,
+    // kind, count, records) then 5-byte (int16 x, int16 y, uint8 type)
+    // records in 0.1 m units east/north of the origin. Delta frames carry a
+    // bitmap of changed agents before the records.
+    const AGENT_QUANTUM_M = 0.1;
+    const AGENT_COLORS = [new THREE.Color('#3b82f6'), new THREE.Color('#4f46e5')];
+
+    function applyAgentFrame(b64) {
+        const bin = atob(b64);
+        const bytes = new Uint8Array(bin.length);
+        for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+        const view = new DataView(bytes.buffer);
+        if (view.getUint8(0) !== 1) return;
+        const delta = view.getUint8(1) === 1;
+        const count = view.getUint32(2, true);
+        let offset = 10;
+        let changed = null;
+        if (delta) {
+            // A delta only applies on top of the frame it was computed from.
+            if (count !== liveCount) return;
+            changed = bytes.subarray(offset, offset + Math.ceil(count / 8));
+            offset += changed.length;
+        } else {
+            ensureAgentCapacity(count);
+            liveCount = count;
+        }
+        liveAgentsGeom.setDrawRange(0, liveCount);
+        if (!count) return;
+        const pos = liveAgentsGeom.attributes.position;
+        const col = liveAgentsGeom.attributes.color;
+        for (let i = 0; i < count; i++) {
+            if (changed && !(changed[i >> 3] & (1 << (i & 7)))) continue;
+            pos.array[i*3] = view.getInt16(offset, true) * AGENT_QUANTUM_M;
+            pos.array[i*3+1] = 2.5;
+            pos.array[i*3+2] = -view.getInt16(offset + 2, true) * AGENT_QUANTUM_M;
+            const c = AGENT_COLORS[bytes[offset + 4]] || AGENT_COLORS[0];
+            col.array[i*3] = c.r;
+            col.array[i*3+1] = c.g;
+            col.array[i*3+2] = c.b;
+            offset += 5;
+        }
+        pos.needsUpdate = true;
+        col.needsUpdate = true;
+    }
+
+    // Heat layers are instanced ground tiles, one per cell; ``tiles(k)``
+    // returns the scene x, z and hue of tile k.
+    const tileGeom = new THREE.PlaneGeometry(1, 1).rotateX(-Math.PI / 2);
+
+    function makeTileLayer(opacity, height) {
+        const mat = new THREE.MeshBasicMaterial({ transparent: true, opacity, depthWrite: false });
+        const tile = new THREE.Matrix4();
+        const c = new THREE.Color();
+        let mesh = null;
+        let capacity = 0;
+        return function draw(count, size, tiles, visible) {
+            if (count > capacity) {
+                if (mesh) {
+                    scene.remove(mesh);
+                    mesh.dispose();
+                }
+                capacity = Math.max(64, 2 ** Math.ceil(Math.log2(count)));
+                mesh = new THREE.InstancedMesh(tileGeom, mat, capacity);
+                mesh.setColorAt(0, new THREE.Color());
+                scene.add(mesh);
+            }
+            if (!mesh) return;
+            for (let k = 0; k < count; k++) {
+                const [x, z, hue] = tiles(k);
+                tile.makeScale(size, 1, size).setPosition(x, height, z);
+                mesh.setMatrixAt(k, tile);
+                mesh.setColorAt(k, c.setHSL(hue, 0.9, 0.5));
+            }
+            mesh.count = count;
+            mesh.visible = visible;
+            mesh.instanceMatrix.needsUpdate = true;
+            mesh.instanceColor.needsUpdate = true;
+        };
+    }
+
+    const drawCrowd = makeTileLayer(0.55, 0.3);
+    const drawAqi = makeTileLayer(0.4, 0.2);
+
+    // Crowd View: occupied spatial-hash cells, green to red by agent count.
+    function updateCrowd(crowd, visible) {
+        const cells = crowd.cells;
+        const size = crowd.cellSize;
+        drawCrowd(cells.length / 3, size, (k) => [
+            (cells[k*3] + 0.5) * size,
+            -(cells[k*3+1] + 0.5) * size,
+            Math.max(0, 0.33 - cells[k*3+2] * 0.05),
+        ], visible);
+    }
+
+    // Heatmap / AQI overlay: dispersed AQI increments on the row-major grid,
+    // green at +1 to red at +50; cleaner cells are left out.
+    function updateAqiGrid(grid, visible) {
+        const values = grid.values;
+        const size = grid.cellSize;
+        const polluted = [];
+        for (let i = 0; i < values.length; i++) {
+            if (values[i] >= 1) polluted.push(i);
+        }
+        drawAqi(polluted.length, size, (k) => {
+            const i = polluted[k];
+            return [
+                grid.origin[0] + (i % grid.cols + 0.5) * size,
+                -(grid.origin[1] + (Math.floor(i / grid.cols) + 0.5) * size),
+                0.33 * Math.max(0, 1 - values[i] / 50),
+            ];
+        }, visible);
+    }
+
+    // Main render loop
+    let frameCount = 0;
+
+    function renderLoop(currentTime) {
+        resize();
+        agentsMat.uniforms.time.value = currentTime / 1000;
+        agentsMat.uniforms.scale.value = canvas.clientHeight / 2;
+        controls.update();
+        renderer.render(scene, camera);
+
+        frameCount++;
+        if (frameCount % 60 === 0) {
+            document.getElementById('agentsVal').textContent = agentCount + liveCount;
+        }
+
+        requestAnimationFrame(renderLoop);
+    }
+
+    // Only the embedding page may drive the scene.
+    const parentOrigin = document.referrer ? new URL(document.referrer).origin : location.origin;
+    // Last view mode the page pushed; the scene's own buttons hold until it changes.
+    let pushedMode = null;
+
+    // Listen for parent window messages (from Reflex state)
+    window.addEventListener('message', (event) => {
+        if (event.source !== window.parent || event.origin !== parentOrigin) return;
+        if (!event.data || typeof event.data !== 'object') return;
+        if (event.data.type === 'setViewMode') {
+            setViewMode(event.data.mode);
+        } else if (event.data.type === 'spawnAgents') {
+            console.log('👥 Spawning more agents');
+            // Could add more agents here
+        } else if (event.data.type === 'updateWeather') {
+            document.getElementById('tempVal').textContent = event.data.temp + '°C';
+            document.getElementById('humVal').textContent = event.data.humidity + '%';
+        } else if (event.data.type === 'update') {
+            if (event.data.viewMode && event.data.viewMode !== pushedMode) {
+                pushedMode = event.data.viewMode;
+                setViewMode(pushedMode);
+            }
+            updateSensors(event.data.sensors || []);
+            if (event.data.agentFrame) applyAgentFrame(event.data.agentFrame);
+            if (event.data.crowd) updateCrowd(event.data.crowd, currentMode === 'crowd');
+            if (event.data.aqiGrid) {
+                updateAqiGrid(event.data.aqiGrid, true);
+            } else {
+                drawAqi(0, 1, null, false);
+            }
+            if (event.data.weather) {
+                document.getElementById('tempVal').textContent = event.data.weather.temp + '°C';
+                document.getElementById('humVal').textContent = event.data.weather.humidity + '%';
+            }
+        }
+    });
+
+    // Initialize
+    console.log('✅ 3D Campus initialized successfully');
+    setTimeout(() => {
+        document.getElementById('loading').style.display = 'none';
+        setViewMode('3d');
+        requestAnimationFrame(renderLoop);
+    }, 1200);
+
+} catch (error) {
+    console.error('❌ Critical error:', error);
+    document.getElementById('loading').style.display = 'none';
+    document.getElementById('error').style.display = 'block';
+    document.getElementById('errorMsg').textContent = error.message || 'Failed to initialize 3D scene. Please refresh the page.';
+}
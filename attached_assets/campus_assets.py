@@ -0,0 +1,135 @@
+"""Versioned static bundle for the 3D campus scene.
+
+The scene lives in ``campus3d/`` next to this module: an HTML shell, its script
+and stylesheet, and three.js vendored under ``campus3d/vendor/``. Every file is
+served from ``/campus3d/`` under a content-hashed name with a year-long
+immutable ``Cache-Control``, so repeat visits load from the browser cache and a
+changed file simply gets a new URL. The map page embeds ``CAMPUS3D_ENTRY`` and
+pushes sensor and agent data into the frame with ``postMessage``. The scene's
+AQI legend is rendered into the HTML from ``aqi.legend``, so it always lists
+the categories the markers are coloured by.
+
+three.js is vendored by an explicit build step, never at import: it downloads
+the pinned release, checks it against cdnjs's published SHA-512 and only then
+writes it to ``campus3d/vendor/``. Run it once per checkout or image build::
+
+    python -m app.campus_assets --vendor
+
+Without it the scene's other files are still served and a warning is logged;
+the page never loads three.js from a CDN.
+"""
+
+import base64
+import hashlib
+import html
+import logging
+import mimetypes
+import os
+import posixpath
+
+from fastapi import FastAPI, Response
+
+from app.aqi import legend
+
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "campus3d")
+THREE_VERSION = "r128"
+THREE_URL = (
+    f"https://cdnjs.cloudflare.com/ajax/libs/three.js/{THREE_VERSION}/three.min.js"
+)
+# Subresource-integrity digest cdnjs publishes for the file above.
+THREE_SHA512 = (
+    "dLxUelApnYxpLt6K2iomGngnHO83iUvZytA3YjDUCjT0HDOHKXnVYdf3hU4JjM8uEhxf9nD1/ey98U3t2vZ0qQ=="
+)
+THREE_PATH = "vendor/three.min.js"
+# Files referenced from index.html, rewritten to their hashed names.
+BUNDLE_FILES = (THREE_PATH, "campus3d.css", "campus3d.js")
+LEGEND_MARKER = "<!-- AQI_LEGEND -->"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _hashed_name(path: str, content: bytes) -> str:
+    stem, ext = posixpath.splitext(path)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def check_integrity(content: bytes, expected: str):
+    digest = base64.b64encode(hashlib.sha512(content).digest()).decode("ascii")
+    if digest != expected:
+        raise ValueError(f"three.js {THREE_VERSION} failed its integrity check")
+
+
+def vendor_three(static_dir: str = STATIC_DIR) -> str:
+    """Downloads the pinned three.js build into ``campus3d/vendor/``."""
+    import httpx
+
+    response = httpx.get(THREE_URL, follow_redirects=True, timeout=30)
+    response.raise_for_status()
+    check_integrity(response.content, THREE_SHA512)
+    path = os.path.join(static_dir, *THREE_PATH.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(response.content)
+    return path
+
+
+def legend_html() -> str:
+    return "\n".join(
+        f'<div><span class="dot" style="background:{item["color"]}"></span>'
+        f'{html.escape(item["label"])} ({html.escape(item["range"])})</div>'
+        for item in legend("zone")
+    )
+
+
+def build_bundle(static_dir: str = STATIC_DIR) -> tuple[str, dict[str, tuple[bytes, str]]]:
+    """Returns the hashed entry name and ``{hashed name: (content, media type)}``."""
+    if not os.path.exists(os.path.join(static_dir, *THREE_PATH.split("/"))):
+        logging.warning(
+            f"three.js {THREE_VERSION} is not vendored; the 3D scene will not render "
+            "until `python -m app.campus_assets --vendor` is run"
+        )
+    files: dict[str, tuple[bytes, str]] = {}
+    with open(os.path.join(static_dir, "index.html"), encoding="utf-8") as f:
+        page = f.read()
+    page = page.replace(LEGEND_MARKER, legend_html())
+    for name in BUNDLE_FILES:
+        path = os.path.join(static_dir, *name.split("/"))
+        if not os.path.exists(path):
+            logging.warning(f"Campus 3D bundle is missing {name}")
+            continue
+        with open(path, "rb") as f:
+            content = f.read()
+        hashed = _hashed_name(name, content)
+        files[hashed] = (content, mimetypes.guess_type(name)[0] or "text/plain")
+        page = page.replace(f'"{name}"', f'"{hashed}"')
+    content = page.encode("utf-8")
+    entry = _hashed_name("index.html", content)
+    files[entry] = (content, "text/html")
+    return entry, files
+
+
+_entry, _files = build_bundle()
+CAMPUS3D_ENTRY = f"/campus3d/{_entry}"
+
+campus3d_api = FastAPI()
+
+
+@campus3d_api.get("/campus3d/{name:path}")
+async def campus3d_file(name: str) -> Response:
+    found = _files.get(name)
+    if found is None:
+        return Response(status_code=404)
+    content, media_type = found
+    return Response(content, media_type=media_type, headers={"Cache-Control": IMMUTABLE})
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Campus 3D static bundle.")
+    parser.add_argument(
+        "--vendor", action="store_true", help=f"download three.js {THREE_VERSION}"
+    )
+    args = parser.parse_args()
+    if args.vendor:
+        print(f"Vendored three.js {THREE_VERSION} to {vendor_three()}")
+    print(f"Entry: {build_bundle()[0]}")
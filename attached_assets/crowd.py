@@ -0,0 +1,186 @@
+"""Crowd density, zone occupancy and collision avoidance for moving agents.
+
+Each step bins agents into a uniform spatial hash of ``cell_m`` metre cells.
+Per-cell counts are the Crowd View heat layer and zone occupancy counts agents
+inside each zone polygon. Neighbours are only looked up in the 3x3 block of
+cells around each agent, so the social-force repulsion between agents closer
+than ``radius_m`` costs O(n * k) for k agents per neighbourhood rather than
+O(n^2).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from app.agent_codec import M_PER_DEG_LAT, M_PER_DEG_LNG, ORIGIN
+from app.pipeline import make_alert
+
+# Zone occupancy as a fraction of its configured capacity.
+CROWD_THRESHOLDS = {"warning": 0.8, "critical": 1.0}
+_LEVEL_RANK = {"": 0, "warning": 1, "critical": 2}
+# Offsets the hash keys so cell coordinates within +-2^20 cells pack into one int64.
+_KEY_OFFSET = 1 << 20
+_KEY_STRIDE = 1 << 21
+
+
+def to_local(lat, lng) -> tuple[np.ndarray, np.ndarray]:
+    """Metres east and north of the campus origin."""
+    x = (np.asarray(lng, dtype=np.float64) - ORIGIN[1]) * M_PER_DEG_LNG
+    y = (np.asarray(lat, dtype=np.float64) - ORIGIN[0]) * M_PER_DEG_LAT
+    return x, y
+
+
+def to_latlng(x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return ORIGIN[0] + y / M_PER_DEG_LAT, ORIGIN[1] + x / M_PER_DEG_LNG
+
+
+def _cell_keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    return (cx + _KEY_OFFSET) * _KEY_STRIDE + (cy + _KEY_OFFSET)
+
+
+def neighbour_pairs(
+    x: np.ndarray, y: np.ndarray, cell_m: float, radius_m: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs ``i < j`` closer than ``radius_m`` (requires radius <= cell)."""
+    n = len(x)
+    if n < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    cx = np.floor(x / cell_m).astype(np.int64)
+    cy = np.floor(y / cell_m).astype(np.int64)
+    order = np.argsort(_cell_keys(cx, cy), kind="stable")
+    sorted_keys = _cell_keys(cx, cy)[order]
+    agents = np.arange(n)
+    firsts, seconds = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            keys = _cell_keys(cx + dx, cy + dy)
+            lo = np.searchsorted(sorted_keys, keys, "left")
+            counts = np.searchsorted(sorted_keys, keys, "right") - lo
+            total = int(counts.sum())
+            if not total:
+                continue
+            starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+            i = np.repeat(agents, counts)
+            j = order[np.arange(total) + starts]
+            keep = i < j
+            firsts.append(i[keep])
+            seconds.append(j[keep])
+    if not firsts:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    i, j = np.concatenate(firsts), np.concatenate(seconds)
+    close = np.hypot(x[i] - x[j], y[i] - y[j]) < radius_m
+    return i[close], j[close]
+
+
+def points_in_polygon(x: np.ndarray, y: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Vectorized even-odd ray casting; ``polygon`` is an ``(m, 2)`` x/y array."""
+    inside = np.zeros(len(x), dtype=bool)
+    px, py = polygon[:, 0], polygon[:, 1]
+    qx, qy = np.roll(px, -1), np.roll(py, -1)
+    for ax, ay, bx, by in zip(px, py, qx, qy):
+        if ay == by:
+            continue
+        crosses = (ay > y) != (by > y)
+        at_x = ax + (y - ay) * (bx - ax) / (by - ay)
+        inside ^= crosses & (x < at_x)
+    return inside
+
+
+@dataclass
+class CrowdStep:
+    lat: np.ndarray
+    lng: np.ndarray
+    # Flattened (cell x, cell y, count) triples for occupied cells.
+    cells: list[int]
+    occupancy: dict[str, int]
+
+
+class CrowdModel:
+    def __init__(
+        self,
+        zones: list[dict],
+        cell_m: float = 4.0,
+        radius_m: float = 1.5,
+        strength: float = 2.0,
+        falloff_m: float = 0.3,
+        max_step_m: float = 0.5,
+    ):
+        self.cell_m = cell_m
+        self.radius_m = min(radius_m, cell_m)
+        self.strength = strength
+        self.falloff_m = falloff_m
+        self.max_step_m = max_step_m
+        self.zones = {}
+        for zone in zones:
+            zx, zy = to_local(
+                [p["lat"] for p in zone["polygon"]], [p["lng"] for p in zone["polygon"]]
+            )
+            self.zones[zone["id"]] = np.column_stack([zx, zy])
+
+    def repulsion(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Social-force push away from neighbours, clipped to ``max_step_m``."""
+        i, j = neighbour_pairs(x, y, self.cell_m, self.radius_m)
+        n = len(x)
+        if not len(i):
+            return np.zeros(n), np.zeros(n)
+        dx, dy = x[i] - x[j], y[i] - y[j]
+        d = np.maximum(np.hypot(dx, dy), 1e-6)
+        magnitude = self.strength * np.exp((self.radius_m - d) / self.falloff_m) / d
+        fx, fy = magnitude * dx, magnitude * dy
+        push_x = np.bincount(i, fx, n) - np.bincount(j, fx, n)
+        push_y = np.bincount(i, fy, n) - np.bincount(j, fy, n)
+        norm = np.maximum(np.hypot(push_x, push_y) / self.max_step_m, 1.0)
+        return push_x / norm, push_y / norm
+
+    def density(self, x: np.ndarray, y: np.ndarray) -> list[int]:
+        if not len(x):
+            return []
+        cells = np.column_stack(
+            [np.floor(x / self.cell_m), np.floor(y / self.cell_m)]
+        ).astype(np.int64)
+        unique, counts = np.unique(cells, axis=0, return_counts=True)
+        return np.column_stack([unique, counts]).ravel().tolist()
+
+    def occupancy(self, x: np.ndarray, y: np.ndarray) -> dict[str, int]:
+        return {
+            zone_id: int(points_in_polygon(x, y, polygon).sum())
+            for zone_id, polygon in self.zones.items()
+        }
+
+    def step(self, lat, lng) -> CrowdStep:
+        """Separates crowded agents and measures density on the result."""
+        x, y = to_local(lat, lng)
+        push_x, push_y = self.repulsion(x, y)
+        x, y = x + push_x, y + push_y
+        new_lat, new_lng = to_latlng(x, y)
+        return CrowdStep(new_lat, new_lng, self.density(x, y), self.occupancy(x, y))
+
+
+def crowd_alerts(
+    occupancy: dict[str, int],
+    zones: dict[str, dict],
+    previous_levels: dict[str, str],
+    now: datetime,
+) -> list[dict]:
+    """Alerts for zones whose occupancy level rose since the previous step.
+
+    ``previous_levels`` is updated in place; zones without a ``capacity`` are
+    never alerted.
+    """
+    alerts = []
+    for zone_id, count in occupancy.items():
+        capacity = zones.get(zone_id, {}).get("capacity")
+        if not capacity:
+            continue
+        level = ""
+        for name in ("warning", "critical"):
+            if count >= CROWD_THRESHOLDS[name] * capacity:
+                level = name
+        if _LEVEL_RANK[level] > _LEVEL_RANK[previous_levels.get(zone_id, "")]:
+            threshold = round(CROWD_THRESHOLDS[level] * capacity)
+            alerts.append(
+                make_alert(zones[zone_id]["name"], "occupancy", count, threshold, level, now)
+            )
+        previous_levels[zone_id] = level
+    return alerts
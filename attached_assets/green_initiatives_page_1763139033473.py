@@ -9,16 +9,26 @@ def recommendation_card(recommendation: dict[str, str]) -> rx.Component:
                 rx.el.h3(recommendation["title"], class_name="text-xl font-bold"),
                 rx.el.p(recommendation["description"], class_name="text-slate-600"),
             ),
-            rx.el.span(
-                "High Priority",
-                class_name="text-xs px-3 py-1 rounded-full bg-emerald-50 text-emerald-600 font-semibold",
+            rx.cond(
+                recommendation["priority"] != "",
+                rx.el.span(
+                    recommendation["priority"],
+                    class_name="text-xs px-3 py-1 rounded-full bg-emerald-50 text-emerald-600 font-semibold",
+                ),
             ),
             class_name="flex justify-between items-start mb-4",
         ),
-        rx.el.p(f"📍 Campus-wide", class_name="text-sm text-slate-500"),
+        rx.cond(
+            recommendation["location"] != "",
+            rx.el.p(
+                "📍 " + recommendation["location"], class_name="text-sm text-slate-500"
+            ),
+        ),
         rx.el.p(
-            "High Impact", class_name="text-sm text-emerald-600 font-semibold mt-2"
+            recommendation["impact"],
+            class_name="text-sm text-emerald-600 font-semibold mt-2",
         ),
+        rx.el.p(recommendation["band"], class_name="text-xs text-slate-500 mt-1"),
         class_name="bg-white/90 p-6 rounded-2xl shadow-xl border-l-4 border-emerald-400 hover:shadow-2xl transition-all",
     )
 
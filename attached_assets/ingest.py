@@ -0,0 +1,261 @@
+"""Batched sensor ingestion with a bounded queue, backpressure and coalescing.
+
+Gateways ``POST /ingest`` either JSON lines (one reading object per line) or a
+packed binary body of ``BINARY_RECORD`` structs (``Content-Type:
+application/octet-stream``). Parsed batches go onto a bounded queue; when it is
+full the request waits up to ``put_timeout`` seconds and is then rejected with
+``503`` and ``Retry-After`` so senders slow down instead of the server buffering
+without limit. A single consumer coalesces batches into frames holding only the
+latest reading per sensor, and each session's sensor tick picks up every frame
+published since its previous tick and feeds it through the same
+``compute_tick`` path as simulated readings.
+
+Senders authenticate with ``Authorization: Bearer <CITIPULSE_ADMIN_TOKEN>``
+(see ``app.auth``). A malformed body is rejected with ``400`` naming the
+offending line.
+"""
+
+import asyncio
+import json
+from collections import deque
+from itertools import islice
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import FastAPI, Request, Response
+
+from app.aqi import POLLUTANTS, aqi_from_concentrations
+from app.auth import authorized
+from app.metrics import TELEMETRY
+
+# sensor_id, unix timestamp, temperature, humidity, aqi, co2 (24 bytes, little endian)
+BINARY_RECORD = np.dtype(
+    [
+        ("sensor_id", "<u4"),
+        ("timestamp", "<f8"),
+        ("temperature", "<f4"),
+        ("humidity", "<f4"),
+        ("aqi", "<u2"),
+        ("co2", "<u2"),
+    ]
+)
+READING_FIELDS = ("temperature", "humidity", "aqi", "co2")
+
+
+def _reading(timestamp: float, temperature, humidity, aqi, co2) -> dict:
+    return {
+        "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+        "temperature": round(float(temperature), 2),
+        "humidity": round(float(humidity), 2),
+        "aqi": int(aqi),
+        "co2": int(co2),
+    }
+
+
+def parse_binary(body: bytes) -> dict[int, dict]:
+    """Parses packed records, keeping only the newest reading per sensor."""
+    if len(body) % BINARY_RECORD.itemsize:
+        raise ValueError(
+            f"Binary body must be a multiple of {BINARY_RECORD.itemsize} bytes"
+        )
+    records = np.frombuffer(body, dtype=BINARY_RECORD)
+    if not len(records):
+        return {}
+    records = records[np.lexsort((records["timestamp"], records["sensor_id"]))]
+    last = np.append(records["sensor_id"][1:] != records["sensor_id"][:-1], True)
+    return {
+        int(r["sensor_id"]): _reading(
+            r["timestamp"], r["temperature"], r["humidity"], r["aqi"], r["co2"]
+        )
+        for r in records[last]
+    }
+
+
+def _fill_aqi(items: list[dict]):
+    """Derives ``aqi`` for readings that send pollutant concentrations instead."""
+    pending = [
+        item for item in items if "aqi" not in item and any(p in item for p in POLLUTANTS)
+    ]
+    if not pending:
+        return
+    aqi, _ = aqi_from_concentrations(
+        {
+            p: [float(item.get(p, np.nan)) for item in pending]
+            for p in POLLUTANTS
+        }
+    )
+    for item, value in zip(pending, aqi.tolist()):
+        item["aqi"] = value
+
+
+def parse_jsonl(body: bytes) -> dict[int, dict]:
+    """Parses JSON lines, keeping only the newest reading per sensor.
+
+    ``timestamp`` may be a unix time or an ISO string and defaults to now.
+    Instead of ``aqi`` a reading may carry pollutant concentrations
+    (``aqi.POLLUTANTS``), from which the AQI is computed for the whole batch.
+    """
+    batch: dict[int, tuple[float, dict]] = {}
+    now = datetime.now(timezone.utc).timestamp()
+    items: list[tuple[int, dict]] = []
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError("a reading must be a JSON object")
+            for pollutant in POLLUTANTS:
+                if pollutant in item:
+                    item[pollutant] = float(item[pollutant])
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Line {number}: {e}") from e
+        items.append((number, item))
+    _fill_aqi([item for _, item in items])
+    for number, item in items:
+        try:
+            sensor_id = int(item["sensor_id"])
+            values = [item[f] for f in READING_FIELDS]
+            timestamp = item.get("timestamp", now)
+            if isinstance(timestamp, str):
+                timestamp = datetime.fromisoformat(timestamp).timestamp()
+            previous = batch.get(sensor_id)
+            if previous is None or timestamp >= previous[0]:
+                batch[sensor_id] = (timestamp, _reading(timestamp, *values))
+        except KeyError as e:
+            raise ValueError(f"Line {number}: missing field {e}") from e
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            raise ValueError(f"Line {number}: {e}") from e
+    return {sensor_id: reading for sensor_id, (_, reading) in batch.items()}
+
+
+class IngestQueue:
+    """Bounded batch queue feeding per-sensor coalesced frames.
+
+    The consumer merges batches into a pending frame (newest reading per
+    sensor) that is published at most every ``frame_interval`` seconds, or
+    whenever a session collects. Published frames are kept in a ring of
+    ``max_frames`` so sessions ticking at different times all see every sensor.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        put_timeout: float = 0.5,
+        frame_interval: float = 0.5,
+        max_frames: int = 1024,
+    ):
+        self.maxsize = maxsize
+        self.put_timeout = put_timeout
+        self.frame_interval = frame_interval
+        self._queue: asyncio.Queue | None = None
+        self._consumer: asyncio.Task | None = None
+        self._frames: deque[dict[int, dict]] = deque(maxlen=max_frames)
+        self._pending: dict[int, dict] = {}
+        self._last_publish = 0.0
+        self._seq = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.coalesced = 0
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.maxsize)
+        if self._consumer is None or self._consumer.done():
+            self._consumer = asyncio.get_running_loop().create_task(self._consume())
+
+    async def submit(self, batch: dict[int, dict]) -> bool:
+        """Enqueues a batch; returns False if the queue stayed full (backpressure)."""
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._queue.put(batch), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += len(batch)
+            TELEMETRY.count("ingest_rejected_readings", len(batch))
+            return False
+        self.accepted += len(batch)
+        TELEMETRY.count("ingest_accepted_readings", len(batch))
+        return True
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._queue.get()
+            self.coalesced += len(batch.keys() & self._pending.keys())
+            self._pending.update(batch)
+            if loop.time() - self._last_publish >= self.frame_interval:
+                self._publish()
+                self._last_publish = loop.time()
+            # Yield so HTTP handlers and sessions get the loop between batches.
+            await asyncio.sleep(0)
+
+    def _publish(self):
+        if self._pending:
+            self._frames.append(self._pending)
+            self._pending = {}
+            self._seq += 1
+
+    def head(self) -> int:
+        """Sequence a new feed starts collecting from, past every published frame."""
+        return self._seq
+
+    def collect(self, since: int) -> tuple[int, dict[int, dict]]:
+        """Merges every frame published after ``since``; returns (new_seq, readings)."""
+        self._publish()
+        missing = min(self._seq - since, len(self._frames))
+        readings: dict[int, dict] = {}
+        for frame in islice(self._frames, len(self._frames) - missing, None):
+            readings.update(frame)
+        return self._seq, readings
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "pending_sensors": len(self._pending),
+        }
+
+
+INGEST_QUEUE = IngestQueue()
+TELEMETRY.add_collector(
+    lambda: {
+        f"ingest_{name}": value
+        for name, value in INGEST_QUEUE.stats().items()
+        if name in ("queue_depth", "pending_sensors")
+    }
+)
+
+ingest_api = FastAPI()
+
+
+@ingest_api.post("/ingest")
+async def ingest(request: Request) -> Response:
+    if not authorized(request):
+        return Response(status_code=403)
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(
+            "application/octet-stream"
+        ):
+            batch = parse_binary(body)
+        else:
+            batch = parse_jsonl(body)
+    except ValueError as e:
+        return Response(json.dumps({"error": str(e)}), 400, media_type="application/json")
+    if not await INGEST_QUEUE.submit(batch):
+        return Response(
+            json.dumps({"error": "Ingestion queue full"}),
+            503,
+            headers={"Retry-After": "1"},
+            media_type="application/json",
+        )
+    return Response(
+        json.dumps({"accepted": len(batch)}), 202, media_type="application/json"
+    )
+
+
+@ingest_api.get("/ingest/stats")
+async def ingest_stats() -> dict[str, int]:
+    return INGEST_QUEUE.stats()
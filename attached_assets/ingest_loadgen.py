@@ -0,0 +1,122 @@
+"""Local load generator for the ``/ingest`` endpoint.
+
+Usage::
+
+    python -m app.ingest_loadgen --url http://localhost:8000/ingest \
+        --sensors 1000 --rate 5000 --batch 500 --format binary --duration 30
+
+Sends ``rate`` readings per second in batches of ``batch`` across ``sensors``
+sensor ids, honours ``503``/``Retry-After`` backpressure, and prints the
+achieved throughput and request latency percentiles. The bearer token defaults
+to ``CITIPULSE_ADMIN_TOKEN`` from the environment.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from app.auth import TOKEN_ENV
+from app.ingest import BINARY_RECORD
+
+
+def make_batch(rng: np.random.Generator, sensors: int, size: int, fmt: str) -> bytes:
+    records = np.zeros(size, dtype=BINARY_RECORD)
+    records["sensor_id"] = rng.integers(1, sensors + 1, size)
+    records["timestamp"] = time.time()
+    records["temperature"] = rng.uniform(24, 36, size)
+    records["humidity"] = rng.uniform(35, 80, size)
+    records["aqi"] = rng.integers(30, 170, size)
+    records["co2"] = rng.integers(400, 1300, size)
+    if fmt == "binary":
+        return records.tobytes()
+    return b"\n".join(
+        json.dumps(
+            {
+                "sensor_id": int(r["sensor_id"]),
+                "timestamp": float(r["timestamp"]),
+                "temperature": round(float(r["temperature"]), 2),
+                "humidity": round(float(r["humidity"]), 2),
+                "aqi": int(r["aqi"]),
+                "co2": int(r["co2"]),
+            }
+        ).encode()
+        for r in records
+    )
+
+
+async def run(args: argparse.Namespace):
+    import httpx
+
+    rng = np.random.default_rng(args.seed)
+    headers = {
+        "content-type": "application/octet-stream"
+        if args.format == "binary"
+        else "application/x-ndjson",
+        "authorization": f"Bearer {args.token}",
+    }
+    interval = args.batch / args.rate
+    latencies: list[float] = []
+    sent = rejected = 0
+    deadline = time.monotonic() + args.duration
+    async with httpx.AsyncClient(timeout=10) as client:
+
+        async def worker():
+            nonlocal sent, rejected
+            next_send = time.monotonic()
+            while time.monotonic() < deadline:
+                body = make_batch(rng, args.sensors, args.batch, args.format)
+                started = time.perf_counter()
+                response = await client.post(args.url, content=body, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code == 503:
+                    rejected += args.batch
+                    retry = float(response.headers.get("Retry-After", 1))
+                    await asyncio.sleep(retry * random.uniform(0.5, 1.0))
+                    continue
+                response.raise_for_status()
+                sent += args.batch
+                next_send += interval * args.concurrency
+                await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    print(
+        json.dumps(
+            {
+                "readings_sent": sent,
+                "readings_rejected": rejected,
+                "readings_per_second": round(sent / elapsed, 1),
+                "latency_ms": {
+                    "p50": round(float(np.percentile(lat, 50)), 2),
+                    "p95": round(float(np.percentile(lat, 95)), 2),
+                    "p99": round(float(np.percentile(lat, 99)), 2),
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000/ingest")
+    parser.add_argument("--sensors", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=5000, help="readings per second")
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--format", choices=("binary", "jsonl"), default="binary")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV, ""))
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Sensor liveness tracking on a hierarchical timer wheel.
+
+Every report re-arms the sensor's timer at ``last report + grace * interval``.
+Timers live in a hierarchical hashed wheel: level ``L`` has ``slots`` buckets
+of ``slots ** L`` ticks each. Arming, re-arming and cancelling are O(1)
+dictionary operations. Advancing the clock only visits the buckets that came
+due, plus the occasional cascade of a higher-level bucket into lower levels.
+So a check costs O(expired) however many sensors are being watched, instead
+of a scan over every sensor.
+"""
+
+from collections.abc import Hashable, Iterable
+
+# Missed intervals before a sensor counts as offline.
+DEFAULT_GRACE = 3.0
+
+
+class TimerWheel:
+    """Hierarchical timer wheel holding at most one timer per key."""
+
+    def __init__(
+        self, start: float = 0.0, resolution: float = 1.0, slots: int = 64, levels: int = 4
+    ):
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self._wheels: list[list[dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._where: dict[Hashable, tuple[int, int]] = {}
+        self._tick = int(start // resolution)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def _place(self, key: Hashable, due: int):
+        level = 0
+        span = self.slots
+        # The lowest level whose current rotation still contains ``due``.
+        while level < self.levels - 1 and due // span != self._tick // span:
+            level += 1
+            span *= self.slots
+        slot = (due // self.slots**level) % self.slots
+        self._wheels[level][slot][key] = due
+        self._where[key] = (level, slot)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Arms (or re-arms) ``key`` to expire at ``deadline`` seconds."""
+        self.cancel(key)
+        # The current tick has been expired already; overdue timers fire on the next.
+        self._place(key, max(int(deadline // self.resolution), self._tick + 1))
+
+    def cancel(self, key: Hashable):
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, slot = where
+            del self._wheels[level][slot][key]
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Moves the clock to ``now`` and returns the keys that expired."""
+        target = int(now // self.resolution)
+        if target <= self._tick:
+            return []
+        if target - self._tick >= self.slots**self.levels:
+            return self._rebuild(target)
+        expired = []
+        while self._tick < target:
+            self._tick += 1
+            for level in range(self.levels - 1, 0, -1):
+                if self._tick % self.slots**level == 0:
+                    slot = (self._tick // self.slots**level) % self.slots
+                    bucket = self._wheels[level][slot]
+                    self._wheels[level][slot] = {}
+                    for key, due in bucket.items():
+                        self._place(key, due)
+            bucket = self._wheels[0][self._tick % self.slots]
+            self._wheels[0][self._tick % self.slots] = {}
+            for key in bucket:
+                del self._where[key]
+            expired.extend(bucket)
+        return expired
+
+    def _rebuild(self, target: int) -> list[Hashable]:
+        """Handles a clock jump past the whole wheel by re-placing every timer."""
+        timers = [
+            (key, due) for wheel in self._wheels for bucket in wheel for key, due in bucket.items()
+        ]
+        self._wheels = [[{} for _ in range(self.slots)] for _ in range(self.levels)]
+        self._where = {}
+        self._tick = target
+        expired = []
+        for key, due in timers:
+            if due <= target:
+                expired.append(key)
+            else:
+                self._place(key, due)
+        return expired
+
+
+class LivenessTracker:
+    """Marks sensors offline after ``grace`` missed report intervals."""
+
+    def __init__(
+        self,
+        default_interval: float,
+        intervals: dict[Hashable, float] | None = None,
+        grace: float = DEFAULT_GRACE,
+        resolution: float = 1.0,
+    ):
+        self.default_interval = default_interval
+        self.intervals = intervals or {}
+        self.grace = grace
+        self.resolution = resolution
+        # Started on the first report, so its clock begins at the sensors' time.
+        self.wheel: TimerWheel | None = None
+        self.last_seen: dict[Hashable, float] = {}
+        self.offline: set[Hashable] = set()
+
+    def timeout(self, sensor_id: Hashable) -> float:
+        return self.grace * self.intervals.get(sensor_id, self.default_interval)
+
+    def _arm(self, sensor_id: Hashable, now: float):
+        if self.wheel is None:
+            self.wheel = TimerWheel(now, self.resolution)
+        self.last_seen[sensor_id] = now
+        self.wheel.schedule(sensor_id, now + self.timeout(sensor_id))
+
+    def watch(self, sensor_ids: Iterable[Hashable], now: float):
+        """Starts the clock for sensors that have not reported yet."""
+        for sensor_id in sensor_ids:
+            if sensor_id not in self.last_seen:
+                self._arm(sensor_id, now)
+
+    def report(self, sensor_ids: Iterable[Hashable], now: float) -> list[Hashable]:
+        """Records reports at ``now``; returns the sensors that came back online."""
+        recovered = []
+        for sensor_id in sensor_ids:
+            self._arm(sensor_id, now)
+            if sensor_id in self.offline:
+                self.offline.discard(sensor_id)
+                recovered.append(sensor_id)
+        return recovered
+
+    def expire(self, now: float) -> list[Hashable]:
+        """Sensors whose timers ran out since the previous call."""
+        if self.wheel is None:
+            return []
+        expired = self.wheel.advance(now)
+        self.offline.update(expired)
+        return expired
@@ -0,0 +1,310 @@
+"""Headless multi-session load test for a running CitiPulse server.
+
+Usage::
+
+    python -m app.loadtest --url http://localhost:8000 --clients 10,50,100,200 \
+        --duration 60 --server-pid 12345 --output loadtest.json
+
+Opens simulated browser sessions over Reflex's socket.io event channel and
+ramps them up step by step. Sessions from earlier steps stay connected and
+keep sending the page heartbeat, as an open tab does, so the server keeps
+their scheduler loops running.
+Each session hydrates like a browser and calls ``enter_dashboard``. It then
+keeps switching pages with ``set_active_page``, selecting Analytics sensors and
+exporting CSV, waiting ``--think`` seconds (jittered) between actions. Events the
+server sends back are replayed, as the browser would, and redirects navigate
+(hydrate and on_load).
+
+Per step it reports:
+
+* event round trip: emit until the first update that is not a sensor tick,
+  per event name. Reflex processes a session's events in order, and tick
+  updates are recognised by a new ``last_updated`` in their delta;
+* tick delay: a tick's ``last_updated`` time until its update arrives, i.e.
+  compute, commit, serialization and delivery to that session;
+* bytes received per session per tick, and in total per second;
+* server memory per session: growth of ``--server-pid``'s RSS over the
+  baseline, divided by the connected sessions (Linux ``/proc`` only).
+
+Needs ``python-socketio`` and the app's own environment, since state and
+event names are read from ``app.state``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.bench import git_commit
+
+# Analytics sensor ids to pick from when a session selects a sensor.
+SENSOR_CHOICES = 12
+ACTIONS = (("page", 0.6), ("sensor", 0.25), ("export", 0.15))
+
+
+def _percentiles(values: list[float]) -> dict[str, float]:
+    if not values:
+        return {}
+    ms = np.array(values) * 1000
+    return {
+        "count": len(values),
+        "p50": round(float(np.percentile(ms, 50)), 2),
+        "p95": round(float(np.percentile(ms, 95)), 2),
+        "p99": round(float(np.percentile(ms, 99)), 2),
+        "max": round(float(ms.max()), 2),
+    }
+
+
+def server_rss_mb(pid: int | None) -> float | None:
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class EventNames:
+    """Full Reflex event names, read from the app's state classes."""
+
+    def __init__(self):
+        import reflex as rx
+        from reflex.constants import CompileVars
+
+        from app.state import HEARTBEAT_S, PAGE_ROUTES, AnalyticsState, CitiPulseState
+
+        root = rx.State.get_full_name()
+        self.hydrate = f"{root}.{CompileVars.HYDRATE}"
+        self.on_load = f"{root}.{CompileVars.ON_LOAD_INTERNAL}"
+        self.state = CitiPulseState.get_full_name()
+        self.heartbeat_s = HEARTBEAT_S
+        self.analytics = AnalyticsState.get_full_name()
+        self.page_routes = dict(PAGE_ROUTES)
+
+    def handler(self, name: str) -> str:
+        return f"{self.state}.{name}"
+
+
+class Recorder:
+    """Measurements of the current ramp step, shared by every session."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.round_trips: dict[str, list[float]] = defaultdict(list)
+        self.tick_delays: list[float] = []
+        self.tick_bytes: list[int] = []
+        self.bytes_received = 0
+        self.errors = 0
+
+    def report(self, sessions: int) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "round_trip_ms": {name: _percentiles(v) for name, v in self.round_trips.items()},
+            "tick_delay_ms": _percentiles(self.tick_delays),
+            "bytes_per_tick": round(float(np.mean(self.tick_bytes)), 1)
+            if self.tick_bytes
+            else 0.0,
+            "bytes_per_second": round(self.bytes_received / elapsed, 1) if elapsed else 0.0,
+            "ticks_received": len(self.tick_bytes),
+            "ticks_per_session_per_minute": round(
+                len(self.tick_bytes) / sessions / elapsed * 60, 2
+            )
+            if sessions and elapsed
+            else 0.0,
+            "errors": self.errors,
+        }
+
+
+class Session:
+    def __init__(
+        self, url: str, names: EventNames, recorder: Recorder, think: float, rng: random.Random
+    ):
+        import socketio
+
+        self.url = url
+        self.names = names
+        self.recorder = recorder
+        self.think = think
+        self.rng = rng
+        self.token = str(uuid.uuid4())
+        self.route = "/"
+        self.sio = socketio.AsyncClient(reconnection=False)
+        # (event name, sent at) awaiting their response, oldest first.
+        self._pending: deque[tuple[str, float]] = deque()
+        self._last_tick: datetime | None = None
+        self._task: asyncio.Task | None = None
+        self.sio.on("event", self._on_update)
+
+    async def start(self):
+        await self.sio.connect(
+            f"{self.url}?token={self.token}",
+            socketio_path="/_event",
+            transports=["websocket"],
+        )
+        await self._navigate("/")
+        await self.emit(self.names.handler("enter_dashboard"))
+        self._task = asyncio.create_task(self._browse())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        await self.sio.disconnect()
+
+    async def emit(self, name: str, payload: dict | None = None):
+        event = {
+            "name": name,
+            "payload": payload or {},
+            "token": self.token,
+            "router_data": {"pathname": self.route, "query": {}, "asPath": self.route},
+        }
+        self._pending.append((name, time.perf_counter()))
+        await self.sio.emit("event", json.dumps(event))
+
+    async def _navigate(self, route: str):
+        self.route = route
+        await self.emit(self.names.hydrate)
+        await self.emit(self.names.on_load)
+
+    async def _browse(self):
+        pages = list(self.names.page_routes)
+        kinds, weights = zip(*ACTIONS)
+        last_heartbeat = time.monotonic()
+        while True:
+            await asyncio.sleep(self.think * self.rng.uniform(0.5, 1.5))
+            try:
+                if time.monotonic() - last_heartbeat >= self.names.heartbeat_s:
+                    last_heartbeat = time.monotonic()
+                    await self.emit(self.names.handler("heartbeat"))
+                action = self.rng.choices(kinds, weights)[0]
+                if action == "page":
+                    await self.emit(
+                        self.names.handler("set_active_page"),
+                        {"page_name": self.rng.choice(pages)},
+                    )
+                elif action == "sensor":
+                    await self.emit(
+                        f"{self.names.analytics}.set_analytics_sensor_id",
+                        {"sensor_id": str(self.rng.randint(1, SENSOR_CHOICES))},
+                    )
+                else:
+                    await self.emit(self.names.handler("export_sensor_data_csv"))
+            except Exception:
+                self.recorder.errors += 1
+
+    def _tick_time(self, delta: dict) -> datetime | None:
+        """The ``last_updated`` tick time ``delta`` carries, if any."""
+        # Newer Reflex versions suffix var names in deltas, so match the prefix.
+        for key, value in delta.get(self.names.state, {}).items():
+            if key.startswith("last_updated") and isinstance(value, str) and value:
+                try:
+                    return datetime.fromisoformat(value)
+                except ValueError:
+                    return None
+        return None
+
+    async def _on_update(self, data):
+        received = time.perf_counter()
+        raw = data if isinstance(data, str) else json.dumps(data)
+        update = json.loads(raw) if isinstance(data, str) else data
+        self.recorder.bytes_received += len(raw)
+        tick_time = self._tick_time(update.get("delta", {}))
+        # Hydrate responses repeat the last tick's time, so only a new one is a tick.
+        if tick_time is not None and tick_time != self._last_tick:
+            self._last_tick = tick_time
+            self.recorder.tick_bytes.append(len(raw))
+            self.recorder.tick_delays.append(
+                (datetime.now(timezone.utc) - tick_time).total_seconds()
+            )
+        elif self._pending:
+            name, sent = self._pending.popleft()
+            self.recorder.round_trips[name.rsplit(".", 1)[-1]].append(received - sent)
+        for event in update.get("events", []):
+            name = event.get("name", "")
+            if name == "_redirect":
+                await self._navigate(event.get("payload", {}).get("path", "/"))
+            elif not name.startswith("_"):
+                # Chained server events, sent back the way the browser does.
+                await self.emit(name, event.get("payload"))
+
+
+async def run(args: argparse.Namespace) -> dict:
+    names = EventNames()
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    sessions: list[Session] = []
+    baseline = server_rss_mb(args.server_pid)
+    steps = []
+    try:
+        for target in args.clients:
+            while len(sessions) < target:
+                session = Session(args.url, names, recorder, args.think, random.Random(rng.random()))
+                try:
+                    await session.start()
+                except Exception:
+                    recorder.errors += 1
+                    continue
+                sessions.append(session)
+                await asyncio.sleep(args.connect_interval)
+            recorder.reset()
+            await asyncio.sleep(args.duration)
+            rss = server_rss_mb(args.server_pid)
+            step = {"sessions": len(sessions), **recorder.report(len(sessions))}
+            if rss is not None:
+                step["server_rss_mb"] = round(rss, 1)
+                step["server_mb_per_session"] = round((rss - baseline) / len(sessions), 3)
+            steps.append(step)
+            trips = [t for values in recorder.round_trips.values() for t in values]
+            print(
+                f"{len(sessions):>5} sessions  round trip p95"
+                f" {_percentiles(trips).get('p95', float('nan')):>8} ms"
+                f"  tick delay p95 {step['tick_delay_ms'].get('p95', float('nan')):>8} ms"
+                f"  {step['bytes_per_second'] / 1024:>9.1f} KiB/s",
+                flush=True,
+            )
+    finally:
+        await asyncio.gather(*(s.stop() for s in sessions), return_exceptions=True)
+    return {"server_baseline_rss_mb": baseline, "steps": steps}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--clients",
+        type=lambda v: [int(c) for c in v.split(",") if c],
+        default=[10, 50, 100],
+        help="session counts to ramp through",
+    )
+    parser.add_argument("--duration", type=float, default=60, help="seconds per step")
+    parser.add_argument("--think", type=float, default=5, help="seconds between actions")
+    parser.add_argument("--connect-interval", type=float, default=0.05)
+    parser.add_argument("--server-pid", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest.json")
+    args = parser.parse_args()
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "url": args.url,
+        **asyncio.run(run(args)),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Low-overhead process metrics and the local ``/metrics`` endpoint.
+
+Hot paths record into the module-level ``TELEMETRY`` registry:
+
+* ``TELEMETRY.time(stage)`` times a block into a fixed-bucket histogram;
+* ``TELEMETRY.observe(name, seconds, **labels)`` records an already measured
+  duration (stage timings that come back from a worker, scheduler lateness);
+* ``TELEMETRY.count(name, n)`` bumps a counter;
+* ``TELEMETRY.gauge(name, value, **labels)`` sets a gauge. Gauges that are
+  cheaper to read on demand (queue depth) come from collectors registered with
+  ``TELEMETRY.add_collector`` and run only when the endpoint is scraped.
+
+Recording is a dict lookup, a ``bisect`` into at most 15 bucket bounds and a
+few integer additions, about a microsecond per call, with a handful of calls
+per sensor tick. Setting ``CITIPULSE_METRICS=0`` turns every call into a no-op.
+
+``GET /metrics`` serves the Prometheus text format and ``GET /metrics.json``
+the same numbers as JSON. Both only answer loopback clients unless
+``CITIPULSE_METRICS_PUBLIC=1``.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+
+from fastapi import FastAPI, Request, Response
+
+PREFIX = "citipulse_"
+# Upper bounds in seconds, from sub-millisecond stages to slow weather fetches.
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+LOOPBACK = ("127.0.0.1", "::1", "localhost")
+
+# Histogram and gauge series are keyed by name plus sorted label pairs.
+_Key = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def _key(name: str, labels: dict) -> _Key:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: _Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Telemetry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: dict[_Key, _Histogram] = {}
+        self._counters: dict[_Key, float] = {}
+        self._gauges: dict[_Key, float] = {}
+        self._collectors: list[Callable[[], dict[str, float]]] = []
+        # Guards adding and removing series, and scrapes, so a scrape never
+        # iterates a dict that changes size. Updates of an existing series run
+        # on the event loop or under the GIL in a worker thread.
+        self._lock = threading.Lock()
+
+    def _histogram(self, name: str, labels: dict) -> _Histogram:
+        key = _key(name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, _Histogram())
+        return histogram
+
+    def time(self, stage: str) -> _Timer | _NullTimer:
+        """Context manager timing one run of ``stage`` into ``stage_seconds``."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self._histogram("stage_seconds", {"stage": stage}))
+
+    def observe(self, name: str, seconds: float, **labels):
+        if self.enabled:
+            self._histogram(name, labels).observe(seconds)
+
+    def count(self, name: str, n: float = 1, **labels):
+        if self.enabled and n:
+            key = _key(name, labels)
+            if key in self._counters:
+                self._counters[key] += n
+            else:
+                with self._lock:
+                    self._counters[key] = self._counters.get(key, 0) + n
+
+    def gauge(self, name: str, value: float, **labels):
+        if self.enabled:
+            key = _key(name, labels)
+            if key in self._gauges:
+                self._gauges[key] = value
+            else:
+                with self._lock:
+                    self._gauges[key] = value
+
+    def remove_gauge(self, name: str, **labels):
+        with self._lock:
+            self._gauges.pop(_key(name, labels), None)
+
+    def add_collector(self, collector: Callable[[], dict[str, float]]):
+        """Registers a callback returning ``{gauge name: value}`` at scrape time."""
+        self._collectors.append(collector)
+
+    def _collected(self) -> dict[_Key, float]:
+        gauges = dict(self._gauges)
+        for collector in self._collectors:
+            for name, value in collector().items():
+                gauges[(name, ())] = value
+        return gauges
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "buckets": dict(zip(map(str, BUCKETS + ("+Inf",)), h.counts)),
+                        "sum": h.sum,
+                        "count": h.count,
+                    }
+                    for (name, labels), h in self._histograms.items()
+                ],
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._counters.items()
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in self._collected().items()
+                ],
+            }
+
+    def prometheus(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        lines = []
+        declared = set()
+
+        def declare(name: str, kind: str):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        with self._lock:
+            for (name, labels), h in sorted(self._histograms.items()):
+                declare(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ("+Inf",), h.counts):
+                    cumulative += count
+                    bucket_labels = _labels((*labels, ("le", bound)))
+                    lines.append(f"{PREFIX}{name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {h.sum}")
+                lines.append(f"{PREFIX}{name}_count{_labels(labels)} {h.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                declare(f"{name}_total", "counter")
+                lines.append(f"{PREFIX}{name}_total{_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._collected().items()):
+                declare(name, "gauge")
+                lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+TELEMETRY = Telemetry(enabled=os.environ.get("CITIPULSE_METRICS", "1") != "0")
+
+metrics_api = FastAPI()
+
+
+def _allowed(request: Request) -> bool:
+    if os.environ.get("CITIPULSE_METRICS_PUBLIC") == "1":
+        return True
+    return request.client is not None and request.client.host in LOOPBACK
+
+
+@metrics_api.get("/metrics")
+async def metrics(request: Request) -> Response:
+    if not _allowed(request):
+        return Response(status_code=403)
+    return Response(TELEMETRY.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@metrics_api.get("/metrics.json")
+async def metrics_json(request: Request) -> Response:
+    if not _allowed(request):
+        return Response(status_code=403)
+    return Response(json.dumps(TELEMETRY.snapshot()), media_type="application/json")
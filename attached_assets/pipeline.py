@@ -0,0 +1,362 @@
+"""Snapshot -> compute -> commit pipeline for sensor ticks.
+
+Everything in this module is pure: ``compute_tick`` only sees a
+``TickSnapshot`` copied out of the state and returns a ``TickResult`` that the
+state swaps in afterwards. That lets the expensive part of a tick (reading
+generation, alert checks, regressions, zone aggregates) run without holding the
+state lock, in a worker thread or process.
+"""
+
+import asyncio
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.aqi import classify
+from app.quality import (
+    HAMPEL_WINDOW,
+    INTERPOLATED,
+    METRICS,
+    OUTLIER,
+    QUALITY_FLAGS,
+    clean,
+    interpolate,
+)
+from app.simulation import simulate_reading
+
+HISTORY_LENGTH = 100
+# Seconds between sensor ticks, and the report interval sensors are held to.
+SENSOR_PERIOD_S = 10
+BASE_VALUES = {"temperature": 28.0, "humidity": 55.0, "aqi": 70, "co2": 500}
+ALERT_THRESHOLDS = {
+    "temperature": {"warning": 33, "critical": 37},
+    "humidity": {
+        "warning_low": 25,
+        "warning_high": 75,
+        "critical_low": 15,
+        "critical_high": 85,
+    },
+    "aqi": {"warning": 100, "critical": 150},
+    "co2": {"warning": 900, "critical": 1200},
+}
+# Marker and zone colour of sensors that stopped reporting.
+OFFLINE_COLOR = "#94A3B8"
+
+
+@dataclass
+class SensorSnapshot:
+    id: int
+    name: str
+    readings: list[dict]
+    latest_alert: dict | None
+    loc_factor: dict
+
+
+@dataclass
+class TickSnapshot:
+    now: datetime
+    seed: int
+    sensors: list[SensorSnapshot]
+    zones: dict[str, list[int]]
+    map_view_mode: str
+    # Readings supplied from outside (replay, demo); other sensors are simulated
+    # unless ``simulate`` is False.
+    incoming: dict[int, dict] = field(default_factory=dict)
+    simulate: bool = True
+    # AQI increments dispersed onto each sensor from the emission sources.
+    aqi_field: dict[int, float] = field(default_factory=dict)
+    # Sensors ``liveness`` marked offline; they stay out of the zone aggregates.
+    offline: set[int] = field(default_factory=set)
+    # Sensors whose incoming reading skips the outlier test (the demo alert).
+    trusted: set[int] = field(default_factory=set)
+
+
+@dataclass
+class SensorUpdate:
+    reading: dict
+    alerts: list[dict]
+    is_glowing: bool
+    color: str
+    predicted_temp: float | None = None
+    predicted_aqi: float | None = None
+    # Interpolated readings for a gap before ``reading``, oldest first.
+    filled: list[dict] = field(default_factory=list)
+
+
+@dataclass
+class TickResult:
+    now: datetime
+    updates: dict[int, SensorUpdate]
+    zones: dict[str, dict]
+    # Seconds spent per stage, recorded by the caller since this may run in a worker.
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+def sensor_palette(map_view_mode: str) -> str:
+    """The ``aqi.PALETTES`` entry sensor markers use in ``map_view_mode``."""
+    return "environmental" if map_view_mode == "Environmental" else "sensor"
+
+
+def make_alert(
+    sensor_name: str, param: str, value: float, threshold: float, level: str, now: datetime
+) -> dict:
+    """An alert as feeds store it; shared with the crowd model's occupancy alerts."""
+    return {
+        "id": f"{sensor_name}-{param}-{now.timestamp()}",
+        "sensor_name": sensor_name,
+        "parameter": param.upper(),
+        "value": round(value, 2),
+        "threshold": threshold,
+        "level": level,
+        "timestamp": now.isoformat(),
+    }
+
+
+def offline_alert(sensor_name: str, silent_for: float, timeout: float, now: datetime) -> dict:
+    """The "sensor offline" event, with the seconds since its last report as value."""
+    return make_alert(sensor_name, "offline", silent_for, timeout, "warning", now)
+
+
+def check_alerts(
+    sensor_name: str, reading: dict, thresholds: dict, now: datetime
+) -> list[dict]:
+    """Checks a reading against thresholds; alerts are returned oldest first."""
+    alerts = []
+    for param in ("temperature", "aqi", "co2"):
+        value = reading[param]
+        if value > thresholds[param]["critical"]:
+            alerts.append(
+                make_alert(
+                    sensor_name, param, value, thresholds[param]["critical"], "critical", now
+                )
+            )
+        elif value > thresholds[param]["warning"]:
+            alerts.append(
+                make_alert(
+                    sensor_name, param, value, thresholds[param]["warning"], "warning", now
+                )
+            )
+    humidity = reading["humidity"]
+    limits = thresholds["humidity"]
+    if humidity > limits["critical_high"]:
+        level, threshold = "critical", limits["critical_high"]
+    elif humidity > limits["warning_high"]:
+        level, threshold = "warning", limits["warning_high"]
+    elif humidity < limits["critical_low"]:
+        level, threshold = "critical", limits["critical_low"]
+    elif humidity < limits["warning_low"]:
+        level, threshold = "warning", limits["warning_low"]
+    else:
+        return alerts
+    alerts.append(make_alert(sensor_name, "humidity", humidity, threshold, level, now))
+    return alerts
+
+
+def forecast(readings: list[dict]) -> tuple[float, float] | None:
+    """Linear-trend temperature and AQI forecast one day (144 ticks) ahead."""
+    from sklearn.linear_model import LinearRegression
+
+    if len(readings) <= 10:
+        return None
+    X = np.array(range(len(readings))).reshape(-1, 1)
+    y_temp = np.array([r["temperature"] for r in readings])
+    y_aqi = np.array([r["aqi"] for r in readings])
+    model_temp = LinearRegression().fit(X, y_temp)
+    model_aqi = LinearRegression().fit(X, y_aqi)
+    future_point = len(readings) + 24 * 6
+    return (
+        round(float(model_temp.predict([[future_point]])[0]), 2),
+        round(float(model_aqi.predict([[future_point]])[0]), 2),
+    )
+
+
+def _stored_reading(timestamp: str, values, quality: int, raw=None) -> dict:
+    temperature, humidity, aqi, co2 = values
+    reading = {
+        "timestamp": timestamp,
+        "temperature": round(float(temperature), 2),
+        "humidity": round(float(humidity), 2),
+        "aqi": int(aqi),
+        "co2": int(co2),
+        "quality": QUALITY_FLAGS[quality],
+    }
+    if quality == OUTLIER:
+        # What the sensor sent, for the Hampel windows of later ticks.
+        reading["raw"] = [round(float(v), 2) for v in raw]
+    return reading
+
+
+def _raw_values(reading: dict) -> list[float]:
+    return reading.get("raw") or [reading[m] for m in METRICS]
+
+
+def clean_readings(
+    pending: list[tuple[SensorSnapshot, dict]],
+    trusted: set[int] = frozenset(),
+) -> list[tuple[dict, list[dict]]]:
+    """Runs one tick of raw readings through ``quality.clean``.
+
+    Returns each sensor's cleaned reading and the interpolated readings that
+    fill a gap before it.
+    """
+    n = len(pending)
+    if not n:
+        return []
+    values = np.array([[reading[m] for m in METRICS] for _, reading in pending], dtype=float)
+    window = np.full((n, HAMPEL_WINDOW, len(METRICS)), np.nan)
+    since_last = np.full(n, np.nan)
+    interval = np.full(n, np.nan)
+    last_time = np.full(n, np.nan)
+    for i, (sensor, reading) in enumerate(pending):
+        recent = sensor.readings[-HAMPEL_WINDOW:]
+        if not recent:
+            continue
+        window[i, : len(recent)] = [_raw_values(r) for r in recent]
+        times = [datetime.fromisoformat(r["timestamp"]).timestamp() for r in recent]
+        last_time[i] = times[-1]
+        since_last[i] = datetime.fromisoformat(reading["timestamp"]).timestamp() - times[-1]
+        if len(times) > 1:
+            interval[i] = np.median(np.diff(times))
+    cleaned = clean(
+        values,
+        window,
+        since_last,
+        interval,
+        np.array([sensor.id in trusted for sensor, _ in pending]),
+    )
+    stored = []
+    for i, (sensor, reading) in enumerate(pending):
+        filled = []
+        count = int(cleaned.fill[i])
+        if count:
+            previous = np.array([sensor.readings[-1][m] for m in METRICS], dtype=float)
+            step = since_last[i] / (count + 1)
+            for k, row in enumerate(interpolate(previous, cleaned.values[i], count)):
+                timestamp = datetime.fromtimestamp(last_time[i] + step * (k + 1), timezone.utc)
+                filled.append(_stored_reading(timestamp.isoformat(), row, INTERPOLATED))
+        stored.append(
+            (
+                _stored_reading(
+                    reading["timestamp"],
+                    cleaned.values[i],
+                    int(cleaned.flags[i]),
+                    cleaned.raw[i],
+                ),
+                filled,
+            )
+        )
+    return stored
+
+
+def compute_tick(
+    snapshot: TickSnapshot, base_values: dict, thresholds: dict
+) -> TickResult:
+    now = snapshot.now
+    rng = random.Random(snapshot.seed)
+    updates: dict[int, SensorUpdate] = {}
+    latest: dict[int, dict] = {}
+    pending: list[tuple[SensorSnapshot, dict]] = []
+    for sensor in snapshot.sensors:
+        reading = snapshot.incoming.get(sensor.id)
+        if reading is None and snapshot.simulate:
+            reading = simulate_reading(
+                now, rng, base_values, sensor.loc_factor,
+                snapshot.aqi_field.get(sensor.id, 0.0),
+            )
+        if reading is None:
+            if sensor.readings and sensor.id not in snapshot.offline:
+                latest[sensor.id] = sensor.readings[-1]
+            continue
+        pending.append((sensor, reading))
+    started = time.perf_counter()
+    cleaned = clean_readings(pending, snapshot.trusted)
+    timings = {"quality": time.perf_counter() - started, "alerts": 0.0, "regression": 0.0}
+    for (sensor, _), (reading, filled) in zip(pending, cleaned):
+        latest[sensor.id] = reading
+        history = (sensor.readings + filled + [reading])[-HISTORY_LENGTH:]
+        started = time.perf_counter()
+        alerts = check_alerts(sensor.name, reading, thresholds, now)
+        timings["alerts"] += time.perf_counter() - started
+        latest_alert = alerts[-1] if alerts else sensor.latest_alert
+        is_glowing = (
+            latest_alert is not None
+            and latest_alert["level"] == "critical"
+            and (now - datetime.fromisoformat(latest_alert["timestamp"])).total_seconds()
+            < 60
+        )
+        update = SensorUpdate(
+            reading=reading,
+            alerts=alerts,
+            is_glowing=is_glowing,
+            color="",
+            filled=filled,
+        )
+        started = time.perf_counter()
+        prediction = forecast(history)
+        timings["regression"] += time.perf_counter() - started
+        if prediction is not None:
+            update.predicted_temp, update.predicted_aqi = prediction
+        updates[sensor.id] = update
+    colors = classify(
+        [u.reading.get("aqi", 0) for u in updates.values()],
+        sensor_palette(snapshot.map_view_mode),
+    ).color
+    for update, color in zip(updates.values(), colors):
+        update.color = color
+    started = time.perf_counter()
+    zones = zone_aggregates(snapshot.zones, latest, snapshot.offline)
+    timings["zones"] = time.perf_counter() - started
+    return TickResult(now=now, updates=updates, zones=zones, timings=timings)
+
+
+def zone_aggregates(
+    zones: dict[str, list[int]], latest: dict[int, dict], offline: set[int] = frozenset()
+) -> dict[str, dict]:
+    """Average AQI, temperature and colour of every zone with a live reading."""
+    aggregates = {}
+    offline_zones = {}
+    for zone_id, sensor_ids in zones.items():
+        zone_readings = [latest[s_id] for s_id in sensor_ids if s_id in latest]
+        if not zone_readings:
+            if sensor_ids and all(s_id in offline for s_id in sensor_ids):
+                offline_zones[zone_id] = {"color": OFFLINE_COLOR}
+            continue
+        avg_aqi = sum(r["aqi"] for r in zone_readings) / len(zone_readings)
+        avg_temp = sum(r["temperature"] for r in zone_readings) / len(zone_readings)
+        aggregates[zone_id] = {"avg_aqi": int(avg_aqi), "avg_temp": round(avg_temp, 2)}
+    zone_colors = classify([z["avg_aqi"] for z in aggregates.values()], "zone").color
+    for zone, color in zip(aggregates.values(), zone_colors):
+        zone["color"] = color
+    aggregates.update(offline_zones)
+    return aggregates
+
+
+_executor: Executor | None = None
+
+
+def _get_executor() -> Executor | None:
+    """Worker for off-lock computation, chosen by ``CITIPULSE_TICK_WORKER``.
+
+    ``thread`` (the default) uses the event loop's thread pool, ``process`` a
+    shared process pool and ``inline`` computes on the event loop itself.
+    """
+    global _executor
+    if os.environ.get("CITIPULSE_TICK_WORKER") == "process" and _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=1)
+    return _executor
+
+
+async def run_compute_tick(
+    snapshot: TickSnapshot, base_values: dict, thresholds: dict
+) -> TickResult:
+    if os.environ.get("CITIPULSE_TICK_WORKER") == "inline":
+        return compute_tick(snapshot, base_values, thresholds)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), compute_tick, snapshot, base_values, thresholds
+    )
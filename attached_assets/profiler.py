@@ -0,0 +1,103 @@
+"""On-demand statistical sampling profiler for the running server.
+
+``POST /admin/profile?seconds=30&interval_ms=5`` samples every thread of the
+server process for ``seconds`` and answers with the aggregated stacks in the
+collapsed ("folded") format that ``flamegraph.pl``, speedscope and inferno
+read: one ``thread;outer;...;inner count`` line per distinct stack. The event
+loop thread runs every background task and event handler, so their coroutine
+frames show up under it.
+
+A worker thread reads ``sys._current_frames()`` every ``interval_ms``. That is
+a few microseconds per sample and needs no tracing hook, so live sessions run
+at full speed while a profile is taken, and no restart is needed. Only one
+profile runs at a time. The endpoint needs ``Authorization: Bearer <token>``
+matching ``CITIPULSE_ADMIN_TOKEN``; it is disabled while that is unset.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request, Response
+
+from app.auth import authorized
+
+MAX_SECONDS = 300
+MIN_INTERVAL_MS = 1
+MAX_DEPTH = 128
+
+
+def _label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, seconds: float, interval: float) -> tuple[Counter, int]:
+        """Samples all other threads for ``seconds``; returns (stack counts, samples)."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            own = threading.get_ident()
+            stacks: Counter = Counter()
+            samples = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident == own:
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < MAX_DEPTH:
+                        labels.append(_label(frame.f_code))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, f"thread-{ident}"))
+                    stacks[";".join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+            return stacks, samples
+        finally:
+            self._lock.release()
+
+
+def collapsed(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+PROFILER = SamplingProfiler()
+
+profiler_api = FastAPI()
+
+
+@profiler_api.post("/admin/profile")
+async def profile(request: Request, seconds: float = 10, interval_ms: float = 5) -> Response:
+    if not authorized(request):
+        return Response(status_code=403)
+    if PROFILER.busy:
+        return Response("A profile is already running\n", 409, media_type="text/plain")
+    seconds = min(max(seconds, 0.1), MAX_SECONDS)
+    interval = max(interval_ms, MIN_INTERVAL_MS) / 1000
+    started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    try:
+        # Sampled from a worker thread so the event loop keeps serving sessions.
+        stacks, samples = await asyncio.to_thread(PROFILER.run, seconds, interval)
+    except RuntimeError as e:
+        return Response(f"{e}\n", 409, media_type="text/plain")
+    return Response(
+        collapsed(stacks),
+        media_type="text/plain",
+        headers={
+            "Content-Disposition": f'attachment; filename="citipulse-{started}.folded"',
+            "X-Profile-Samples": str(samples),
+        },
+    )
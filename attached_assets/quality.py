@@ -0,0 +1,101 @@
+"""Data-quality stage between raw readings and storage.
+
+Every tick's readings are cleaned as one ``(sensors, metrics)`` array before
+they reach history, alerts or the forecast:
+
+* range clamping: values outside ``VALID_RANGES`` are clipped to the range;
+* Hampel filter: a value further than ``HAMPEL_SIGMAS`` robust deviations
+  (1.4826 * MAD, floored at ``MIN_DEVIATION``) from the median of the sensor's
+  last ``HAMPEL_WINDOW`` raw (range-clamped) values is replaced by that median.
+  The window holds what the sensor sent, not what was stored, so a lone spike
+  is rejected but a sustained level shift moves the median and is accepted
+  once it fills half the window;
+* gaps: a reading arriving more than ``GAP_FACTOR`` typical intervals after the
+  previous one is a gap. Up to ``MAX_FILL`` missing readings are linearly
+  interpolated, and the Hampel test is skipped because the window is stale.
+
+The only per-sensor state is that fixed window of raw values and their
+timestamps. Each stored reading is labelled with one of ``QUALITY_FLAGS``;
+an outlier keeps its raw values beside the stored median so the window can be
+rebuilt from history.
+"""
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+
+METRICS = ("temperature", "humidity", "aqi", "co2")
+VALID_RANGES = np.array([[-20.0, 60.0], [0.0, 100.0], [0.0, 500.0], [250.0, 5000.0]])
+# Smallest robust deviation per metric, so steady series keep their normal noise.
+MIN_DEVIATION = np.array([2.5, 5.0, 10.0, 40.0])
+HAMPEL_WINDOW = 7
+HAMPEL_SIGMAS = 3.0
+# Fewer stored values than this and the Hampel test is not applied.
+HAMPEL_MIN_VALUES = 3
+GAP_FACTOR = 3.0
+MAX_FILL = 5
+QUALITY_FLAGS = ("ok", "clamped", "outlier", "interpolated")
+OK, CLAMPED, OUTLIER, INTERPOLATED = range(len(QUALITY_FLAGS))
+
+
+@dataclass
+class CleanedTick:
+    values: np.ndarray
+    # The range-clamped input; later windows are built from these.
+    raw: np.ndarray
+    # Index into ``QUALITY_FLAGS`` per sensor (the worst of its metrics).
+    flags: np.ndarray
+    # Missing readings before this one that should be interpolated.
+    fill: np.ndarray
+
+
+def clean(
+    values: np.ndarray,
+    window: np.ndarray,
+    since_last: np.ndarray | None = None,
+    interval: np.ndarray | None = None,
+    trusted: np.ndarray | None = None,
+) -> CleanedTick:
+    """Cleans one tick.
+
+    ``values`` is ``(n, 4)`` in ``METRICS`` order and ``window`` is ``(n, w, 4)``
+    previous raw values, NaN where a sensor has fewer. ``since_last`` and
+    ``interval`` (seconds, NaN when unknown) enable gap detection. Sensors set
+    in the boolean ``trusted`` skip the Hampel test (injected test readings).
+    """
+    n = len(values)
+    clamped_values = np.clip(values, VALID_RANGES[:, 0], VALID_RANGES[:, 1])
+    clamped = (clamped_values != values).any(axis=1)
+    fill = np.zeros(n, dtype=np.int64)
+    stale = np.zeros(n, dtype=bool)
+    if since_last is not None and interval is not None:
+        with np.errstate(invalid="ignore"):
+            gap = since_last > GAP_FACTOR * interval
+        missing = np.rint(since_last[gap] / interval[gap]).astype(np.int64) - 1
+        fill[gap] = np.minimum(missing, MAX_FILL)
+        stale = gap
+    cleaned = clamped_values
+    outlier = np.zeros(n, dtype=bool)
+    if window.shape[1]:
+        counts = (~np.isnan(window[:, :, 0])).sum(axis=1)
+        with warnings.catch_warnings():
+            # Sensors without history have all-NaN windows.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            median = np.nanmedian(window, axis=1)
+            deviation = 1.4826 * np.nanmedian(np.abs(window - median[:, None, :]), axis=1)
+        limit = HAMPEL_SIGMAS * np.maximum(deviation, MIN_DEVIATION)
+        tested = (counts >= HAMPEL_MIN_VALUES) & ~stale
+        if trusted is not None:
+            tested &= ~trusted
+        rejected = (np.abs(clamped_values - median) > limit) & tested[:, None]
+        cleaned = np.where(rejected, median, clamped_values)
+        outlier = rejected.any(axis=1)
+    flags = np.where(outlier, OUTLIER, np.where(clamped, CLAMPED, OK))
+    return CleanedTick(cleaned, clamped_values, flags, fill)
+
+
+def interpolate(previous: np.ndarray, current: np.ndarray, count: int) -> np.ndarray:
+    """``(count, 4)`` evenly spaced values strictly between two readings."""
+    t = np.arange(1, count + 1)[:, None] / (count + 1)
+    return previous + (current - previous) * t
@@ -0,0 +1,102 @@
+"""Config-driven sensor registry with dense indices and prebuilt lookups.
+
+Sensors and zones are loaded from a JSON file (``sensors.json`` next to this
+module, or ``CITIPULSE_SENSOR_CONFIG``) of the form::
+
+    {"sensors": [{"id": 1, "name": "Main Gate", "type": "Campus",
+                  "lat": 20.04, "lng": 73.85, "factors": {"aqi": 5}}, ...],
+     "zones": [{"id": "main_gate", "name": "Main Gate", "sensors": [1],
+                "capacity": 40, "polygon": [{"lat": ..., "lng": ...}, ...]}, ...]}
+
+A zone's optional ``capacity`` is the agent count that raises a crowd alert,
+and a sensor's optional ``interval`` is the seconds expected between its
+reports (the sensor tick period otherwise).
+An optional ``sources`` list holds the emission sources (roads, stacks) that
+``dispersion`` spreads onto the sensors.
+
+Every sensor gets a dense index (its position in the file) for array storage.
+Lookups by id, name, type and zone are O(1) dictionary hits built once at load
+time; derived arrays such as the location-factor matrix are only built when
+first used.
+"""
+
+import json
+import os
+from functools import cached_property
+
+import numpy as np
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(__file__), "sensors.json")
+FACTOR_METRICS = ("temperature", "humidity", "aqi", "co2")
+
+
+class SensorRegistry:
+    def __init__(
+        self, sensors: list[dict], zones: list[dict], sources: list[dict] | None = None
+    ):
+        self._records = sensors
+        self.zones = zones
+        self.sources = sources or []
+        self.ids: list[int] = [s["id"] for s in sensors]
+        self._index = {sensor_id: i for i, sensor_id in enumerate(self.ids)}
+        if len(self._index) != len(self.ids):
+            raise ValueError("Duplicate sensor ids in sensor config")
+        self._by_name = {s["name"]: s["id"] for s in sensors}
+        self._by_type: dict[str, list[int]] = {}
+        for s in sensors:
+            self._by_type.setdefault(s["type"], []).append(s["id"])
+        self._by_zone = {z["id"]: list(z["sensors"]) for z in zones}
+
+    @classmethod
+    def from_config(cls, path: str | None = None) -> "SensorRegistry":
+        path = path or os.environ.get("CITIPULSE_SENSOR_CONFIG", DEFAULT_CONFIG)
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config["sensors"], config.get("zones", []), config.get("sources", []))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, sensor_id: int) -> bool:
+        return sensor_id in self._index
+
+    def index_of(self, sensor_id: int) -> int:
+        return self._index[sensor_id]
+
+    def get(self, sensor_id: int) -> dict:
+        """The raw config record (name, type, lat, lng, factors, ...)."""
+        return self._records[self._index[sensor_id]]
+
+    def id_by_name(self, name: str) -> int | None:
+        return self._by_name.get(name)
+
+    def ids_of_type(self, sensor_type: str) -> list[int]:
+        return self._by_type.get(sensor_type, [])
+
+    def ids_in_zone(self, zone_id: str) -> list[int]:
+        return self._by_zone.get(zone_id, [])
+
+    def loc_factor(self, sensor_id: int) -> dict:
+        return self._records[self._index[sensor_id]].get("factors", {})
+
+    @cached_property
+    def factor_matrix(self) -> np.ndarray:
+        """``(n_sensors, 4)`` location factors in ``FACTOR_METRICS`` order."""
+        matrix = np.zeros((len(self.ids), len(FACTOR_METRICS)))
+        for i, record in enumerate(self._records):
+            factors = record.get("factors", {})
+            matrix[i] = [factors.get(metric, 0) for metric in FACTOR_METRICS]
+        return matrix
+
+    @cached_property
+    def report_intervals(self) -> dict[int, float]:
+        """Expected seconds between reports, for sensors that configure one."""
+        return {r["id"]: r["interval"] for r in self._records if "interval" in r}
+
+    def type_mask(self, sensor_type: str) -> np.ndarray:
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[[self._index[s] for s in self.ids_of_type(sensor_type)]] = True
+        return mask
+
+
+REGISTRY = SensorRegistry.from_config()
@@ -0,0 +1,137 @@
+"""Fixed-rate scheduler that drives all background simulation loops."""
+
+import asyncio
+import heapq
+import logging
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from app.metrics import TELEMETRY
+
+
+@dataclass
+class Job:
+    name: str
+    period: float
+    callback: Callable[[], Awaitable[None]]
+    priority: int = 0
+    jitter: float = 0.0
+    base_deadline: float = 0.0
+    task: asyncio.Task | None = None
+    runs: int = 0
+    skipped: int = 0
+    overruns: int = 0
+    last_lateness: float = 0.0
+    max_lateness: float = 0.0
+    total_lateness: float = 0.0
+    last_duration: float = 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "period": self.period,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "overruns": self.overruns,
+            "last_lateness": round(self.last_lateness, 4),
+            "max_lateness": round(self.max_lateness, 4),
+            "avg_lateness": round(self.total_lateness / self.runs, 4)
+            if self.runs
+            else 0.0,
+            "last_duration": round(self.last_duration, 4),
+        }
+
+
+@dataclass(order=True)
+class _Entry:
+    deadline: float
+    priority: int
+    seq: int
+    job: Job = field(compare=False)
+
+
+class FixedRateScheduler:
+    """Runs jobs on fixed-rate deadlines (``start + k * period``).
+
+    Deadlines never drift by the work time. If a job is still running when its
+    next deadline arrives the tick is counted as an overrun and skipped, and if
+    the loop falls behind by several periods the missed ticks are coalesced into
+    one run. Jobs due at the same instant are started in ``priority`` order
+    (lower first); ``jitter`` adds up to that many seconds to each deadline
+    without shifting the underlying schedule.
+    """
+
+    def __init__(self, rng: random.Random | None = None):
+        self._rng = rng or random.Random()
+        self._jobs: list[Job] = []
+        self._heap: list[_Entry] = []
+        self._seq = 0
+
+    def add_job(
+        self,
+        name: str,
+        period: float,
+        callback: Callable[[], Awaitable[None]],
+        priority: int = 0,
+        jitter: float = 0.0,
+    ) -> Job:
+        job = Job(name, period, callback, priority, jitter)
+        self._jobs.append(job)
+        return job
+
+    def report(self) -> dict[str, dict[str, float]]:
+        return {job.name: job.stats() for job in self._jobs}
+
+    def _push(self, job: Job):
+        deadline = job.base_deadline
+        if job.jitter:
+            deadline += self._rng.uniform(0, job.jitter)
+        self._seq += 1
+        heapq.heappush(self._heap, _Entry(deadline, job.priority, self._seq, job))
+
+    async def _run_job(self, job: Job, started: float):
+        loop = asyncio.get_running_loop()
+        try:
+            await job.callback()
+        except Exception as e:
+            logging.exception(f"Scheduled job {job.name} failed: {e}")
+        finally:
+            job.last_duration = loop.time() - started
+            TELEMETRY.observe("job_seconds", job.last_duration, job=job.name)
+
+    async def run(self, is_running: Callable[[], bool]):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for job in self._jobs:
+            job.base_deadline = start
+            self._push(job)
+        try:
+            while is_running() and self._heap:
+                entry = self._heap[0]
+                delay = entry.deadline - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                heapq.heappop(self._heap)
+                job = entry.job
+                now = loop.time()
+                if job.task is not None and not job.task.done():
+                    job.overruns += 1
+                    TELEMETRY.count("ticks_dropped", job=job.name, reason="overrun")
+                else:
+                    lateness = now - entry.deadline
+                    job.runs += 1
+                    job.last_lateness = lateness
+                    job.max_lateness = max(job.max_lateness, lateness)
+                    job.total_lateness += lateness
+                    TELEMETRY.observe("job_lateness_seconds", lateness, job=job.name)
+                    job.task = asyncio.create_task(self._run_job(job, now))
+                missed = int((now - job.base_deadline) // job.period)
+                job.skipped += missed
+                TELEMETRY.count("ticks_dropped", missed, job=job.name, reason="behind")
+                job.base_deadline += (missed + 1) * job.period
+                self._push(job)
+        finally:
+            for job in self._jobs:
+                if job.task is not None and not job.task.done():
+                    job.task.cancel()
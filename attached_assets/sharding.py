@@ -0,0 +1,499 @@
+"""Process-pool sharded simulation for large sensor networks.
+
+The sensor set is split into contiguous shards that are simulated in one
+``ProcessPoolExecutor`` shared by every feed's engine and shut down with the
+server (``shutdown_pool``). Histories, latest values and alert bookkeeping live in
+``multiprocessing.shared_memory`` arrays, so a worker only receives a tiny
+``_ShardTask`` and writes its results in place; the only thing pickled back is
+a compact ``int32`` array of raised alerts. Within a shard everything is
+vectorized with NumPy, including the one-day linear-trend forecast (the
+closed-form least-squares fit over the history window, equivalent to the
+``LinearRegression`` used by ``pipeline.forecast``).
+
+Readings pushed from outside (``/ingest``) go through the shards too, in place
+of the simulated value of their sensor. A tick the feed computes without the
+engine (the demo alert, a replay) marks it stale with ``reset``; the next
+sharded tick first reloads the shared-memory history from the feed.
+"""
+
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from app.aqi import classify
+from app.pipeline import (
+    HISTORY_LENGTH,
+    OFFLINE_COLOR,
+    SensorUpdate,
+    TickResult,
+    sensor_palette,
+)
+from app.quality import HAMPEL_WINDOW, METRICS, QUALITY_FLAGS, clean
+from app.registry import SensorRegistry
+from app.store import SharedFeed
+
+# Columns of the ``latest`` array.
+TEMP, HUMIDITY, AQI, CO2, PRED_TEMP, PRED_AQI, GLOW, QUALITY = range(8)
+LEVELS = ("warning", "critical")
+# Alert parameters in the order ``pipeline.check_alerts`` raises them.
+ALERT_PARAMS = ("temperature", "aqi", "co2", "humidity")
+FORECAST_HORIZON = 24 * 6
+# Sensor networks at least this large are simulated by the sharded process pool.
+SHARD_MIN_SENSORS = 500
+
+
+@dataclass(frozen=True)
+class _SharedArray:
+    """Picklable handle to a NumPy array backed by shared memory."""
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    @classmethod
+    def create(cls, shape: tuple[int, ...], dtype: str, fill=0):
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        handle = cls(shm.name, shape, dtype)
+        np.ndarray(shape, dtype=dtype, buffer=shm.buf)[...] = fill
+        return handle, shm
+
+    def attach(self) -> np.ndarray:
+        shm = _attached.get(self.name)
+        if shm is None:
+            shm = _attached[self.name] = shared_memory.SharedMemory(name=self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+
+# Shared memory blocks opened by this (worker) process, kept open across ticks.
+_attached: dict[str, shared_memory.SharedMemory] = {}
+# Blocks of closed engines; tasks carry them so workers close their handles.
+_retired: deque[str] = deque(maxlen=256)
+
+
+def _release(names):
+    for name in names:
+        shm = _attached.pop(name, None)
+        if shm is not None:
+            shm.close()
+
+
+@dataclass(frozen=True)
+class _ShardTask:
+    start: int
+    stop: int
+    tick: int
+    now: float
+    is_day: bool
+    seed: int
+    base: tuple[float, float, float, float]
+    thresholds: tuple[float, ...]
+    history: _SharedArray
+    raw: _SharedArray
+    latest: _SharedArray
+    factors: _SharedArray
+    alert_state: _SharedArray
+    dispersed: _SharedArray
+    incoming: _SharedArray
+    incoming_mask: _SharedArray
+    retired: tuple[str, ...] = ()
+
+
+def _flatten_thresholds(thresholds: dict) -> tuple[float, ...]:
+    h = thresholds["humidity"]
+    return (
+        thresholds["temperature"]["warning"],
+        thresholds["temperature"]["critical"],
+        thresholds["aqi"]["warning"],
+        thresholds["aqi"]["critical"],
+        thresholds["co2"]["warning"],
+        thresholds["co2"]["critical"],
+        h["warning_low"],
+        h["warning_high"],
+        h["critical_low"],
+        h["critical_high"],
+    )
+
+
+def _level_codes(value: np.ndarray, warning: float, critical: float) -> np.ndarray:
+    """-1 for no alert, otherwise an index into ``LEVELS``."""
+    return np.where(value > critical, 1, np.where(value > warning, 0, -1))
+
+
+def _run_shard(task: _ShardTask) -> np.ndarray:
+    _release(task.retired)
+    sl = slice(task.start, task.stop)
+    n = task.stop - task.start
+    history = task.history.attach()[sl]
+    raw = task.raw.attach()[sl]
+    latest = task.latest.attach()[sl]
+    factors = task.factors.attach()[sl]
+    alert_state = task.alert_state.attach()[sl]
+    dispersed = task.dispersed.attach()[sl]
+    rng = np.random.default_rng([task.seed, task.start])
+    base_temp, base_humidity, base_aqi, base_co2 = task.base
+
+    temp_offset = (
+        rng.uniform(2, 5, n) if task.is_day else rng.uniform(-3, -1, n)
+    )
+    values = np.empty((n, 4))
+    values[:, 0] = np.round(
+        base_temp + temp_offset + factors[:, 0] + rng.uniform(-0.5, 0.5, n), 2
+    )
+    values[:, 1] = np.round(np.clip(base_humidity + rng.uniform(-5, 5, n), 0, 100), 2)
+    values[:, 2] = np.floor(
+        np.maximum(
+            0,
+            base_aqi
+            + (10 if task.is_day else -8)
+            + factors[:, 2]
+            + dispersed
+            + rng.uniform(-5, 5, n),
+        )
+    )
+    values[:, 3] = np.floor(np.maximum(0, base_co2 + factors[:, 3] + rng.uniform(-20, 20, n)))
+    pushed = task.incoming_mask.attach()[sl]
+    values[pushed] = task.incoming.attach()[sl][pushed]
+
+    # Quality stage over the raw values of the previous ticks.
+    depth = min(task.tick, HAMPEL_WINDOW)
+    window = raw[:, (task.tick - 1 - np.arange(depth)) % HAMPEL_WINDOW, :]
+    cleaned = clean(values, window)
+    raw[:, task.tick % HAMPEL_WINDOW, :] = cleaned.raw
+    values = cleaned.values
+    values[:, 2:4] = np.floor(values[:, 2:4])
+    latest[:, QUALITY] = cleaned.flags
+
+    history[:, task.tick % HISTORY_LENGTH, :] = values
+    latest[:, TEMP:CO2 + 1] = values
+
+    count = min(task.tick + 1, HISTORY_LENGTH)
+    if count > 10:
+        order = (task.tick - count + 1 + np.arange(count)) % HISTORY_LENGTH
+        x = np.arange(count, dtype=float)
+        xc = x - x.mean()
+        future = count + FORECAST_HORIZON - x.mean()
+        for column, metric in ((PRED_TEMP, 0), (PRED_AQI, 2)):
+            y = history[:, order, metric]
+            slope = (y - y.mean(axis=1, keepdims=True)) @ xc / (xc @ xc)
+            latest[:, column] = np.round(y.mean(axis=1) + slope * future, 2)
+
+    th = task.thresholds
+    humidity = values[:, 1]
+    codes = np.stack(
+        [
+            _level_codes(values[:, 0], th[0], th[1]),
+            _level_codes(values[:, 2], th[2], th[3]),
+            _level_codes(values[:, 3], th[4], th[5]),
+            np.select(
+                [humidity > th[9], humidity > th[7], humidity < th[8], humidity < th[6]],
+                [1, 0, 1, 0],
+                default=-1,
+            ),
+        ],
+        axis=1,
+    )
+    raised = codes >= 0
+    has_alert = raised.any(axis=1)
+    last_param = 3 - np.argmax(raised[:, ::-1], axis=1)
+    last_level = codes[np.arange(n), last_param]
+    alert_state[has_alert, 0] = last_level[has_alert]
+    alert_state[has_alert, 1] = task.now
+    latest[:, GLOW] = (alert_state[:, 0] == 1) & (task.now - alert_state[:, 1] < 60)
+
+    rows, params = np.nonzero(raised)
+    return np.stack(
+        [rows + task.start, params, codes[rows, params]], axis=1
+    ).astype(np.int32)
+
+
+@dataclass
+class ShardTickResult:
+    now: datetime
+    latest: np.ndarray
+    alerts: np.ndarray
+    zones: dict[str, dict]
+
+
+class ShardedSimulation:
+    """Simulates ``sensor_ids`` across a process pool, one shard per task."""
+
+    def __init__(
+        self,
+        sensor_ids: list[int],
+        loc_factors: np.ndarray,
+        zones: dict[str, list[int]],
+        workers: int | None = None,
+        shards_per_worker: int = 2,
+    ):
+        self.sensor_ids = list(sensor_ids)
+        self.index = {sensor_id: i for i, sensor_id in enumerate(self.sensor_ids)}
+        n = len(self.sensor_ids)
+        self.workers = workers or os.cpu_count() or 1
+        self.tick_count = 0
+        # Set by ``reset``: reload the history from the feed before the next tick.
+        self.stale = False
+        self._segments: list[shared_memory.SharedMemory] = []
+        self.history = self._alloc((n, HISTORY_LENGTH, 4), "float64")
+        # Ring of the last raw values the quality stage's windows are built from.
+        self.raw = self._alloc((n, HAMPEL_WINDOW, 4), "float64")
+        self.latest = self._alloc((n, 8), "float64")
+        self.factors = self._alloc((n, 4), "float64")
+        self.alert_state = self._alloc((n, 2), "float64", fill=-1)
+        # Per-tick AQI increments from ``dispersion``, aligned with ``sensor_ids``.
+        self.dispersed = self._alloc((n,), "float64")
+        # Pushed readings of this tick, used instead of the simulated ones.
+        self.incoming = self._alloc((n, 4), "float64")
+        self.incoming_mask = self._alloc((n,), "bool", fill=False)
+        self.factors.attach()[:] = loc_factors
+        self.zone_ids = list(zones)
+        pairs = [
+            (z, self.index[s_id])
+            for z, zone_id in enumerate(self.zone_ids)
+            for s_id in zones[zone_id]
+            if s_id in self.index
+        ]
+        self._zone_of_pair = np.array([p[0] for p in pairs], dtype=np.intp)
+        self._sensor_of_pair = np.array([p[1] for p in pairs], dtype=np.intp)
+        self._zone_sizes = np.bincount(self._zone_of_pair, minlength=len(self.zone_ids))
+        bounds = np.linspace(0, n, min(n, self.workers * shards_per_worker) + 1)
+        self.shards = [
+            (int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if int(b) > int(a)
+        ]
+
+    def _alloc(self, shape, dtype, fill=0) -> _SharedArray:
+        handle, shm = _SharedArray.create(shape, dtype, fill)
+        self._segments.append(shm)
+        return handle
+
+    def reset(self):
+        """Marks the history stale after the feed's history changed elsewhere."""
+        self.stale = True
+
+    def load(self, sensors: dict[int, dict]):
+        """Rebuilds the shared-memory history from the feed's ``sensors``.
+
+        Sensors with a shorter history than the longest are padded with their
+        oldest reading, so every row shares the one tick counter.
+        """
+        history = self.history.attach()
+        raw = self.raw.attach()
+        latest = self.latest.attach()
+        alert_state = self.alert_state.attach()
+        raw[...] = np.nan
+        latest[...] = 0
+        alert_state[...] = -1
+        flags = {flag: i for i, flag in enumerate(QUALITY_FLAGS)}
+        stored = [
+            sensors[s_id]["readings"][-HISTORY_LENGTH:] if s_id in sensors else []
+            for s_id in self.sensor_ids
+        ]
+        count = max(map(len, stored), default=0)
+        for row, readings in enumerate(stored):
+            if not readings:
+                history[row] = 0
+                continue
+            values = [[r[m] for m in METRICS] for r in readings]
+            values = [values[0]] * (count - len(values)) + values
+            history[row, np.arange(count) % HISTORY_LENGTH] = values
+            recent = readings[-HAMPEL_WINDOW:]
+            slots = np.arange(count - len(recent), count) % HAMPEL_WINDOW
+            raw[row, slots] = [r.get("raw") or [r[m] for m in METRICS] for r in recent]
+            sensor = sensors[self.sensor_ids[row]]
+            latest[row, TEMP:CO2 + 1] = values[-1]
+            latest[row, PRED_TEMP] = sensor.get("predicted_temp", 0.0)
+            latest[row, PRED_AQI] = sensor.get("predicted_aqi", 0.0)
+            latest[row, GLOW] = sensor.get("is_glowing", False)
+            latest[row, QUALITY] = flags.get(readings[-1].get("quality"), 0)
+            if sensor.get("alerts"):
+                alert = sensor["alerts"][0]
+                alert_state[row] = (
+                    LEVELS.index(alert["level"]),
+                    datetime.fromisoformat(alert["timestamp"]).timestamp(),
+                )
+        self.tick_count = count
+        self.stale = False
+
+    async def tick(
+        self,
+        now: datetime,
+        seed: int,
+        base_values: dict,
+        thresholds: dict,
+        aqi_field: np.ndarray | None = None,
+        offline: set[int] = frozenset(),
+        incoming: dict[int, dict] | None = None,
+    ) -> ShardTickResult:
+        """Runs one tick; sensors in ``offline`` stay out of the zone aggregates.
+
+        ``incoming`` readings replace the simulated values of their sensors.
+        """
+        loop = asyncio.get_running_loop()
+        if aqi_field is not None:
+            self.dispersed.attach()[:] = aqi_field
+        pushed = self.incoming_mask.attach()
+        pushed[:] = False
+        if incoming:
+            values = self.incoming.attach()
+            for sensor_id, reading in incoming.items():
+                row = self.index.get(sensor_id)
+                if row is not None:
+                    values[row] = [reading[m] for m in METRICS]
+                    pushed[row] = True
+        base = tuple(float(base_values[metric]) for metric in METRICS)
+        flat = _flatten_thresholds(thresholds)
+        tasks = [
+            _ShardTask(
+                start, stop, self.tick_count, now.timestamp(), 6 <= now.hour <= 18,
+                seed, base, flat, self.history, self.raw, self.latest, self.factors,
+                self.alert_state, self.dispersed, self.incoming, self.incoming_mask,
+                tuple(_retired),
+            )
+            for start, stop in self.shards
+        ]
+        pool = _get_pool()
+        parts = await asyncio.gather(
+            *(loop.run_in_executor(pool, _run_shard, task) for task in tasks)
+        )
+        self.tick_count += 1
+        latest = self.latest.attach().copy()
+        return ShardTickResult(
+            now=now,
+            latest=latest,
+            alerts=np.concatenate(parts) if parts else np.empty((0, 3), np.int32),
+            zones=self._zone_aggregates(latest, self._online_mask(offline)),
+        )
+
+    def _online_mask(self, offline: set[int]) -> np.ndarray:
+        online = np.ones(len(self.sensor_ids), dtype=bool)
+        rows = [self.index[s_id] for s_id in offline if s_id in self.index]
+        online[rows] = False
+        return online
+
+    def _zone_aggregates(self, latest: np.ndarray, online: np.ndarray) -> dict[str, dict]:
+        """Same as ``pipeline.zone_aggregates``: online sensors only, grey when none is."""
+        if not len(self._zone_of_pair):
+            return {}
+        weights = online[self._sensor_of_pair].astype(float)
+        live = np.bincount(self._zone_of_pair, weights, len(self.zone_ids))
+        sizes = np.maximum(live, 1)
+        aqi = np.bincount(
+            self._zone_of_pair, weights * latest[self._sensor_of_pair, AQI], len(self.zone_ids)
+        ) / sizes
+        temp = np.bincount(
+            self._zone_of_pair, weights * latest[self._sensor_of_pair, TEMP], len(self.zone_ids)
+        ) / sizes
+        colors = classify(aqi.astype(int), "zone").color
+        zones = {}
+        for z, zone_id in enumerate(self.zone_ids):
+            if live[z]:
+                zones[zone_id] = {
+                    "avg_aqi": int(aqi[z]),
+                    "avg_temp": round(float(temp[z]), 2),
+                    "color": colors[z],
+                }
+            elif self._zone_sizes[z]:
+                zones[zone_id] = {"color": OFFLINE_COLOR}
+        return zones
+
+    def to_tick_result(
+        self,
+        result: ShardTickResult,
+        names: dict[int, str],
+        thresholds: dict,
+        map_view_mode: str,
+    ) -> TickResult:
+        """Expands a shard result into the per-sensor ``TickResult`` the state commits."""
+        timestamp = result.now.isoformat()
+        alerts_by_sensor: dict[int, list[dict]] = {}
+        for row, param_code, level_code in result.alerts.tolist():
+            sensor_id = self.sensor_ids[row]
+            param = ALERT_PARAMS[param_code]
+            level = LEVELS[level_code]
+            value = float(result.latest[row, METRICS.index(param)])
+            if param != "humidity":
+                threshold = thresholds[param][level]
+            elif value > thresholds["humidity"]["warning_high"]:
+                threshold = thresholds["humidity"][f"{level}_high"]
+            else:
+                threshold = thresholds["humidity"][f"{level}_low"]
+            alerts_by_sensor.setdefault(sensor_id, []).append(
+                {
+                    "id": f"{names[sensor_id]}-{param}-{result.now.timestamp()}",
+                    "sensor_name": names[sensor_id],
+                    "parameter": param.upper(),
+                    "value": round(value, 2),
+                    "threshold": threshold,
+                    "level": level,
+                    "timestamp": timestamp,
+                }
+            )
+        forecasting = self.tick_count > 10
+        colors = classify(result.latest[:, AQI], sensor_palette(map_view_mode)).color
+        updates = {}
+        for row, values in enumerate(result.latest.tolist()):
+            sensor_id = self.sensor_ids[row]
+            updates[sensor_id] = SensorUpdate(
+                reading={
+                    "timestamp": timestamp,
+                    "temperature": values[TEMP],
+                    "humidity": values[HUMIDITY],
+                    "aqi": int(values[AQI]),
+                    "co2": int(values[CO2]),
+                    "quality": QUALITY_FLAGS[int(values[QUALITY])],
+                },
+                alerts=alerts_by_sensor.get(sensor_id, []),
+                is_glowing=bool(values[GLOW]),
+                color=colors[row],
+                predicted_temp=values[PRED_TEMP] if forecasting else None,
+                predicted_aqi=values[PRED_AQI] if forecasting else None,
+            )
+        return TickResult(now=result.now, updates=updates, zones=result.zones)
+
+    def close(self):
+        """Frees the shared memory; pool workers drop their handles on their next task."""
+        names = [shm.name for shm in self._segments]
+        _release(names)
+        _retired.extend(names)
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """The one process pool every engine submits its shards to."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _pool
+
+
+def shutdown_pool():
+    """Stops the shared workers, at server shutdown."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+def get_engine(feed: SharedFeed, registry: SensorRegistry) -> ShardedSimulation:
+    """The feed's engine, created on first use; ``FEEDS`` closes it with the feed."""
+    if feed.engine is None:
+        feed.engine = ShardedSimulation(
+            registry.ids,
+            registry.factor_matrix,
+            {z["id"]: z["sensors"] for z in registry.zones},
+        )
+        # The feed may already hold history from ticks computed without it.
+        feed.engine.reset()
+    return feed.engine
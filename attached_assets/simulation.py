@@ -0,0 +1,71 @@
+"""Deterministic simulation clock and reading generator."""
+
+import random
+from datetime import datetime, timezone, timedelta
+
+
+class SimulationClock:
+    """A clock that either follows wall time or advances in fixed simulated steps.
+
+    In live mode ``now()`` is the wall clock and ``sleep_seconds`` is the real
+    tick period. When ``start`` is given the clock is simulated: every
+    ``advance()`` moves it forward by ``step_seconds`` and the caller should only
+    sleep ``step_seconds / speed`` (zero for an unthrottled fast-forward).
+    """
+
+    def __init__(
+        self,
+        start: datetime | None = None,
+        step_seconds: float = 10.0,
+        speed: float = 1.0,
+    ):
+        self.simulated = start is not None
+        self.step_seconds = step_seconds
+        self.speed = speed
+        self._now = start
+
+    def now(self) -> datetime:
+        if not self.simulated:
+            return datetime.now(timezone.utc)
+        return self._now
+
+    def advance(self) -> datetime:
+        if self.simulated:
+            self._now = self._now + timedelta(seconds=self.step_seconds)
+        return self.now()
+
+    @property
+    def sleep_seconds(self) -> float:
+        if self.speed <= 0:
+            return 0.0
+        return self.step_seconds / self.speed
+
+
+def simulate_reading(
+    now: datetime,
+    rng: random.Random,
+    base_values: dict,
+    loc_factor: dict,
+    aqi_increment: float = 0.0,
+) -> dict:
+    """Generates one synthetic reading; all randomness comes from ``rng``.
+
+    ``aqi_increment`` is the pollution dispersed onto the sensor this tick.
+    """
+    is_day = 6 <= now.hour <= 18
+    base_temp = base_values["temperature"] + (
+        rng.uniform(2, 5) if is_day else rng.uniform(-1, -3)
+    )
+    base_aqi = base_values["aqi"] + (10 if is_day else -8)
+    temp = base_temp + loc_factor.get("temperature", 0) + rng.uniform(-0.5, 0.5)
+    humidity = base_values["humidity"] + rng.uniform(-5, 5)
+    aqi = base_aqi + loc_factor.get("aqi", 0) + aqi_increment + rng.uniform(-5, 5)
+    co2 = base_values["co2"] + loc_factor.get("co2", 0) + rng.uniform(-20, 20)
+    return {
+        "timestamp": now.isoformat(),
+        "temperature": round(temp, 2),
+        "humidity": round(max(0, min(100, humidity)), 2),
+        "aqi": int(max(0, aqi)),
+        "co2": int(max(0, co2)),
+    }
+
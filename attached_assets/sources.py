@@ -0,0 +1,300 @@
+"""Pluggable sensor sources feeding the tick pipeline.
+
+Every source implements ``SensorSource``: an async batched ``read()`` returning
+the newest reading per sensor since the previous call, a ``now()`` clock the
+tick should be stamped with, and ``stats()`` with throughput and lag. The state
+only talks to this interface, so the simulator, a recorded file or a real
+gateway can be swapped without touching state code.
+
+Clients only name a source's target; ``resolve_target`` maps that name to
+something the server is allowed to open. A replay names a CSV or Parquet file
+inside ``CITIPULSE_RECORDINGS_DIR`` (``recordings/`` next to this module by
+default), and a gateway must be one of the URLs listed, comma separated, in
+``CITIPULSE_GATEWAYS``.
+"""
+
+import csv
+import logging
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Iterator
+
+from app.ingest import parse_jsonl
+from app.simulation import simulate_reading
+
+RECORDINGS_DIR = os.environ.get(
+    "CITIPULSE_RECORDINGS_DIR", os.path.join(os.path.dirname(__file__), "recordings")
+)
+RECORDING_SUFFIXES = (".csv", ".parquet")
+
+
+def _gateways() -> set[str]:
+    urls = os.environ.get("CITIPULSE_GATEWAYS", "")
+    return {url.strip() for url in urls.split(",") if url.strip()}
+
+
+def resolve_target(source: str, target: str) -> str:
+    """The path or URL a client-chosen ``target`` of ``source`` stands for.
+
+    Raises ``ValueError`` for unknown sources, recordings outside
+    ``RECORDINGS_DIR`` and gateways that are not allow-listed.
+    """
+    if source == "simulator":
+        return ""
+    if source == "replay":
+        root = os.path.realpath(RECORDINGS_DIR)
+        path = os.path.realpath(os.path.join(root, target))
+        if (
+            os.path.dirname(path) != root
+            or not path.endswith(RECORDING_SUFFIXES)
+            or not os.path.isfile(path)
+        ):
+            raise ValueError(f"No recording named {target!r}")
+        return path
+    if source == "gateway":
+        if target not in _gateways():
+            raise ValueError(f"Gateway {target!r} is not allowed")
+        return target
+    raise ValueError(f"Unknown data source {source!r}")
+
+
+class SensorSource(ABC):
+    name = "source"
+
+    def __init__(self):
+        self.readings = 0
+        self.batches = 0
+        self.lag_seconds = 0.0
+        self._rate = 0.0
+        self._last_read: float | None = None
+
+    @abstractmethod
+    async def _read(self) -> dict[int, dict]:
+        ...
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    async def read(self) -> dict[int, dict]:
+        batch = await self._read()
+        newest = None
+        if batch:
+            newest = max(datetime.fromisoformat(r["timestamp"]) for r in batch.values())
+        self.account(len(batch), newest)
+        return batch
+
+    def account(self, count: int, newest: datetime | None = None):
+        """Records a delivered batch for the throughput and lag statistics."""
+        clock = time.monotonic()
+        if self._last_read is not None and clock > self._last_read:
+            rate = count / (clock - self._last_read)
+            self._rate = rate if self.batches < 2 else 0.8 * self._rate + 0.2 * rate
+        self._last_read = clock
+        self.readings += count
+        self.batches += 1
+        if newest is not None:
+            self.lag_seconds = max(0.0, (self.now() - newest).total_seconds())
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "readings": self.readings,
+            "batches": self.batches,
+            "readings_per_second": round(self._rate, 1),
+            "lag_seconds": round(self.lag_seconds, 2),
+        }
+
+
+class SimulatorSource(SensorSource):
+    """The built-in random simulator, one reading per sensor per tick.
+
+    The tick's compute stage generates the readings, off the event loop and
+    sharded for large networks, for every sensor nothing was pushed for. So
+    ``read()`` returns no readings itself; it only accounts for the
+    ``sensors`` readings the tick will simulate.
+    """
+
+    name = "simulator"
+
+    def __init__(self, sensors: int):
+        super().__init__()
+        self.sensors = sensors
+
+    async def _read(self) -> dict[int, dict]:
+        return {}
+
+    async def read(self) -> dict[int, dict]:
+        self.account(self.sensors, self.now())
+        return {}
+
+
+def _iter_csv(path: str) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_parquet(path: str, chunk_rows: int) -> Iterator[dict]:
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+        yield from batch.to_pylist()
+
+
+def _row_reading(row: dict) -> tuple[int, datetime, dict]:
+    timestamp = row["timestamp"]
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return (
+        int(row["sensor_id"]),
+        timestamp,
+        {
+            "timestamp": timestamp.isoformat(),
+            "temperature": float(row["temperature"]),
+            "humidity": float(row["humidity"]),
+            "aqi": int(float(row["aqi"])),
+            "co2": int(float(row["co2"])),
+        },
+    )
+
+
+class FileReplaySource(SensorSource):
+    """Replays a time-ordered CSV or Parquet recording at ``speed``x.
+
+    Rows are streamed (Parquet in ``chunk_rows`` batches), so recordings larger
+    than memory are fine. The replay clock starts at the first recorded
+    timestamp and advances ``speed`` times faster than wall time; with
+    ``speed <= 0`` every ``read_frame()`` returns the next timestamp group
+    immediately. The recording must use the ``export_sensor_data_csv`` columns.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 60.0, chunk_rows: int = 10_000):
+        super().__init__()
+        self.path = path
+        self.speed = speed
+        if path.endswith(".parquet"):
+            rows = _iter_parquet(path, chunk_rows)
+        else:
+            rows = _iter_csv(path)
+        self._rows = (_row_reading(row) for row in rows)
+        self._next = next(self._rows, None)
+        self._start_recorded = self._next[1] if self._next else None
+        self._start_wall = time.monotonic()
+        self._cursor = self._start_recorded
+
+    @property
+    def exhausted(self) -> bool:
+        return self._next is None
+
+    def now(self) -> datetime:
+        if self._cursor is None:
+            return datetime.now(timezone.utc)
+        return self._cursor
+
+    def _advance_clock(self):
+        if self._start_recorded is None:
+            return
+        if self.speed > 0:
+            elapsed = (time.monotonic() - self._start_wall) * self.speed
+            self._cursor = max(
+                self._cursor,
+                datetime.fromtimestamp(
+                    self._start_recorded.timestamp() + elapsed, timezone.utc
+                ),
+            )
+        elif self._next is not None:
+            self._cursor = self._next[1]
+
+    def read_frame(self) -> dict[int, dict]:
+        """Returns the next timestamp group if the replay clock has reached it."""
+        self._advance_clock()
+        if self._next is None or self._next[1] > self._cursor:
+            return {}
+        frame_time = self._next[1]
+        frame = {}
+        while self._next is not None and self._next[1] == frame_time:
+            frame[self._next[0]] = self._next[2]
+            self._next = next(self._rows, None)
+        return frame
+
+    async def _read(self) -> dict[int, dict]:
+        """Coalesces every frame that is due into one batch."""
+        batch: dict[int, dict] = {}
+        while frame := self.read_frame():
+            batch.update(frame)
+            if self.speed <= 0:
+                break
+        return batch
+
+
+class GatewaySource(SensorSource):
+    """Polls an HTTP gateway that answers with JSON lines of readings."""
+
+    name = "gateway"
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self.errors = 0
+
+    async def _read(self) -> dict[int, dict]:
+        import httpx
+
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.url)
+                response.raise_for_status()
+            return parse_jsonl(response.content)
+        except Exception as e:
+            self.errors += 1
+            logging.exception(f"Error polling gateway {self.url}: {e}")
+            return {}
+
+    def stats(self) -> dict[str, float]:
+        return {**super().stats(), "errors": self.errors}
+
+
+def gateway_stub_app(sensors: int, base_values: dict, seed: int = 0):
+    """A local FastAPI app mimicking a gateway for ``GatewaySource`` benchmarks."""
+    import json
+
+    from fastapi import FastAPI, Response
+
+    app = FastAPI()
+    rng = random.Random(seed)
+
+    @app.get("/readings")
+    async def readings() -> Response:
+        now = datetime.now(timezone.utc)
+        lines = (
+            json.dumps(
+                {"sensor_id": i, **simulate_reading(now, rng, base_values, {})}
+            )
+            for i in range(1, sensors + 1)
+        )
+        return Response("\n".join(lines), media_type="application/x-ndjson")
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local sensor gateway stub.")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--sensors", type=int, default=1000)
+    args = parser.parse_args()
+    uvicorn.run(
+        gateway_stub_app(
+            args.sensors, {"temperature": 28.0, "humidity": 55.0, "aqi": 70, "co2": 500}
+        ),
+        port=args.port,
+    )
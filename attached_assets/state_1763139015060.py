@@ -1,9 +1,52 @@
 import reflex as rx
 import asyncio
+import json
 import random
+import time
 import numpy as np
+from urllib.parse import urlsplit
 from typing import TypedDict
 from datetime import datetime, timezone, timedelta
+from app.agent_codec import AgentStreamEncoder
+from app.crowd import CROWD_THRESHOLDS, CrowdModel, crowd_alerts
+from app.dispersion import DispersionModel
+from app.ingest import INGEST_QUEUE
+from app.liveness import LivenessTracker
+from app.metrics import TELEMETRY
+from app.pipeline import (
+    ALERT_THRESHOLDS,
+    BASE_VALUES,
+    HISTORY_LENGTH,
+    OFFLINE_COLOR,
+    SENSOR_PERIOD_S,
+    SensorSnapshot,
+    TickResult,
+    TickSnapshot,
+    compute_tick,
+    offline_alert,
+    run_compute_tick,
+)
+from app.registry import REGISTRY
+from app.scenarios import ScenarioEngine, ScenarioResult
+from app.scheduler import FixedRateScheduler
+from app.sharding import SHARD_MIN_SENSORS, get_engine
+from app.simulation import SimulationClock
+from app.sources import (
+    FileReplaySource,
+    GatewaySource,
+    SensorSource,
+    SimulatorSource,
+    resolve_target,
+)
+from app.store import FEEDS, SharedFeed, feed_key
+from app.viewmodel import (
+    aqi_band,
+    campus_average,
+    campus_insight,
+    green_index,
+    green_index_color,
+)
+from app.walkways import AGENT_SPEED_MPS, WALKWAYS
 
 
 class SensorReading(TypedDict):
@@ -12,6 +55,8 @@ class SensorReading(TypedDict):
     humidity: float
     aqi: int
     co2: int
+    # One of ``quality.QUALITY_FLAGS``.
+    quality: str
 
 
 class Alert(TypedDict):
@@ -60,177 +105,114 @@ class Sensor(TypedDict):
     predicted_temp: float
     color: str
     is_glowing: bool
+    # False once the sensor misses its reports; see ``liveness``.
+    online: bool
 
 
-SENSOR_LOCATIONS = [
-    {
-        "id": 1,
-        "name": "Main Gate",
-        "type": "Campus",
-        "lat": 20.041974,
-        "lng": 73.849924,
-    },
-    {"id": 2, "name": "Canteen", "type": "Campus", "lat": 20.040594, "lng": 73.850536},
-    {
-        "id": 3,
-        "name": "Meena Bhujbal School",
-        "type": "Campus",
-        "lat": 20.040648,
-        "lng": 73.851721,
-    },
-    {
-        "id": 4,
-        "name": "Engg. Building",
-        "type": "Campus",
-        "lat": 20.040695,
-        "lng": 73.84982,
-    },
-    {
-        "id": 5,
-        "name": "Mech. Building",
-        "type": "Campus",
-        "lat": 20.039654,
-        "lng": 73.849021,
-    },
-    {"id": 6, "name": "Ground", "type": "Campus", "lat": 20.042238, "lng": 73.851231},
-    {
-        "id": 7,
-        "name": "Police Training Ground",
-        "type": "Campus",
-        "lat": 20.042085,
-        "lng": 73.848787,
-    },
-    {
-        "id": 8,
-        "name": "Institute of Pharmacy",
-        "type": "Campus",
-        "lat": 20.040741,
-        "lng": 73.847402,
-    },
-    {
-        "id": 9,
-        "name": "Nearby Road",
-        "type": "Nearby",
-        "lat": 20.040191,
-        "lng": 73.853408,
-    },
-    {
-        "id": 10,
-        "name": "Highway Entrance",
-        "type": "Nearby",
-        "lat": 19.997,
-        "lng": 73.774,
-    },
-    {
-        "id": 11,
-        "name": "Residential Area",
-        "type": "Nearby",
-        "lat": 20.0005,
-        "lng": 73.771,
-    },
-    {
-        "id": 12,
-        "name": "Industrial Zone",
-        "type": "Nearby",
-        "lat": 20.001,
-        "lng": 73.7745,
-    },
-]
-CAMPUS_ZONES = [
-    {
-        "id": "main_gate",
-        "name": "Main Gate",
-        "sensors": [1],
-        "polygon": [
-            {"lat": 20.0422, "lng": 73.8497},
-            {"lat": 20.0422, "lng": 73.8502},
-            {"lat": 20.0417, "lng": 73.8502},
-            {"lat": 20.0417, "lng": 73.8497},
-        ],
-    },
-    {
-        "id": "canteen",
-        "name": "Canteen",
-        "sensors": [2],
-        "polygon": [
-            {"lat": 20.0408, "lng": 73.8503},
-            {"lat": 20.0408, "lng": 73.8508},
-            {"lat": 20.0403, "lng": 73.8508},
-            {"lat": 20.0403, "lng": 73.8503},
-        ],
-    },
-    {
-        "id": "engg_building",
-        "name": "Engg. Building",
-        "sensors": [4],
-        "polygon": [
-            {"lat": 20.0409, "lng": 73.8496},
-            {"lat": 20.0409, "lng": 73.8501},
-            {"lat": 20.0404, "lng": 73.8501},
-            {"lat": 20.0404, "lng": 73.8496},
-        ],
-    },
-    {
-        "id": "ground",
-        "name": "Ground",
-        "sensors": [6],
-        "polygon": [
-            {"lat": 20.0425, "lng": 73.8509},
-            {"lat": 20.0425, "lng": 73.8516},
-            {"lat": 20.0418, "lng": 73.8516},
-            {"lat": 20.0418, "lng": 73.8509},
-        ],
-    },
-]
-BASE_VALUES = {"temperature": 28.0, "humidity": 55.0, "aqi": 70, "co2": 500}
-LOCATION_FACTORS = {
-    "Main Gate": {"aqi": 5, "co2": 50},
-    "Canteen": {"temperature": 1, "co2": 100},
-    "Engg. Building": {"co2": 70},
-    "Mech. Building": {"aqi": 8, "co2": 60},
-    "Ground": {"temperature": 1.5, "aqi": -5},
-    "Highway Entrance": {"aqi": 15, "co2": 150},
-    "Industrial Zone": {"aqi": 25, "co2": 200},
-    "Residential Area": {"aqi": -5, "co2": -20},
-    "Nearby Road": {"aqi": 10, "co2": 120},
-}
-ALERT_THRESHOLDS = {
-    "temperature": {"warning": 33, "critical": 37},
-    "humidity": {
-        "warning_low": 25,
-        "warning_high": 75,
-        "critical_low": 15,
-        "critical_high": 85,
-    },
-    "aqi": {"warning": 100, "critical": 150},
-    "co2": {"warning": 900, "critical": 1200},
+# Seconds between samples of a session's serialized state size; a full
+# serialization is too expensive to repeat every tick.
+STATE_SIZE_SAMPLE_S = 300
+# Feed commits (about five minutes of ticks) after which cached Green
+# Initiatives results count as stale; vehicles and readings have moved on.
+WHAT_IF_BASELINE_TICKS = 30
+# Seconds between walkway agent steps; ``AGENT_SPEED_MPS`` is per step.
+AGENT_PERIOD_S = 1
+# Walkway agents per feed, every third a vehicle. At this density the busiest
+# zones peak near their ``capacity``, so occupancy alerts can actually fire.
+WALKWAY_AGENTS = 300
+# Open pages send a heartbeat this often. A session that has been silent for
+# SESSION_IDLE_S (closed tab, lost connection) stops its scheduler and releases
+# its shared feed; the next heartbeat starts it again.
+HEARTBEAT_S = 30
+SESSION_IDLE_S = 120
+# Route of every page; each is compiled and loaded on its own.
+PAGE_ROUTES = {
+    "Dashboard": "/dashboard",
+    "Analytics": "/analytics",
+    "Alerts": "/alerts",
+    "Green Initiatives": "/green-initiatives",
+    "Map": "/map",
 }
+CROWD_MODEL = CrowdModel(REGISTRY.zones)
+DISPERSION = DispersionModel(REGISTRY)
+SCENARIO_ENGINE = ScenarioEngine(REGISTRY, DISPERSION)
+# The 3D scene iframe is served by the backend; messages are addressed to it only.
+SCENE_ORIGIN = "{0.scheme}://{0.netloc}".format(urlsplit(rx.config.get_config().api_url))
 import os
 import logging
 
 
+def _initiative_card(result: ScenarioResult, zone_names: dict[str, str]) -> dict[str, str]:
+    """Green Initiatives card for one scenario; negative deltas are improvements."""
+    scenario = result.scenario
+    if result.aqi_delta <= -1 or result.co2_delta <= -10:
+        priority = "High Priority"
+    elif result.aqi_delta <= -0.25 or result.co2_delta <= -2:
+        priority = "Medium Priority"
+    else:
+        priority = "Low Priority"
+    return {
+        "icon": scenario.icon,
+        "title": scenario.title,
+        "description": scenario.description,
+        "color": scenario.color,
+        "priority": priority,
+        "location": zone_names.get(scenario.zone, "Campus-wide"),
+        "impact": f"AQI {result.aqi_delta:+.1f} · CO₂ {result.co2_delta:+.1f} ppm",
+        "band": (
+            f"95% band: AQI {result.aqi_low:+.1f} to {result.aqi_high:+.1f}, "
+            f"CO₂ {result.co2_low:+.1f} to {result.co2_high:+.1f} ppm "
+            f"({result.draws} runs)"
+        ),
+    }
+
+
 class CitiPulseState(rx.State):
     """Manages the state for the CitiPulse Digital Twin."""
 
     show_dashboard: bool = False
+    # ``sensors``, ``zones``, ``all_alerts`` and the agents are the containers of
+    # the session's shared feed (see ``app.store``), referenced, never copied.
     sensors: dict[int, Sensor] = {}
     all_alerts: list[Alert] = []
+    # Page-specific computed vars check this first and return an empty value on
+    # other pages, so a session only computes and ships the page it is viewing.
     active_page: str = "Dashboard"
     is_running: bool = False
-    analytics_sensor_id: int = 1
-    analytics_time_range: str = "1h"
     # Updated map_style to use Mapbox style URLs
     map_style: str = "mapbox://styles/mapbox/streets-v12"
     map_view_mode: str = "Streets"
     real_weather_temp: float = 0.0
     real_weather_humidity: float = 0.0
     real_weather_aqi: int = 0
-    moving_objects: list[dict] = []
+    # Live 10 m wind (m/s, and the compass bearing it blows from) that carries
+    # emissions onto the sensors.
+    wind_speed: float = 2.0
+    wind_direction: float = 225.0
+    # Ranked Green Initiatives cards from ``SCENARIO_ENGINE``.
+    initiative_impacts: list[dict[str, str]] = []
+    # Backend-only: agents reach the 3D scene as binary frames, not state sync.
+    _moving_objects: list[dict] = []
+    _agent_encoder: AgentStreamEncoder = AgentStreamEncoder()
+    # Agents per zone, plus the Crowd View heat layer as (cell x, cell y, count).
+    _crowd_occupancy: dict[str, int] = {}
+    _crowd_cells: list[int] = []
     zones: dict[str, Zone] = {}
-    _object_states: list[dict] = []
     last_updated: str = ""
     demo_mode: bool = False
     demo_triggered: bool = False
+    sim_seed: int = 42
+    _sim_time: float = 0.0
+    _last_seen: float = 0.0
+    _feed_key: tuple = ()
+    _feed_version: int = -1
+    _agents_version: int = -1
+    data_source: str = "simulator"
+    data_source_target: str = ""
+    replay_speed: float = 60.0
+    # Backend-only; /metrics exports them via the job and shared-feed collectors.
+    _source_stats: dict[str, float] = {}
+    _scheduler_stats: dict[str, dict[str, float]] = {}
     show_footer: bool = True
 
     # Map view states for Google Maps
@@ -243,7 +225,7 @@ class CitiPulseState(rx.State):
     def enter_dashboard(self):
         """Sets the state to show the main dashboard and starts the simulation."""
         self.show_dashboard = True
-        yield CitiPulseState.start_simulation()
+        yield rx.redirect(PAGE_ROUTES["Dashboard"])
 
     @rx.event
     def toggle_demo_mode(self):
@@ -257,15 +239,19 @@ class CitiPulseState(rx.State):
         """Triggers a sample critical alert for demonstration purposes."""
         if 1 in self.sensors:
             self.demo_triggered = True
+            now = self._now()
             demo_reading: SensorReading = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "timestamp": now.isoformat(),
                 "temperature": 38.5,
                 "humidity": 45.0,
                 "aqi": 155,
                 "co2": 1300,
             }
-            self._check_for_alerts(1, demo_reading)
-            self.sensors[1]["readings"].append(demo_reading)
+            snapshot = self._snapshot_tick(now, incoming={1: demo_reading})
+            # A one-off spike is exactly what the outlier test would reject.
+            snapshot.trusted = {1}
+            self._feed().reset_engine()
+            self._commit_tick(compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS))
             return rx.toast(
                 title="🔥 Critical Alert Demo!",
                 description="AQI at Main Gate has exceeded critical threshold.",
@@ -291,273 +277,444 @@ class CitiPulseState(rx.State):
                 "co2",
             ]
         )
-        for sensor_id, sensor in self.sensors.items():
-            for reading in sensor.get("readings", []):
-                writer.writerow(
-                    [
-                        reading["timestamp"],
-                        sensor_id,
-                        sensor["name"],
-                        reading["temperature"],
-                        reading["humidity"],
-                        reading["aqi"],
-                        reading["co2"],
-                    ]
-                )
+        # Time-ordered so the file can be streamed back by FileReplaySource.
+        rows = sorted(
+            (
+                [
+                    reading["timestamp"],
+                    sensor_id,
+                    sensor["name"],
+                    reading["temperature"],
+                    reading["humidity"],
+                    reading["aqi"],
+                    reading["co2"],
+                ]
+                for sensor_id, sensor in self.sensors.items()
+                for reading in sensor.get("readings", [])
+            ),
+            key=lambda row: row[0],
+        )
+        writer.writerows(rows)
         csv_data = output.getvalue().encode("utf-8")
         return rx.download(data=csv_data, filename="citipulse_sensor_data.csv")
 
     @rx.event
     def start_simulation(self):
-        """Initializes sensors and starts the background simulation task."""
+        """Attaches the session to its shared feed and starts the background scheduler."""
         if not self.is_running:
-            if not self.sensors:
-                for loc in SENSOR_LOCATIONS:
-                    self.sensors[loc["id"]] = {
-                        "id": loc["id"],
-                        "name": loc["name"],
-                        "type": loc["type"],
-                        "lat": loc["lat"],
-                        "lng": loc["lng"],
-                        "readings": [],
-                        "alerts": [],
-                        "predicted_aqi": 0.0,
-                        "predicted_temp": 0.0,
-                        "color": "#A1A1AA",
-                        "is_glowing": False,
-                    }
-            if not self.zones:
-                # Use our custom LatLng class instead of reflex_enterprise
-                for z in CAMPUS_ZONES:
-                    self.zones[z["id"]] = {
-                        "id": z["id"],
-                        "name": z["name"],
-                        "sensors": z["sensors"],
-                        "polygon": z["polygon"],
-                        "avg_aqi": 0,
-                        "avg_temp": 0.0,
-                        "color": "#4ade80",
-                        "polygon_latlng": [
-                            {"lat": p["lat"], "lng": p["lng"]} for p in z["polygon"]
-                        ],
-                    }
-            if not self._object_states:
-                paths = [
-                    [(20.0419, 73.8499), (20.0406, 73.8498), (20.0405, 73.8505)],
-                    [(20.0422, 73.8512), (20.0406, 73.8517), (20.0401, 73.8534)],
-                    [(20.0396, 73.849), (20.0407, 73.8474)],
-                ]
-                self._object_states = [
-                    {
-                        "path_idx": random.randint(0, len(paths) - 1),
-                        "segment_idx": 0,
-                        "progress": random.random(),
-                        "type": "person" if i % 3 != 0 else "vehicle",
-                    }
-                    for i in range(15)
-                ]
+            self._sync_feed(self._feed())
+            self._last_seen = time.monotonic()
             self.is_running = True
-            return [
-                CitiPulseState.update_sensor_data,
-                CitiPulseState.fetch_weather_data,
-                CitiPulseState.update_moving_objects,
-            ]
+            return CitiPulseState.run_scheduler
 
     @rx.event(background=True)
-    async def update_sensor_data(self):
-        """Periodically updates sensor readings to simulate a real-time network."""
-        from sklearn.linear_model import LinearRegression
+    async def run_scheduler(self):
+        """Drives the sensor, agent and weather loops from one fixed-rate scheduler."""
+        scheduler = FixedRateScheduler()
+        rng = random.Random()
 
-        while self.is_running:
+        async def update_sensor_data():
             async with self:
-                now = datetime.now(timezone.utc)
-                is_day = 6 <= now.hour <= 18
-                for sensor_id, sensor in self.sensors.items():
-                    base_temp = BASE_VALUES["temperature"] + (
-                        random.uniform(2, 5) if is_day else random.uniform(-1, -3)
-                    )
-                    base_aqi = BASE_VALUES["aqi"] + (10 if is_day else -8)
-                    loc_factor = LOCATION_FACTORS.get(sensor["name"], {})
-                    temp = (
-                        base_temp
-                        + loc_factor.get("temperature", 0)
-                        + np.random.uniform(-0.5, 0.5)
-                    )
-                    humidity = BASE_VALUES["humidity"] + np.random.uniform(-5, 5)
-                    aqi = base_aqi + loc_factor.get("aqi", 0) + np.random.uniform(-5, 5)
-                    co2 = (
-                        BASE_VALUES["co2"]
-                        + loc_factor.get("co2", 0)
-                        + np.random.uniform(-20, 20)
-                    )
-                    new_reading: SensorReading = {
-                        "timestamp": now.isoformat(),
-                        "temperature": round(temp, 2),
-                        "humidity": round(max(0, min(100, humidity)), 2),
-                        "aqi": int(max(0, aqi)),
-                        "co2": int(max(0, co2)),
-                    }
-                    self.sensors[sensor_id]["readings"].append(new_reading)
-                    if len(self.sensors[sensor_id]["readings"]) > 100:
-                        self.sensors[sensor_id]["readings"].pop(0)
-                    self._check_for_alerts(sensor_id, new_reading)
-                    is_critical_and_recent = False
-                    if sensor["alerts"]:
-                        latest_alert = sensor["alerts"][0]
-                        if latest_alert["level"] == "critical":
-                            alert_time = datetime.fromisoformat(
-                                latest_alert["timestamp"]
-                            )
-                            if (now - alert_time).total_seconds() < 60:
-                                is_critical_and_recent = True
-                    self.sensors[sensor_id]["is_glowing"] = is_critical_and_recent
-                    if len(sensor["readings"]) > 10:
-                        X = np.array(range(len(sensor["readings"]))).reshape(-1, 1)
-                        y_temp = np.array(
-                            [r["temperature"] for r in sensor["readings"]]
-                        )
-                        y_aqi = np.array([r["aqi"] for r in sensor["readings"]])
-                        model_temp = LinearRegression().fit(X, y_temp)
-                        model_aqi = LinearRegression().fit(X, y_aqi)
-                        future_point = len(sensor["readings"]) + 24 * 6
-                        self.sensors[sensor_id]["predicted_temp"] = round(
-                            model_temp.predict([[future_point]])[0], 2
-                        )
-                        self.sensors[sensor_id]["predicted_aqi"] = round(
-                            model_aqi.predict([[future_point]])[0], 2
-                        )
-                    self.sensors[sensor_id]["color"] = self._get_aqi_color_for_sensor(
-                        self.sensors[sensor_id]
-                    )
-                self._update_zone_data()
-                self.last_updated = now.isoformat()
-                # Remove the old map style switching logic since Mapbox handles this differently
-            await asyncio.sleep(10)
-
-    def _update_zone_data(self):
-        for zone_id, zone in self.zones.items():
-            zone_sensors = [
-                self.sensors[s_id]
-                for s_id in zone["sensors"]
-                if s_id in self.sensors and self.sensors[s_id]["readings"]
-            ]
-            if not zone_sensors:
-                continue
-            avg_aqi = sum((s["readings"][-1]["aqi"] for s in zone_sensors)) / len(
-                zone_sensors
+                feed = self._feed()
+                if not feed.claim("sensors", SENSOR_PERIOD_S):
+                    # Another session on the feed runs this tick; just catch up.
+                    self._sync_feed(feed)
+                    self._scheduler_stats = scheduler.report()
+                    if feed.source is not None:
+                        self._source_stats = feed.source.stats()
+                    return
+                if feed.source is None:
+                    feed.source = self._make_source()
+                    # Frames published before the feed existed belong to older feeds.
+                    feed.ingest_seq = INGEST_QUEUE.head()
+                source = feed.source
+                feed.ingest_seq, incoming = INGEST_QUEUE.collect(feed.ingest_seq)
+            readings = await source.read()
+            # Taken after the read, which moves a replay's clock to its frame.
+            now = source.now()
+            readings.update(incoming)
+            # The simulator's readings come from the compute stage; pushed
+            # readings still take precedence.
+            await self._run_tick(
+                now, rng, incoming=readings, simulate=isinstance(source, SimulatorSource)
             )
-            avg_temp = sum(
-                (s["readings"][-1]["temperature"] for s in zone_sensors)
-            ) / len(zone_sensors)
-            self.zones[zone_id]["avg_aqi"] = int(avg_aqi)
-            self.zones[zone_id]["avg_temp"] = round(avg_temp, 2)
-            if avg_aqi <= 50:
-                color = "#4ade80"
-            elif avg_aqi <= 100:
-                color = "#facc15"
-            elif avg_aqi <= 150:
-                color = "#fb923c"
-            else:
-                color = "#f87171"
-            self.zones[zone_id]["color"] = color
-
-    def _check_for_alerts(self, sensor_id: int, reading: SensorReading):
-        """Checks a new reading against thresholds and creates alerts."""
-        sensor_name = self.sensors[sensor_id]["name"]
-        self._create_alert_if_exceeded(
-            sensor_id,
-            sensor_name,
-            "temperature",
-            reading["temperature"],
-            ALERT_THRESHOLDS["temperature"],
-        )
-        self._create_alert_if_exceeded(
-            sensor_id, sensor_name, "aqi", reading["aqi"], ALERT_THRESHOLDS["aqi"]
+            async with self:
+                self._scheduler_stats = scheduler.report()
+                self._source_stats = source.stats()
+
+        scheduler.add_job("sensors", SENSOR_PERIOD_S, update_sensor_data, priority=0)
+        scheduler.add_job(
+            "moving_objects", AGENT_PERIOD_S, self._update_moving_objects, priority=1
         )
-        self._create_alert_if_exceeded(
-            sensor_id, sensor_name, "co2", reading["co2"], ALERT_THRESHOLDS["co2"]
+        scheduler.add_job("weather", 300, self._fetch_weather_data, priority=2, jitter=5)
+        scheduler.add_job(
+            "state_size", STATE_SIZE_SAMPLE_S, self._sample_state_size, priority=3, jitter=30
         )
-        if reading["humidity"] > ALERT_THRESHOLDS["humidity"]["critical_high"]:
-            self._create_alert(
-                sensor_id,
-                sensor_name,
-                "humidity",
-                reading["humidity"],
-                ALERT_THRESHOLDS["humidity"]["critical_high"],
-                "critical",
-            )
-        elif reading["humidity"] > ALERT_THRESHOLDS["humidity"]["warning_high"]:
-            self._create_alert(
-                sensor_id,
-                sensor_name,
-                "humidity",
-                reading["humidity"],
-                ALERT_THRESHOLDS["humidity"]["warning_high"],
-                "warning",
-            )
-        elif reading["humidity"] < ALERT_THRESHOLDS["humidity"]["critical_low"]:
-            self._create_alert(
-                sensor_id,
-                sensor_name,
-                "humidity",
-                reading["humidity"],
-                ALERT_THRESHOLDS["humidity"]["critical_low"],
-                "critical",
+        scheduler.add_job("idle", HEARTBEAT_S, self._stop_if_idle, priority=4)
+        try:
+            await scheduler.run(lambda: self.is_running)
+        finally:
+            TELEMETRY.remove_gauge("session_state_bytes", session=self._session_label())
+            TELEMETRY.remove_gauge("session_owned_bytes", session=self._session_label())
+            async with self:
+                self._detach_feed()
+
+    @rx.event(background=True)
+    async def fast_forward(self, hours: float = 24, step_seconds: int = 900):
+        """Regenerates the last ``hours`` of history with a seeded simulated clock.
+
+        The default 15 minute step keeps a full day inside the 100 reading
+        history so the "compared to yesterday" insight has data to work with.
+        The history is the shared feed's, so every session on it sees the rewrite;
+        the feed's live sensor and agent jobs are paused until it is done. Only
+        the simulator's history can be regenerated.
+        """
+        async with self:
+            if self.data_source != "simulator":
+                return rx.toast.error("Fast-forward only works on the simulator feed.")
+            feed = self._feed()
+            if not feed.take("fast_forward", ("sensors", "moving_objects")):
+                return rx.toast.error(f"The feed is busy with {feed.owner}.")
+            clock = SimulationClock(
+                start=datetime.now(timezone.utc) - timedelta(hours=hours),
+                step_seconds=step_seconds,
+                speed=0,
             )
-        elif reading["humidity"] < ALERT_THRESHOLDS["humidity"]["warning_low"]:
-            self._create_alert(
-                sensor_id,
-                sensor_name,
-                "humidity",
-                reading["humidity"],
-                ALERT_THRESHOLDS["humidity"]["warning_low"],
-                "warning",
+            rng = random.Random(self.sim_seed)
+            feed.all_alerts.clear()
+            for sensor in feed.sensors.values():
+                sensor["readings"] = []
+                sensor["alerts"] = []
+            self._reset_liveness(feed, clock.now())
+            feed.reset_engine()
+            # Vehicles are emission sources: start them from the seeded layout
+            # and hold them there, so the same seed gives the same history.
+            self._init_agents(feed)
+            self._step_agents(feed, feed.agent_rng)
+            FEEDS.commit(feed)
+            self._sync_feed(feed)
+        try:
+            for _ in range(int(hours * 3600 // step_seconds)):
+                now = clock.advance()
+                async with self:
+                    self._sim_time = now.timestamp()
+                await self._run_tick(now, rng)
+        finally:
+            async with self:
+                self._sim_time = 0.0
+                feed.give_back()
+
+    @rx.event(background=True)
+    async def replay_recording(self, path: str, speed: float = 60.0):
+        """Replays every frame of a recording through the ingestion path at ``speed``x.
+
+        The feed's live sensor job is paused until the recording ends.
+        """
+        try:
+            path = resolve_target("replay", path)
+        except ValueError as e:
+            return rx.toast.error(str(e))
+        async with self:
+            feed = self._feed()
+            if not feed.take("replay"):
+                return rx.toast.error(f"The feed is busy with {feed.owner}.")
+        try:
+            source = FileReplaySource(path, speed)
+            rng = random.Random(self.sim_seed)
+            started = False
+            while not source.exhausted:
+                readings = source.read_frame()
+                if not readings:
+                    await asyncio.sleep(0.05)
+                    continue
+                now = source.now()
+                source.account(len(readings), now)
+                async with self:
+                    if not started:
+                        # The recording has its own clock; liveness starts over on it.
+                        self._reset_liveness(feed, now)
+                        feed.reset_engine()
+                        started = True
+                    self._sim_time = now.timestamp()
+                await self._run_tick(now, rng, incoming=readings, simulate=False)
+        finally:
+            async with self:
+                self._sim_time = 0.0
+                feed.give_back()
+
+    def _make_source(self) -> SensorSource:
+        target = resolve_target(self.data_source, self.data_source_target)
+        if self.data_source == "replay":
+            return FileReplaySource(target, self.replay_speed)
+        if self.data_source == "gateway":
+            return GatewaySource(target)
+        return SimulatorSource(len(self._feed().sensors))
+
+    @rx.event
+    def set_data_source(self, source: str, target: str = ""):
+        """Switches the live feed between "simulator", "replay" (file) and "gateway" (URL).
+
+        ``target`` names a recording or an allow-listed gateway; see ``resolve_target``.
+        """
+        try:
+            resolve_target(source, target)
+        except ValueError as e:
+            return rx.toast.error(str(e))
+        self.data_source = source
+        self.data_source_target = target
+
+    def _now(self) -> datetime:
+        """Current time, following the simulated clock while one is active."""
+        if self._sim_time:
+            return datetime.fromtimestamp(self._sim_time, timezone.utc)
+        return datetime.now(timezone.utc)
+
+    def _feed(self) -> SharedFeed:
+        """The shared feed of the session's data source; moves the session onto it."""
+        key = feed_key(self.data_source, self.data_source_target, self.replay_speed)
+        if key != self._feed_key:
+            self._detach_feed()
+            self._feed_key = key
+            self._feed_version = self._agents_version = -1
+        feed = FEEDS.acquire(key, self._session_label())
+        if not feed.sensors:
+            self._init_feed(feed)
+        return feed
+
+    def _detach_feed(self):
+        if self._feed_key:
+            FEEDS.release(self._feed_key, self._session_label())
+            self._feed_key = ()
+
+    def _init_feed(self, feed: SharedFeed):
+        """Fills a new feed with the registry's sensors and zones and the walkway agents."""
+        for sensor_id in REGISTRY.ids:
+            loc = REGISTRY.get(sensor_id)
+            feed.sensors[sensor_id] = {
+                "id": loc["id"],
+                "name": loc["name"],
+                "type": loc["type"],
+                "lat": loc["lat"],
+                "lng": loc["lng"],
+                "readings": [],
+                "alerts": [],
+                "predicted_aqi": 0.0,
+                "predicted_temp": 0.0,
+                "color": "#A1A1AA",
+                "is_glowing": False,
+                "online": True,
+            }
+        self._reset_liveness(feed, self._now())
+        # Use our custom LatLng class instead of reflex_enterprise
+        for z in REGISTRY.zones:
+            feed.zones[z["id"]] = {
+                "id": z["id"],
+                "name": z["name"],
+                "sensors": z["sensors"],
+                "polygon": z["polygon"],
+                "avg_aqi": 0,
+                "avg_temp": 0.0,
+                "color": "#4ade80",
+                "polygon_latlng": [
+                    {"lat": p["lat"], "lng": p["lng"]} for p in z["polygon"]
+                ],
+            }
+        self._init_agents(feed)
+
+    def _init_agents(self, feed: SharedFeed):
+        """Places the feed's walkway agents, drawn from a generator seeded with ``sim_seed``."""
+        feed.agent_rng = rng = random.Random(self.sim_seed)
+        feed.object_states = []
+        for i in range(WALKWAY_AGENTS):
+            origin = WALKWAYS.sample_origin(rng)
+            destination = WALKWAYS.sample_destination(origin, rng)
+            route = WALKWAYS.route(origin, destination)
+            feed.object_states.append(
+                {
+                    "origin": origin,
+                    "destination": destination,
+                    "distance": rng.random() * route.length,
+                    "type": "person" if i % 3 != 0 else "vehicle",
+                }
             )
 
-    def _create_alert_if_exceeded(
+    def _sync_feed(self, feed: SharedFeed):
+        """Points the session's vars at what ``feed`` holds now.
+
+        Assigning marks the vars dirty, so a sync sends them to the browser;
+        the versions skip it while the feed has not changed.
+        """
+        if feed.version != self._feed_version:
+            self._feed_version = feed.version
+            self.sensors = feed.sensors
+            self.zones = feed.zones
+            self.all_alerts = feed.all_alerts
+            self.last_updated = feed.last_updated
+        if feed.agents_version != self._agents_version:
+            self._agents_version = feed.agents_version
+            self._moving_objects = feed.moving_objects
+            self._crowd_cells = feed.crowd_cells
+            self._crowd_occupancy = feed.crowd_occupancy
+
+    async def _run_tick(
         self,
-        sensor_id: int,
-        sensor_name: str,
-        param: str,
-        value: float,
-        thresholds: dict,
+        now: datetime,
+        rng: random.Random,
+        incoming: dict[int, SensorReading] | None = None,
+        simulate: bool = True,
     ):
-        if value > thresholds["critical"]:
-            self._create_alert(
-                sensor_id, sensor_name, param, value, thresholds["critical"], "critical"
-            )
-        elif value > thresholds["warning"]:
-            self._create_alert(
-                sensor_id, sensor_name, param, value, thresholds["warning"], "warning"
-            )
+        """Runs one sensor tick with the state lock held only to snapshot and commit."""
+        with TELEMETRY.time("sensor_tick"):
+            await self._run_tick_stages(now, rng, incoming, simulate)
 
-    def _create_alert(
+    async def _run_tick_stages(
         self,
-        sensor_id: int,
-        sensor_name: str,
-        param: str,
-        value: float,
-        threshold: float,
-        level: str,
-    ) -> Alert:
-        alert_id = f"{sensor_name}-{param}-{datetime.now().timestamp()}"
-        new_alert: Alert = {
-            "id": alert_id,
-            "sensor_name": sensor_name,
-            "parameter": param.upper(),
-            "value": round(value, 2),
-            "threshold": threshold,
-            "level": level,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
-        self.all_alerts.insert(0, new_alert)
-        if len(self.all_alerts) > 50:
-            self.all_alerts.pop()
-        self.sensors[sensor_id]["alerts"].insert(0, new_alert)
-        if len(self.sensors[sensor_id]["alerts"]) > 10:
-            self.sensors[sensor_id]["alerts"].pop()
-        # Remove the old map style switching for alerts since Mapbox handles this differently
-        return new_alert
+        now: datetime,
+        rng: random.Random,
+        incoming: dict[int, SensorReading] | None,
+        simulate: bool,
+    ):
+        seed = rng.getrandbits(64)
+        async with self:
+            wind = (self.wind_speed, self.wind_direction)
+            vehicles = self._vehicle_positions()
+            feed = self._feed()
+            sensors = feed.sensors
+            if simulate and len(sensors) >= SHARD_MIN_SENSORS:
+                engine = get_engine(feed, REGISTRY)
+                if engine.stale:
+                    engine.load(sensors)
+                incoming = {k: v for k, v in (incoming or {}).items() if k in sensors}
+                names = {sensor_id: s["name"] for sensor_id, s in sensors.items()}
+                map_view_mode = self.map_view_mode
+                offline = set(feed.liveness.offline)
+            else:
+                engine = None
+                snapshot = self._snapshot_tick(now, incoming or {}, simulate, seed)
+                # This tick's readings bypass the shards' copy of the history.
+                feed.reset_engine()
+        with TELEMETRY.time("dispersion"):
+            aqi_field = await asyncio.to_thread(DISPERSION.sensor_field, *wind, *vehicles)
+        if engine is not None:
+            with TELEMETRY.time("shard_tick"):
+                shard_result = await engine.tick(
+                    now, seed, BASE_VALUES, ALERT_THRESHOLDS, aqi_field, offline, incoming
+                )
+                result = engine.to_tick_result(
+                    shard_result, names, ALERT_THRESHOLDS, map_view_mode
+                )
+        else:
+            snapshot.aqi_field = dict(zip(DISPERSION.sensor_ids, aqi_field.tolist()))
+            with TELEMETRY.time("compute_tick"):
+                result = await run_compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS)
+        for stage, seconds in result.timings.items():
+            TELEMETRY.observe("stage_seconds", seconds, stage=stage)
+        async with self:
+            with TELEMETRY.time("commit"):
+                self._commit_tick(result)
+
+    def _vehicle_positions(self) -> tuple[list[float], list[float]]:
+        """Vehicle agents, which are point emission sources for ``DISPERSION``."""
+        vehicles = [o for o in self._moving_objects if o["type"] == "vehicle"]
+        return [o["lat"] for o in vehicles], [o["lng"] for o in vehicles]
+
+    def _snapshot_tick(
+        self,
+        now: datetime,
+        incoming: dict[int, SensorReading],
+        simulate: bool = False,
+        seed: int = 0,
+    ) -> TickSnapshot:
+        """Copies out everything ``compute_tick`` needs from the shared feed."""
+        feed = self._feed()
+        return TickSnapshot(
+            now=now,
+            seed=seed,
+            sensors=[
+                SensorSnapshot(
+                    id=sensor_id,
+                    name=sensor["name"],
+                    readings=list(sensor["readings"]),
+                    latest_alert=sensor["alerts"][0] if sensor["alerts"] else None,
+                    loc_factor=REGISTRY.loc_factor(sensor_id)
+                    if sensor_id in REGISTRY
+                    else {},
+                )
+                for sensor_id, sensor in feed.sensors.items()
+            ],
+            zones={zone_id: list(z["sensors"]) for zone_id, z in feed.zones.items()},
+            # Marker colours follow the view mode of the session running the tick.
+            map_view_mode=self.map_view_mode,
+            incoming={k: v for k, v in incoming.items() if k in feed.sensors},
+            simulate=simulate,
+            offline=set(feed.liveness.offline),
+        )
+
+    def _reset_liveness(self, feed: SharedFeed, now: datetime):
+        """Puts every sensor of ``feed`` back online with a fresh report deadline from ``now``."""
+        feed.liveness = LivenessTracker(SENSOR_PERIOD_S, REGISTRY.report_intervals)
+        feed.liveness.watch(feed.sensors, now.timestamp())
+        for sensor in feed.sensors.values():
+            sensor["online"] = True
+
+    def _commit_tick(self, result: TickResult):
+        """Swaps the results of ``compute_tick`` into the shared feed."""
+        feed = self._feed()
+        readings = alerts = 0
+        for sensor_id, update in result.updates.items():
+            sensor = feed.sensors.get(sensor_id)
+            if sensor is None:
+                continue
+            sensor["readings"].extend(update.filled)
+            sensor["readings"].append(update.reading)
+            del sensor["readings"][:-HISTORY_LENGTH]
+            readings += 1 + len(update.filled)
+            alerts += len(update.alerts)
+            for alert in update.alerts:
+                feed.all_alerts.insert(0, alert)
+                sensor["alerts"].insert(0, alert)
+            del feed.all_alerts[50:]
+            del sensor["alerts"][10:]
+            sensor["is_glowing"] = update.is_glowing
+            sensor["color"] = update.color
+            if update.predicted_temp is not None:
+                sensor["predicted_temp"] = update.predicted_temp
+                sensor["predicted_aqi"] = update.predicted_aqi
+        TELEMETRY.count("readings", readings)
+        TELEMETRY.count("alerts", alerts)
+        self._update_liveness(feed, result)
+        for zone_id, values in result.zones.items():
+            if zone_id in feed.zones:
+                feed.zones[zone_id].update(values)
+        feed.last_updated = result.now.isoformat()
+        FEEDS.commit(feed)
+        self._sync_feed(feed)
+
+    def _update_liveness(self, feed: SharedFeed, result: TickResult):
+        """Records this tick's reports and raises "sensor offline" for expired ones."""
+        now = result.now.timestamp()
+        liveness = feed.liveness
+        for sensor_id in liveness.report(result.updates, now):
+            if sensor_id in feed.sensors:
+                feed.sensors[sensor_id]["online"] = True
+        for sensor_id in liveness.expire(now):
+            sensor = feed.sensors.get(sensor_id)
+            if sensor is None:
+                continue
+            TELEMETRY.count("sensors_offline")
+            sensor["online"] = False
+            sensor["color"] = OFFLINE_COLOR
+            sensor["is_glowing"] = False
+            alert = offline_alert(
+                sensor["name"],
+                now - liveness.last_seen[sensor_id],
+                liveness.timeout(sensor_id),
+                result.now,
+            )
+            feed.all_alerts.insert(0, alert)
+            sensor["alerts"].insert(0, alert)
+            del sensor["alerts"][10:]
+        del feed.all_alerts[50:]
 
     @rx.var
     def total_sensors(self) -> int:
@@ -568,140 +725,140 @@ class CitiPulseState(rx.State):
         return len([a for a in self.all_alerts if a["level"] == "critical"])
 
     def _get_avg_campus_reading(self, key: str) -> float:
-        campus_sensors = [
-            s for s in self.sensors.values() if s["type"] == "Campus" and s["readings"]
-        ]
-        if not campus_sensors:
-            return 0.0
-        total_value = sum((s["readings"][-1][key] for s in campus_sensors))
-        return round(total_value / len(campus_sensors), 1)
+        return campus_average(self.sensors, key)
 
     @rx.var
     def campus_avg_aqi(self) -> int:
+        if self.active_page != "Dashboard":
+            return 0
         return int(self._get_avg_campus_reading("aqi"))
 
     @rx.var
     def campus_avg_temp(self) -> float:
+        if self.active_page != "Dashboard":
+            return 0.0
         return self._get_avg_campus_reading("temperature")
 
     @rx.var
     def campus_avg_humidity(self) -> float:
+        if self.active_page != "Dashboard":
+            return 0.0
         return self._get_avg_campus_reading("humidity")
 
     @rx.var
     def campus_avg_co2(self) -> int:
+        if self.active_page != "Dashboard":
+            return 0
         return int(self._get_avg_campus_reading("co2"))
 
     @rx.var
     def sensor_list(self) -> list[Sensor]:
         """Returns the list of sensors from the sensors dictionary."""
+        if self.active_page != "Analytics":
+            return []
         return list(self.sensors.values())
 
     @rx.var
-    def zone_list(self) -> list[Zone]:
-        return list(self.zones.values())
+    def zone_occupancy(self) -> list[dict[str, str]]:
+        """Agents in each zone with a capacity, coloured by crowd alert level."""
+        if self.active_page != "Map":
+            return []
+        rows = []
+        for zone in REGISTRY.zones:
+            capacity = zone.get("capacity")
+            if not capacity:
+                continue
+            count = self._crowd_occupancy.get(zone["id"], 0)
+            if count >= CROWD_THRESHOLDS["critical"] * capacity:
+                color = "#ef4444"
+            elif count >= CROWD_THRESHOLDS["warning"] * capacity:
+                color = "#f59e0b"
+            else:
+                color = "#10b981"
+            rows.append(
+                {
+                    "name": zone["name"],
+                    "count": f"{count}/{capacity}",
+                    "percent": f"{min(100, round(count / capacity * 100))}%",
+                    "color": color,
+                }
+            )
+        return rows
 
     @rx.event
     def set_active_page(self, page_name: str):
-        """Sets the currently active page for navigation highlighting."""
+        """Sets the currently active page and navigates to its route."""
         self.active_page = page_name
+        return rx.redirect(PAGE_ROUTES.get(page_name, PAGE_ROUTES["Dashboard"]))
 
     @rx.event
-    def set_analytics_sensor_id(self, sensor_id: str):
-        self.analytics_sensor_id = int(sensor_id)
+    def heartbeat(self):
+        """Sent by every open page; restarts a session that was stopped as idle."""
+        self._last_seen = time.monotonic()
+        if not self.is_running and self.show_dashboard:
+            return CitiPulseState.start_simulation
+
+    async def _stop_if_idle(self):
+        """Ends ``run_scheduler`` once no page has sent a heartbeat for a while."""
+        async with self:
+            if time.monotonic() - self._last_seen > SESSION_IDLE_S:
+                self.is_running = False
+
+    @rx.event
+    def load_page(self):
+        """on_load for every page route: marks it active and starts the feed."""
+        path = self.router.page.path
+        self.active_page = next(
+            (page for page, route in PAGE_ROUTES.items() if route == path),
+            "Dashboard",
+        )
+        self.show_dashboard = True
+        self._agent_encoder.reset()
+        if self.active_page == "Green Initiatives":
+            return [
+                CitiPulseState.start_simulation,
+                CitiPulseState.refresh_initiative_impacts,
+            ]
+        return CitiPulseState.start_simulation
 
     @rx.event
     def set_map_view_mode(self, mode: str):
         """Set map view mode for Google Maps"""
         self.map_view_mode = mode
 
-    def _get_aqi_color_for_sensor(self, sensor: Sensor) -> str:
-        if not sensor or not sensor["readings"]:
-            return "#A1A1AA"
-        latest_reading = sensor["readings"][-1]
-        aqi = latest_reading.get("aqi", 0)
-        if self.map_view_mode == "Environmental":
-            if aqi < 50:
-                return "#00FF00"
-            elif aqi < 100:
-                return "#FFFF00"
-            elif aqi < 150:
-                return "#FFA500"
-            else:
-                return "#FF0000"
-        elif aqi < 50:
-            return "#22C55E"
-        elif aqi < 100:
-            return "#EAB308"
-        elif aqi < 150:
-            return "#F97316"
-        else:
-            return "#EF4444"
-
     @rx.var
     def campus_green_index(self) -> int:
-        aqi_score = max(0, 100 - self.campus_avg_aqi)
-        temp_score = (
-            100
-            if 18 <= self.campus_avg_temp <= 28
-            else max(0, 100 - abs(self.campus_avg_temp - 23) * 5)
-        )
-        co2_score = max(0, 100 - (self.campus_avg_co2 - 400) / 10)
-        cgi = int(aqi_score * 0.5 + temp_score * 0.25 + co2_score * 0.25)
-        return max(0, min(100, cgi))
+        return green_index(self.campus_avg_aqi, self.campus_avg_temp, self.campus_avg_co2)
 
     @rx.var
     def cgi_color(self) -> str:
-        cgi = self.campus_green_index
-        if cgi > 75:
-            return "#10B981"
-        elif cgi > 50:
-            return "#FBBF24"
-        else:
-            return "#F97316"
+        return green_index_color(self.campus_green_index)
 
     @rx.var
     def cgi_chart_data(self) -> list[dict[str, int | str]]:
         return [{"name": "CGI", "value": self.campus_green_index}]
 
+    @rx.var
+    def campus_aqi_band(self) -> dict[str, str]:
+        """Category label and dashboard colours of the campus average AQI."""
+        return aqi_band(self.campus_avg_aqi)
+
     @rx.var
     def pulse_color_class(self) -> str:
-        aqi = self.campus_avg_aqi
-        if aqi < 50:
-            return "from-green-400 to-green-600"
-        elif aqi < 100:
-            return "from-yellow-400 to-yellow-600"
-        elif aqi < 150:
-            return "from-orange-400 to-orange-600"
-        else:
-            return "from-red-400 to-red-600"
+        return self.campus_aqi_band["gradient"]
 
     @rx.var
     def pulse_text_color(self) -> str:
-        aqi = self.campus_avg_aqi
-        if aqi < 50:
-            return "text-green-600"
-        elif aqi < 100:
-            return "text-yellow-600"
-        elif aqi < 150:
-            return "text-orange-600"
-        else:
-            return "text-red-600"
+        return self.campus_aqi_band["text"]
 
     @rx.var
     def campus_health_status(self) -> str:
-        aqi = self.campus_avg_aqi
-        if aqi < 50:
-            return "Excellent"
-        elif aqi < 100:
-            return "Good"
-        elif aqi < 150:
-            return "Moderate"
-        else:
-            return "Unhealthy"
+        return self.campus_aqi_band["label"]
 
     @rx.var
     def last_updated_display(self) -> str:
+        if self.active_page != "Dashboard":
+            return ""
         if not self.last_updated:
             return "Never"
         now = datetime.now(timezone.utc)
@@ -728,206 +885,160 @@ class CitiPulseState(rx.State):
             },
         )
 
-    @rx.var
-    def selected_sensor(self) -> Sensor | None:
-        return self.sensors.get(self.analytics_sensor_id)
-
-    @rx.var
-    def analytics_data(self) -> list[SensorReading]:
-        if not self.selected_sensor or not self.selected_sensor["readings"]:
-            return []
-        now = datetime.now(timezone.utc)
-        readings = self.selected_sensor["readings"]
-        if self.analytics_time_range == "1h":
-            time_delta = 3600
-        elif self.analytics_time_range == "6h":
-            time_delta = 6 * 3600
-        elif self.analytics_time_range == "24h":
-            time_delta = 24 * 3600
-        else:
-            return readings
-        return [
-            r
-            for r in readings
-            if (now - datetime.fromisoformat(r["timestamp"])).total_seconds()
-            <= time_delta
-        ]
-
-    @rx.event(background=True)
-    async def fetch_weather_data(self):
+    async def _fetch_weather_data(self):
         """Fetches real-time weather data from Open-Meteo."""
         import httpx
 
-        while self.is_running:
-            try:
+        try:
+            with TELEMETRY.time("weather_fetch"):
                 async with httpx.AsyncClient() as client:
                     lat, lon = (20.041264, 73.85038)
-                    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m&forecast_days=1"
+                    url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,wind_speed_10m,wind_direction_10m&wind_speed_unit=ms&forecast_days=1"
                     response = await client.get(url)
                     response.raise_for_status()
                     data = response.json()
-                async with self:
-                    current_weather = data.get("current", {})
-                    self.real_weather_temp = current_weather.get("temperature_2m", 0.0)
-                    self.real_weather_humidity = current_weather.get(
-                        "relative_humidity_2m", 0.0
-                    )
-                    self.real_weather_aqi = 0
-            except Exception as e:
-                logging.exception(f"Error fetching weather data: {e}")
-            await asyncio.sleep(300)
-
-    @rx.event(background=True)
-    async def update_moving_objects(self):
-        """Simulates moving objects on campus."""
-        if not hasattr(self, "_object_states") or not self._object_states:
-            return
-        paths = [
-            [(20.0419, 73.8499), (20.0406, 73.8498), (20.0405, 73.8505)],
-            [(20.0422, 73.8512), (20.0406, 73.8517), (20.0401, 73.8534)],
-            [(20.0396, 73.849), (20.0407, 73.8474)],
-        ]
-        while self.is_running:
             async with self:
-                if not self._object_states:
-                    return
-                new_objects = []
-                for i, state in enumerate(self._object_states):
-                    path = paths[state["path_idx"]]
-                    start_node = path[state["segment_idx"]]
-                    end_node = path[(state["segment_idx"] + 1) % len(path)]
-                    lat = (
-                        start_node[0]
-                        + (end_node[0] - start_node[0]) * state["progress"]
-                    )
-                    lng = (
-                        start_node[1]
-                        + (end_node[1] - start_node[1]) * state["progress"]
-                    )
-                    new_objects.append(
-                        {
-                            "id": i,
-                            "lat": lat,
-                            "lng": lng,
-                            "type": state["type"],
-                            "color": "#3b82f6"
-                            if state["type"] == "person"
-                            else "#4f46e5",
-                        }
-                    )
-                    state["progress"] += 0.05
-                    if state["progress"] >= 1.0:
-                        state["progress"] = 0.0
-                        state["segment_idx"] = (state["segment_idx"] + 1) % len(path)
-                        if state["segment_idx"] == 0:
-                            state["path_idx"] = random.randint(0, len(paths) - 1)
-                self.moving_objects = new_objects
-            await asyncio.sleep(1)
+                current_weather = data.get("current", {})
+                self.real_weather_temp = current_weather.get("temperature_2m", 0.0)
+                self.real_weather_humidity = current_weather.get(
+                    "relative_humidity_2m", 0.0
+                )
+                self.wind_speed = current_weather.get("wind_speed_10m", self.wind_speed)
+                self.wind_direction = current_weather.get(
+                    "wind_direction_10m", self.wind_direction
+                )
+                self.real_weather_aqi = 0
+        except Exception as e:
+            TELEMETRY.count("weather_fetch_errors")
+            logging.exception(f"Error fetching weather data: {e}")
 
-    @rx.var
-    def green_initiatives_recommendations(self) -> list[dict[str, str]]:
-        recommendations = []
-        if self.campus_avg_aqi > 90:
-            recommendations.append(
-                {
-                    "icon": "tree-pine",
-                    "title": "Tree Plantation Drive",
-                    "description": "Campus AQI is elevated. Planting more trees can help filter pollutants and improve air quality.",
-                    "color": "text-green-600",
-                }
-            )
-        high_co2_sensors = [
-            s
-            for s in self.sensors.values()
-            if s["readings"] and s["readings"][-1]["co2"] > 800
+    def _session_label(self) -> str:
+        return self.router.session.client_token[:8]
+
+    async def _sample_state_size(self):
+        """Records the session's serialized state size and the memory it holds itself."""
+        session = self._session_label()
+        async with self:
+            with TELEMETRY.time("state_serialize"):
+                size = len(json.dumps(self.dict(), default=str))
+            TELEMETRY.gauge("session_state_bytes", size, session=session)
+            feed = self._feed()
+            with TELEMETRY.time("state_sizeof"):
+                owned = feed.session_bytes(
+                    self.get_value(name) for name in (*self.base_vars, *self.backend_vars)
+                )
+                # Every session samples, but the feed only needs measuring once a round.
+                if feed.claim("measure", STATE_SIZE_SAMPLE_S):
+                    feed.measure()
+            feed.sessions[session] = owned
+            TELEMETRY.gauge("session_owned_bytes", owned, session=session)
+
+    async def _update_moving_objects(self):
+        """Steps the feed's moving objects if no other session has, then syncs."""
+        async with self:
+            feed = self._feed()
+            if feed.object_states and feed.claim("moving_objects", AGENT_PERIOD_S):
+                self._step_agents(feed, feed.agent_rng)
+            # Also picks up sensor ticks other sessions committed since the last sync.
+            self._sync_feed(feed)
+
+    def _step_agents(self, feed: SharedFeed, rng: random.Random):
+        """Advances the moving objects one step along their walkway routes."""
+        routes = [
+            WALKWAYS.route(state["origin"], state["destination"])
+            for state in feed.object_states
         ]
-        if len(high_co2_sensors) > 2:
-            recommendations.append(
-                {
-                    "icon": "bike",
-                    "title": "Promote Bicycle Zones",
-                    "description": "High CO2 levels detected near multiple zones, likely due to vehicle traffic. Promoting bicycle usage can reduce emissions.",
-                    "color": "text-sky-600",
-                }
-            )
-        high_temp_sensors = [
-            s
-            for s in self.sensors.values()
-            if s["readings"] and s["readings"][-1]["temperature"] > 32
+        on_route = [
+            route.position_at(state["distance"])
+            for route, state in zip(routes, feed.object_states)
         ]
-        if len(high_temp_sensors) > 3:
-            recommendations.append(
+        # Neighbours push each other apart; the offset from the route
+        # persists between steps and slowly decays back onto the walkway.
+        crowd = CROWD_MODEL.step(
+            [lat + s.get("offset_lat", 0.0) for (lat, _), s in zip(on_route, feed.object_states)],
+            [lng + s.get("offset_lng", 0.0) for (_, lng), s in zip(on_route, feed.object_states)],
+        )
+        new_objects = []
+        for i, state in enumerate(feed.object_states):
+            route = routes[i]
+            route_lat, route_lng = on_route[i]
+            lat, lng = float(crowd.lat[i]), float(crowd.lng[i])
+            state["offset_lat"] = (lat - route_lat) * 0.8
+            state["offset_lng"] = (lng - route_lng) * 0.8
+            new_objects.append(
                 {
-                    "icon": "solar-panel",
-                    "title": "Explore Solar Initiatives",
-                    "description": "Consistently high temperatures suggest an opportunity to harness solar energy. Consider installing solar panels on rooftops.",
-                    "color": "text-orange-500",
+                    "id": i,
+                    "lat": lat,
+                    "lng": lng,
+                    "type": state["type"],
+                    "color": "#3b82f6"
+                    if state["type"] == "person"
+                    else "#4f46e5",
                 }
             )
-        if not recommendations:
-            recommendations.append(
+            state["distance"] += AGENT_SPEED_MPS[state["type"]]
+            if state["distance"] >= route.length:
+                # Arrived: start a new trip from here, picked by OD demand.
+                state["origin"] = state["destination"]
+                state["destination"] = WALKWAYS.sample_destination(state["origin"], rng)
+                state["distance"] = 0.0
+        feed.moving_objects = new_objects
+        feed.crowd_cells = crowd.cells
+        feed.crowd_occupancy = crowd.occupancy
+        feed.agents_version += 1
+        alerts = crowd_alerts(
+            crowd.occupancy,
+            {z["id"]: z for z in REGISTRY.zones},
+            feed.crowd_levels,
+            self._now(),
+        )
+        if alerts:
+            for alert in alerts:
+                feed.all_alerts.insert(0, alert)
+            del feed.all_alerts[50:]
+            FEEDS.commit(feed)
+
+    @rx.var
+    def green_initiatives_recommendations(self) -> list[dict[str, str]]:
+        if self.active_page != "Green Initiatives":
+            return []
+        if not self.initiative_impacts:
+            return [
                 {
-                    "icon": "party-popper",
-                    "title": "All Green!",
-                    "description": "Environmental parameters are within optimal ranges. Keep up the great work in maintaining a sustainable campus!",
-                    "color": "text-emerald-500",
+                    "icon": "hourglass",
+                    "title": "Modeling initiatives...",
+                    "description": "Running what-if simulations of the campus under the current wind and traffic.",
+                    "color": "text-slate-500",
+                    "priority": "",
+                    "location": "",
+                    "impact": "",
+                    "band": "",
                 }
-            )
-        return recommendations
+            ]
+        return self.initiative_impacts
+
+    @rx.event(background=True)
+    async def refresh_initiative_impacts(self):
+        """Ranks the Green Initiatives by Monte Carlo modeled AQI/CO2 impact."""
+        async with self:
+            wind = (self.wind_speed, self.wind_direction)
+            vehicles = self._vehicle_positions()
+            feed = self._feed()
+            baseline = (feed.key, feed.version // WHAT_IF_BASELINE_TICKS)
+        results = await SCENARIO_ENGINE.evaluate(*wind, *vehicles, baseline)
+        zone_names = {z["id"]: z["name"] for z in REGISTRY.zones}
+        async with self:
+            self.initiative_impacts = [
+                _initiative_card(result, zone_names) for result in results
+            ]
 
     @rx.var
     def campus_insights(self) -> str:
         """Generates a dynamic insight text based on data trends."""
-        if not self.sensors or not any((s["readings"] for s in self.sensors.values())):
-            return "Awaiting data for insights..."
-        campus_sensors = [
-            s
-            for s in self.sensors.values()
-            if s["type"] == "Campus" and len(s["readings"]) > 2
-        ]
-        if not campus_sensors:
-            return "Insufficient data for trend analysis."
-        current_aqi = self.campus_avg_aqi
-        yesterday_aqi_sum = 0
-        count = 0
-        now = datetime.now(timezone.utc)
-        one_day_ago = (now - timedelta(days=1)).timestamp()
-        for sensor in campus_sensors:
-            for reading in sensor["readings"]:
-                reading_time = datetime.fromisoformat(reading["timestamp"]).timestamp()
-                if abs(reading_time - one_day_ago) < 3600:
-                    yesterday_aqi_sum += reading["aqi"]
-                    count += 1
-                    break
-        if count == 0:
-            return f"Campus AQI is currently {current_aqi}. Keep monitoring for trends."
-        yesterday_avg_aqi = yesterday_aqi_sum / count
-        change = (current_aqi - yesterday_avg_aqi) / yesterday_avg_aqi * 100
-        if abs(change) < 5:
-            return f"AQI is stable at {current_aqi}, similar to yesterday."
-        elif change > 0:
-            return f"AQI has risen by {abs(change):.0f}% to {current_aqi} compared to yesterday."
-        else:
-            return f"AQI has improved by {abs(change):.0f}% to {current_aqi} since yesterday!"
-
-    @rx.var
-    def prediction_confidence(self) -> int:
-        """Calculates a mock prediction confidence score."""
-        if not self.selected_sensor or len(self.selected_sensor["readings"]) < 10:
-            return 0
-        confidence = min(95, 50 + len(self.selected_sensor["readings"]))
-        return confidence
+        if self.active_page != "Dashboard":
+            return ""
+        return campus_insight(self.sensors, self._now())
 
-    @rx.var
-    def confidence_color(self) -> str:
-        """Returns color based on prediction confidence."""
-        conf = self.prediction_confidence
-        if conf > 80:
-            return "bg-green-100 text-green-800"
-        elif conf > 60:
-            return "bg-yellow-100 text-yellow-800"
-        else:
-            return "bg-red-100 text-red-800"
     
     # New 3D campus states
     map_view_mode: str = "3d"
@@ -962,6 +1073,41 @@ class CitiPulseState(rx.State):
         self.map_view_mode = mode
         # The iframe communication is now handled client-side in the components
     
+    @rx.event
+    def push_scene_data(self):
+        """Posts the latest sensors, agents and weather into the 3D scene iframe."""
+        if self.active_page != "Map":
+            return
+        payload = {
+            "type": "update",
+            "sensors": [
+                {
+                    "id": s["id"],
+                    "lat": s["lat"],
+                    "lng": s["lng"],
+                    "color": s["color"],
+                }
+                for s in self.sensors.values()
+            ],
+            "agentFrame": self._agent_encoder.encode_objects(self._moving_objects),
+            "crowd": {"cellSize": CROWD_MODEL.cell_m, "cells": self._crowd_cells},
+            # The dispersion grid is only drawn by the heat map and AQI overlay.
+            "aqiGrid": DISPERSION.grid(
+                self.wind_speed, self.wind_direction, *self._vehicle_positions()
+            )
+            if self.map_view_mode in ("heatmap", "aqi")
+            else None,
+            "viewMode": self.map_view_mode,
+            "weather": {
+                "temp": self.real_weather_temp,
+                "humidity": self.real_weather_humidity,
+            },
+        }
+        return rx.call_script(
+            "document.getElementById('campus-3d-frame')?.contentWindow"
+            f"?.postMessage({json.dumps(payload)}, {json.dumps(SCENE_ORIGIN)})"
+        )
+
     def spawn_agents(self):
         """Spawn agents in the campus"""
         # This will trigger the client-side script that updates the iframe
@@ -970,4 +1116,65 @@ class CitiPulseState(rx.State):
     def update_weather_data(self, temp: str, humidity: str):
         """Update weather data"""
         self.real_weather_temp = temp
-        self.real_weather_humidity = humidity
\ No newline at end of file
+        self.real_weather_humidity = humidity
+
+
+class AnalyticsState(CitiPulseState):
+    """State owned by the Analytics page; only loaded when a session uses it."""
+
+    analytics_sensor_id: int = 1
+    analytics_time_range: str = "1h"
+
+    @rx.event
+    def set_analytics_sensor_id(self, sensor_id: str):
+        self.analytics_sensor_id = int(sensor_id)
+
+    @rx.var
+    def selected_sensor(self) -> Sensor | None:
+        if self.active_page != "Analytics":
+            return None
+        return self.sensors.get(self.analytics_sensor_id)
+
+    @rx.var
+    def analytics_data(self) -> list[SensorReading]:
+        if self.active_page != "Analytics":
+            return []
+        if not self.selected_sensor or not self.selected_sensor["readings"]:
+            return []
+        now = datetime.now(timezone.utc)
+        readings = self.selected_sensor["readings"]
+        if self.analytics_time_range == "1h":
+            time_delta = 3600
+        elif self.analytics_time_range == "6h":
+            time_delta = 6 * 3600
+        elif self.analytics_time_range == "24h":
+            time_delta = 24 * 3600
+        else:
+            return readings
+        return [
+            r
+            for r in readings
+            if (now - datetime.fromisoformat(r["timestamp"])).total_seconds()
+            <= time_delta
+        ]
+
+    @rx.var
+    def prediction_confidence(self) -> int:
+        """Calculates a mock prediction confidence score."""
+        if self.active_page != "Analytics":
+            return 0
+        if not self.selected_sensor or len(self.selected_sensor["readings"]) < 10:
+            return 0
+        confidence = min(95, 50 + len(self.selected_sensor["readings"]))
+        return confidence
+
+    @rx.var
+    def confidence_color(self) -> str:
+        """Returns color based on prediction confidence."""
+        conf = self.prediction_confidence
+        if conf > 80:
+            return "bg-green-100 text-green-800"
+        elif conf > 60:
+            return "bg-yellow-100 text-yellow-800"
+        else:
+            return "bg-red-100 text-red-800"
@@ -0,0 +1,252 @@
+"""Sensor history, alerts and agents shared by every session on the same feed.
+
+Sessions watching the same data feed (the simulator, a replay file or a
+gateway) see the same sensors. So the readings history, alerts, zone
+aggregates, liveness and walkway agents are kept once per feed in a
+``SharedFeed``, not once per session. ``FEEDS.acquire(key, session)`` gives a
+session the feed for its data source and counts the reference.
+``FEEDS.release(key, session)`` drops it, and the last release frees the feed.
+
+A session's ``sensors``, ``zones`` and ``all_alerts`` vars are the feed's own
+containers, assigned rather than copied. With Reflex's in-process state
+manager, 500 sessions therefore hold 500 references to one history. Jobs are
+claimed: the first session whose scheduler fires once the job is due runs it
+into the feed, and the other sessions pick up the result when they next sync.
+
+``deep_sizeof`` backs the memory report. It gives the bytes a feed holds, and
+the bytes each session holds on its own once everything it shares with its
+feed is left out.
+
+An event that rewrites a feed's history (a fast-forward or a replay) first
+``take``s the feed. Until it gives it back, the live sensor job is never due
+on that feed, so no session's scheduler ticks into the history being
+rewritten.
+
+Code that changes a feed's sensor data or alerts finishes with
+``FEEDS.commit(feed)``. That bumps the feed's version, so sessions resync, and
+notifies the listeners added with ``FEEDS.add_listener``, such as the kiosk
+broadcast.
+"""
+
+import random
+import sys
+import time
+import types
+from collections import deque
+from collections.abc import Callable, Hashable, Iterable
+
+from app.liveness import LivenessTracker
+from app.metrics import TELEMETRY
+
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.MethodType)
+# Fraction of a period a job may be claimed early, so the scheduler's jitter
+# does not make a lone session miss every other tick.
+CLAIM_TOLERANCE = 0.1
+
+
+def deep_sizeof(obj, seen: set[int] | None = None) -> int:
+    """Bytes of ``obj`` and everything it references, skipping ids in ``seen``.
+
+    Follows containers and plain objects' ``__dict__``; classes, modules and
+    functions are shared by the whole process and are not counted.
+    """
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+    return size
+
+
+def feed_key(source: str, target: str, speed: float) -> tuple:
+    """Key of the feed of a data source, as sessions and kiosks name it."""
+    return (source, target, float(speed))
+
+
+class SharedFeed:
+    """State of one data feed that every session on it references."""
+
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.sensors: dict[int, dict] = {}
+        self.zones: dict[str, dict] = {}
+        self.all_alerts: list[dict] = []
+        self.liveness: LivenessTracker | None = None
+        self.last_updated = ""
+        # Bumped by ``FeedStore.commit``, so sessions know to resync.
+        self.version = 0
+        self.object_states: list[dict] = []
+        self.moving_objects: list[dict] = []
+        self.crowd_cells: list[int] = []
+        self.crowd_occupancy: dict[str, int] = {}
+        self.crowd_levels: dict[str, str] = {}
+        self.agents_version = 0
+        # Draws the agents' trips; seeded when the agents are placed, so a
+        # fast-forward replays them identically.
+        self.agent_rng = random.Random()
+        # The feed's sensor source and its position in ``INGEST_QUEUE``.
+        self.source = None
+        self.ingest_seq = 0
+        # ``sharding.ShardedSimulation`` of large networks; holds shared memory.
+        self.engine = None
+        # Session label -> bytes it holds on its own, as last sampled.
+        self.sessions: dict[str, int] = {}
+        self.nbytes = 0
+        # The event rewriting the feed's history, if any, and the jobs it pauses.
+        self.owner = ""
+        self._paused: frozenset[str] = frozenset()
+        # Job -> monotonic time of its next run.
+        self._due: dict[str, float] = {}
+
+    def take(self, owner: str, jobs: Iterable[str] = ("sensors",)) -> bool:
+        """Reserves the feed for ``owner`` and pauses ``jobs``; False if already taken."""
+        if self.owner:
+            return False
+        self.owner = owner
+        self._paused = frozenset(jobs)
+        return True
+
+    def give_back(self):
+        """Ends ``take``; the paused jobs are due again straight away."""
+        for job in self._paused:
+            self._due.pop(job, None)
+        self.owner = ""
+        self._paused = frozenset()
+
+    def claim(self, job: str, period: float) -> bool:
+        """Whether ``job`` is due; if so, the caller runs it for every session.
+
+        Each job keeps a fixed next-due deadline that advances by ``period``
+        on every claim, so however many sessions fire at it, the job runs once
+        per period. A job that fell more than a period behind restarts from
+        now rather than catching up in a burst. A job paused by ``take`` is
+        never due.
+        """
+        if job in self._paused:
+            return False
+        now = time.monotonic()
+        due = self._due.get(job)
+        if due is not None and now < due - period * CLAIM_TOLERANCE:
+            return False
+        if due is None or now - due >= period:
+            due = now
+        self._due[job] = due + period
+        return True
+
+    def reset_engine(self):
+        """Makes the sharded engine reload the feed's history before its next tick."""
+        if self.engine is not None:
+            self.engine.reset()
+
+    def close(self):
+        """Shuts down the sharded engine's pool and frees its shared memory."""
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+    def containers(self) -> list:
+        """The top-level containers sessions reference."""
+        return [
+            self.sensors,
+            self.zones,
+            self.all_alerts,
+            self.moving_objects,
+            self.crowd_cells,
+            self.crowd_occupancy,
+        ]
+
+    def measure(self) -> int:
+        """Recomputes ``nbytes``, everything the feed holds except its source."""
+        self.nbytes = deep_sizeof(
+            [
+                *self.containers(),
+                self.liveness,
+                self.object_states,
+                self.crowd_levels,
+            ]
+        )
+        return self.nbytes
+
+    def session_bytes(self, values: Iterable) -> int:
+        """Bytes of a session's var ``values``, leaving out what it shares with the feed."""
+        return deep_sizeof(list(values), {id(c) for c in self.containers()})
+
+
+class FeedStore:
+    """Reference-counted registry of the live ``SharedFeed`` objects."""
+
+    def __init__(self):
+        self._feeds: dict[Hashable, SharedFeed] = {}
+        self._listeners: list[Callable[[SharedFeed], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._feeds)
+
+    def get(self, key: Hashable) -> SharedFeed | None:
+        return self._feeds.get(key)
+
+    def acquire(self, key: Hashable, session: str) -> SharedFeed:
+        """The feed for ``key``, created on first use; ``session`` now references it."""
+        feed = self._feeds.get(key)
+        if feed is None:
+            feed = self._feeds[key] = SharedFeed(key)
+        feed.sessions.setdefault(session, 0)
+        return feed
+
+    def release(self, key: Hashable, session: str):
+        """Drops ``session``'s reference; the feed goes with the last one."""
+        feed = self._feeds.get(key)
+        if feed is None:
+            return
+        feed.sessions.pop(session, None)
+        if not feed.sessions:
+            del self._feeds[key]
+            feed.close()
+
+    def close(self):
+        """Closes and forgets every feed, at server shutdown."""
+        feeds, self._feeds = self._feeds, {}
+        for feed in feeds.values():
+            feed.close()
+
+    def add_listener(self, listener: Callable[[SharedFeed], None]):
+        """Registers a callback run with the feed after every commit."""
+        self._listeners.append(listener)
+
+    def commit(self, feed: SharedFeed):
+        """Publishes a change to ``feed``'s sensor data or alerts."""
+        feed.version += 1
+        for listener in self._listeners:
+            listener(feed)
+
+    def report(self) -> dict[str, float]:
+        """Feed and session memory, as last sampled, and source throughput for /metrics."""
+        feeds = list(self._feeds.values())
+        sessions = sum(len(feed.sessions) for feed in feeds)
+        shared = sum(feed.nbytes for feed in feeds)
+        owned = sum(sum(feed.sessions.values()) for feed in feeds)
+        sources = [feed.source.stats() for feed in feeds if feed.source is not None]
+        return {
+            "shared_feeds": len(feeds),
+            "shared_feed_sessions": sessions,
+            "shared_feed_bytes": shared,
+            "session_owned_bytes_total": owned,
+            "memory_bytes_per_session": (shared + owned) / sessions if sessions else 0,
+            "source_readings_per_second": sum(s["readings_per_second"] for s in sources),
+            "source_lag_seconds_max": max((s["lag_seconds"] for s in sources), default=0),
+        }
+
+
+FEEDS = FeedStore()
+TELEMETRY.add_collector(FEEDS.report)
@@ -0,0 +1,12 @@
+"""Makes this directory importable as the ``app`` package the modules expect."""
+
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if "app" not in sys.modules:
+    package = types.ModuleType("app")
+    package.__path__ = [ROOT]
+    sys.modules["app"] = package
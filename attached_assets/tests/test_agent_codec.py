@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.agent_codec import (
+    HEADER,
+    M_PER_DEG_LAT,
+    M_PER_DEG_LNG,
+    QUANTUM_M,
+    RECORD,
+    AgentStreamEncoder,
+    decode,
+    dequantize,
+    encode_delta,
+    quantize,
+)
+
+
+def _records(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return quantize(
+        20.041264 + rng.uniform(-0.002, 0.002, n),
+        73.85038 + rng.uniform(-0.002, 0.002, n),
+        rng.choice(["person", "vehicle"], n),
+    )
+
+
+def test_quantize_round_trips_within_half_a_quantum():
+    lat = np.array([20.0405, 20.0422])
+    lng = np.array([73.8497, 73.8516])
+    records = quantize(lat, lng, ["person", "vehicle"])
+    back_lat, back_lng, types = dequantize(records)
+    assert types == ["person", "vehicle"]
+    assert np.all(np.abs(back_lat - lat) * M_PER_DEG_LAT <= QUANTUM_M / 2 + 1e-9)
+    assert np.all(np.abs(back_lng - lng) * M_PER_DEG_LNG <= QUANTUM_M / 2 + 1e-9)
+
+
+def test_stream_decodes_to_the_encoded_records():
+    encoder = AgentStreamEncoder(keyframe_interval=4)
+    records = _records(50)
+    decoded = None
+    for step in range(10):
+        records = records.copy()
+        records["x"][step::7] += 3
+        frame = encoder.encode(records)
+        decoded = decode(frame, decoded)
+        assert np.array_equal(decoded, records)
+
+
+def test_delta_only_carries_changed_agents():
+    previous = _records(100)
+    records = previous.copy()
+    records["y"][[3, 40]] += 1
+    frame = encode_delta(records, previous)
+    assert len(frame) == HEADER.size + 13 + 2 * RECORD.itemsize
+
+
+def test_keyframe_when_agent_count_changes():
+    encoder = AgentStreamEncoder()
+    first = decode(encoder.encode(_records(10)))
+    frame = encoder.encode(_records(12, seed=1))
+    assert len(decode(frame, first)) == 12
+
+
+def test_delta_needs_the_matching_previous_state():
+    previous = _records(8)
+    frame = encode_delta(previous, previous)
+    with pytest.raises(ValueError):
+        decode(frame, None)
+    with pytest.raises(ValueError):
+        decode(b"\x02" + frame[1:], previous)
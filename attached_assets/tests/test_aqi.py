@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from app.aqi import (
+    CATEGORIES,
+    LABELS,
+    PALETTES,
+    aqi_from_concentrations,
+    classify,
+    legend,
+    sub_index,
+)
+
+
+def test_category_boundaries_are_inclusive_upper_bounds():
+    aqi = [0, 50, 51, 100, 101, 150, 151, 200, 201, 300, 301, 500]
+    assert classify(aqi).category.tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4, 5, 5]
+
+
+@pytest.mark.parametrize("palette", list(PALETTES))
+def test_every_palette_colours_every_category(palette):
+    classes = classify([25, 75, 125, 175, 250, 400], palette)
+    assert classes.color.tolist() == list(PALETTES[palette])
+    assert classes.label.tolist() == list(LABELS)
+
+
+def test_legend_lists_every_category_in_order():
+    items = legend("zone")
+    assert [item["label"] for item in items] == list(LABELS)
+    assert len(items) == len(CATEGORIES)
+    assert items[0]["range"] == "AQI ≤ 50"
+    assert items[-1]["range"] == "AQI > 300"
+
+
+def test_pm25_sub_index_interpolates_within_its_band():
+    concentrations = [0, 9.0, 9.1, 12.0, 35.4, 35.5, 325.4, 500]
+    assert sub_index("pm25", concentrations).tolist() == [0, 50, 51, 56, 100, 101, 500, 500]
+
+
+def test_aqi_is_the_largest_sub_index_and_names_its_pollutant():
+    aqi, dominant = aqi_from_concentrations({"pm25": [12.0, np.nan], "o3": [0.08, np.nan]})
+    assert aqi[0] == 132
+    assert dominant.tolist() == ["o3", ""]
+    assert np.isnan(aqi[1])
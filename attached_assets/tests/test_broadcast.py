@@ -0,0 +1,98 @@
+import asyncio
+import json
+
+import pytest
+
+from app.broadcast import BroadcastHub
+from app.store import FEEDS
+
+
+@pytest.fixture
+def feed():
+    feed = FEEDS.acquire("kiosk-test", "session")
+    yield feed
+    FEEDS.release("kiosk-test", "session")
+
+
+def _updated(frame: bytes) -> str:
+    assert frame.startswith(b"event: dashboard\ndata: ") and frame.endswith(b"\n\n")
+    return json.loads(frame[len(b"event: dashboard\ndata: "):])["last_updated"]
+
+
+def _publish(hub: BroadcastHub, feed, last_updated: str):
+    feed.last_updated = last_updated
+    hub.publish(feed)
+
+
+def test_subscribers_start_from_the_current_frame(feed):
+    async def main():
+        hub = BroadcastHub()
+        feed.last_updated = "t0"
+        stream = hub.subscribe(feed.key)
+        assert _updated(await anext(stream)) == "t0"
+        assert hub.subscribers() == 1
+        assert json.loads(hub.latest(feed.key))["last_updated"] == "t0"
+        await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_one_render_fans_out_to_every_subscriber(feed):
+    async def main():
+        hub = BroadcastHub()
+        streams = [hub.subscribe(feed.key) for _ in range(3)]
+        for stream in streams:
+            await anext(stream)
+        pending = [asyncio.ensure_future(anext(stream)) for stream in streams]
+        await asyncio.sleep(0)
+        _publish(hub, feed, "t1")
+        frames = await asyncio.gather(*pending)
+        assert _updated(frames[0]) == "t1"
+        # Every viewer is handed the very same bytes rather than a copy.
+        assert all(frame is frames[0] for frame in frames)
+        assert hub.report() == {"kiosk_subscribers": 3, "kiosk_feeds": 1}
+        for stream in streams:
+            await stream.aclose()
+
+    asyncio.run(main())
+
+
+def test_slow_subscribers_skip_to_the_newest_frame(feed):
+    async def main():
+        hub = BroadcastHub()
+        fast, slow = hub.subscribe(feed.key), hub.subscribe(feed.key)
+        await anext(fast)
+        await anext(slow)
+        seen = []
+        for i in range(1, 4):
+            waiting = asyncio.ensure_future(anext(fast))
+            await asyncio.sleep(0)
+            _publish(hub, feed, f"t{i}")
+            seen.append(_updated(await waiting))
+        assert seen == ["t1", "t2", "t3"]
+        # The slow viewer missed t1 and t2 and only gets the latest frame.
+        assert _updated(await anext(slow)) == "t3"
+        waiting = asyncio.ensure_future(anext(slow))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        waiting.cancel()
+        await fast.aclose()
+
+    asyncio.run(main())
+
+
+def test_unsubscribing_drops_the_channel(feed):
+    async def main():
+        hub = BroadcastHub()
+        streams = [hub.subscribe(feed.key) for _ in range(2)]
+        for stream in streams:
+            await anext(stream)
+        await streams[0].aclose()
+        assert hub.report() == {"kiosk_subscribers": 1, "kiosk_feeds": 1}
+        await streams[1].aclose()
+        assert hub.report() == {"kiosk_subscribers": 0, "kiosk_feeds": 0}
+        # Without viewers a commit renders nothing.
+        _publish(hub, feed, "t1")
+        assert hub.report()["kiosk_feeds"] == 0
+
+    asyncio.run(main())
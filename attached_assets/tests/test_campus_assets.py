@@ -0,0 +1,68 @@
+import base64
+import hashlib
+import os
+
+import httpx
+import pytest
+
+from app import campus_assets
+from app.campus_assets import LEGEND_MARKER, THREE_PATH, build_bundle, vendor_three
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "index.html").write_text(
+        f'<script src="{THREE_PATH}"></script><script src="campus3d.js"></script>'
+        f"{LEGEND_MARKER}",
+        encoding="utf-8",
+    )
+    (tmp_path / "campus3d.js").write_text("render();", encoding="utf-8")
+    (tmp_path / "campus3d.css").write_text("body {}", encoding="utf-8")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def get(*args, **kwargs):
+        raise AssertionError("no network access expected")
+
+    monkeypatch.setattr(httpx, "get", get)
+
+
+def test_building_without_three_never_downloads_it(static_dir, offline):
+    entry, files = build_bundle(static_dir)
+    page = files[entry][0].decode("utf-8")
+    assert LEGEND_MARKER not in page and "Good" in page
+    hashed_js = next(name for name in files if name.endswith(".js"))
+    assert f'"{hashed_js}"' in page
+    assert not any(name.startswith("vendor/") for name in files)
+
+
+def test_vendored_three_is_hashed_into_the_page(static_dir, offline):
+    os.makedirs(os.path.join(static_dir, "vendor"))
+    with open(os.path.join(static_dir, *THREE_PATH.split("/")), "wb") as f:
+        f.write(b"var THREE = {};")
+    entry, files = build_bundle(static_dir)
+    hashed = next(name for name in files if name.startswith("vendor/"))
+    assert f'"{hashed}"' in files[entry][0].decode("utf-8")
+
+
+class _Response:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def test_vendoring_checks_the_pinned_digest(static_dir, monkeypatch):
+    content = b"var THREE = {};"
+    monkeypatch.setattr(httpx, "get", lambda *args, **kwargs: _Response(content))
+    with pytest.raises(ValueError, match="integrity"):
+        vendor_three(static_dir)
+    assert not os.path.exists(os.path.join(static_dir, "vendor"))
+
+    digest = base64.b64encode(hashlib.sha512(content).digest()).decode("ascii")
+    monkeypatch.setattr(campus_assets, "THREE_SHA512", digest)
+    with open(vendor_three(static_dir), "rb") as f:
+        assert f.read() == content
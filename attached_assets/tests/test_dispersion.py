@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from app.dispersion import (
+    REFERENCE_DISTANCE_M,
+    REFERENCE_WIND_MS,
+    EmissionSources,
+    concentration,
+)
+
+# Wind from the south (180 degrees) blows towards +y.
+SOUTH = 180.0
+
+
+def _stack(strength: float = 10.0, height: float = 0.0) -> EmissionSources:
+    return EmissionSources([0.0], [0.0], [strength], [height])
+
+
+def test_strength_is_reached_at_the_reference_point():
+    field = concentration(
+        _stack(), np.array([0.0]), np.array([REFERENCE_DISTANCE_M]), REFERENCE_WIND_MS, SOUTH
+    )
+    assert field[0] == pytest.approx(10.0, rel=1e-4)
+
+
+def test_nothing_reaches_upwind_receptors():
+    ry = np.array([-50.0, -200.0, -500.0])
+    assert concentration(_stack(), np.zeros(3), ry, 3.0, SOUTH).tolist() == [0, 0, 0]
+
+
+def test_concentration_decays_downwind():
+    ry = np.array([50.0, 100.0, 200.0, 400.0, 800.0])
+    field = concentration(_stack(), np.zeros(5), ry, 3.0, SOUTH)
+    assert np.all(np.diff(field) < 0) and field[-1] > 0
+
+
+def test_concentration_scales_with_emission_rate():
+    rx, ry = np.array([0.0, 20.0, -35.0]), np.array([80.0, 150.0, 300.0])
+    single = concentration(_stack(5.0), rx, ry, 2.0, SOUTH)
+    triple = concentration(_stack(15.0), rx, ry, 2.0, SOUTH)
+    np.testing.assert_allclose(triple, 3 * single, rtol=1e-5)
+
+
+def test_plume_is_symmetric_across_its_axis():
+    # Wind from the west (270 degrees) makes +x downwind and y the crosswind.
+    rx = np.full(4, 150.0)
+    ry = np.array([-40.0, 40.0, -10.0, 10.0])
+    field = concentration(_stack(height=12.0), rx, ry, 4.0, 270.0)
+    assert field[0] == pytest.approx(field[1]) and field[2] == pytest.approx(field[3])
+    assert field[2] > field[0]
+
+
+def test_stronger_wind_dilutes_and_chunks_agree():
+    ry = np.linspace(30.0, 900.0, 40)
+    rx = np.zeros_like(ry)
+    calm = concentration(_stack(), rx, ry, 1.0, SOUTH)
+    assert np.all(concentration(_stack(), rx, ry, 6.0, SOUTH) < calm)
+    chunked = concentration(_stack(), rx, ry, 1.0, SOUTH, chunk=7)
+    np.testing.assert_allclose(chunked, calm, rtol=1e-5)
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.ingest import IngestQueue, ingest_api, parse_jsonl
+
+
+def _line(**fields) -> bytes:
+    reading = {"sensor_id": 1, "temperature": 25, "humidity": 50, "aqi": 60, "co2": 450}
+    return json.dumps({**reading, **fields}).encode()
+
+
+def test_keeps_newest_reading_per_sensor():
+    body = b"\n".join([_line(timestamp=10, aqi=60), _line(timestamp=20, aqi=70), b""])
+    assert parse_jsonl(body)[1]["aqi"] == 70
+
+
+@pytest.mark.parametrize(
+    "bad, message",
+    [
+        (b"[1, 2]", "Line 2: a reading must be a JSON object"),
+        (b"{not json", "Line 2:"),
+        (b'{"sensor_id": 2}', "Line 2: missing field 'temperature'"),
+        (_line(sensor_id=[1]), "Line 2:"),
+        (_line(pm25=None), "Line 2:"),
+    ],
+)
+def test_malformed_lines_raise_value_error_with_line_number(bad, message):
+    with pytest.raises(ValueError, match=message):
+        parse_jsonl(_line() + b"\n" + bad)
+
+
+def test_a_new_feed_starts_at_the_queue_head():
+    queue = IngestQueue()
+    queue._pending = {1: {"aqi": 60}}
+    old_seq, readings = queue.collect(0)
+    assert readings == {1: {"aqi": 60}}
+    # A feed created now must not replay what the older feed already applied.
+    new_seq = queue.head()
+    queue._pending = {2: {"aqi": 70}}
+    assert queue.collect(new_seq)[1] == {2: {"aqi": 70}}
+    assert queue.collect(old_seq)[1] == {2: {"aqi": 70}}
+    assert queue.collect(queue.head())[1] == {}
+
+
+def test_endpoint_requires_admin_token(monkeypatch):
+    client = TestClient(ingest_api)
+    monkeypatch.delenv("CITIPULSE_ADMIN_TOKEN", raising=False)
+    assert client.post("/ingest", content=_line()).status_code == 403
+    monkeypatch.setenv("CITIPULSE_ADMIN_TOKEN", "secret")
+    assert client.post("/ingest", content=_line()).status_code == 403
+    response = client.post(
+        "/ingest", content=b"[1]", headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 400
+    assert response.json() == {"error": "Line 1: a reading must be a JSON object"}
@@ -0,0 +1,79 @@
+import random
+
+from app.liveness import LivenessTracker, TimerWheel
+
+
+def _expiries(wheel: TimerWheel, until: int) -> dict:
+    """Advances one second at a time; returns key -> second it expired at."""
+    fired = {}
+    for now in range(1, until + 1):
+        for key in wheel.advance(now):
+            fired[key] = now
+    return fired
+
+
+def test_timers_fire_at_their_deadline_across_levels():
+    wheel = TimerWheel(slots=8, levels=3)
+    deadlines = {"a": 3, "b": 8, "c": 9, "d": 70, "e": 200, "f": 511}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+    assert _expiries(wheel, 512) == deadlines
+    assert len(wheel) == 0
+
+
+def test_matches_a_brute_force_schedule():
+    rng = random.Random(7)
+    wheel = TimerWheel(slots=4, levels=3)
+    deadlines = {}
+    fired = {}
+    for now in range(1, 300):
+        for key in wheel.advance(now):
+            fired[key] = now
+            assert deadlines.pop(key) == now
+        for _ in range(3):
+            key = rng.randrange(40)
+            if key in deadlines or rng.random() < 0.3:
+                deadline = now + rng.randint(1, 60)
+                wheel.schedule(key, deadline)
+                deadlines[key] = deadline
+    assert all(deadline >= 300 for deadline in deadlines.values())
+
+
+def test_rescheduling_and_cancelling_replace_the_old_timer():
+    wheel = TimerWheel()
+    wheel.schedule("a", 5)
+    wheel.schedule("a", 20)
+    wheel.schedule("b", 6)
+    wheel.cancel("b")
+    assert "b" not in wheel
+    assert _expiries(wheel, 30) == {"a": 20}
+
+
+def test_overdue_timers_fire_on_the_next_tick():
+    wheel = TimerWheel(start=10)
+    wheel.schedule("late", 4)
+    assert wheel.advance(10) == []
+    assert wheel.advance(11) == ["late"]
+
+
+def test_a_jump_past_the_wheel_expires_everything_due():
+    wheel = TimerWheel(slots=4, levels=2)
+    wheel.schedule("soon", 3)
+    wheel.schedule("later", 1000)
+    assert wheel.advance(500) == ["soon"]
+    assert "later" in wheel
+    assert wheel.advance(1000) == ["later"]
+
+
+def test_tracker_marks_silent_sensors_offline_and_back():
+    tracker = LivenessTracker(default_interval=5, intervals={2: 60}, grace=3)
+    tracker.watch([1, 2], now=0)
+    tracker.report([1, 2], now=5)
+    assert tracker.expire(19) == []
+    assert tracker.expire(20) == [1]
+    assert tracker.offline == {1}
+    assert tracker.report([1], now=25) == [1]
+    assert tracker.offline == set()
+    # Sensor 2 reports every minute, so it is only late after three.
+    assert tracker.expire(184) == [1]
+    assert tracker.expire(185) == [2]
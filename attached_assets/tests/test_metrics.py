@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from app.metrics import Telemetry
+
+
+@pytest.mark.parametrize(
+    "record",
+    [
+        lambda t: t.count("requests", route="/ingest"),
+        lambda t: t.gauge("depth", 3, queue="kiosk"),
+        lambda t: t.remove_gauge("depth", queue="ingest"),
+    ],
+)
+def test_adding_or_removing_a_series_waits_for_a_scrape(record):
+    telemetry = Telemetry()
+    telemetry.gauge("depth", 1, queue="ingest")
+    with telemetry._lock:
+        # A scrape is iterating the series; a new one must not appear meanwhile.
+        worker = threading.Thread(target=record, args=(telemetry,))
+        worker.start()
+        worker.join(0.1)
+        assert worker.is_alive()
+    worker.join(1)
+    assert not worker.is_alive()
+
+
+def test_updating_an_existing_series_does_not_lock():
+    telemetry = Telemetry()
+    telemetry.count("ticks", 2, job="sensors")
+    telemetry.gauge("depth", 1)
+    with telemetry._lock:
+        telemetry.count("ticks", 3, job="sensors")
+        telemetry.gauge("depth", 4)
+    text = telemetry.prometheus()
+    assert 'citipulse_ticks_total{job="sensors"} 5' in text
+    assert "citipulse_depth 4" in text
+
+
+def test_disabled_registry_records_nothing():
+    off = Telemetry(enabled=False)
+    off.count("ticks")
+    off.gauge("depth", 1)
+    assert off.snapshot() == {"histograms": [], "counters": [], "gauges": []}
@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.aqi import PALETTES
+from app.pipeline import (
+    ALERT_THRESHOLDS,
+    BASE_VALUES,
+    OFFLINE_COLOR,
+    SensorSnapshot,
+    TickSnapshot,
+    check_alerts,
+    compute_tick,
+    zone_aggregates,
+)
+
+NOW = datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+ZONES = {"gate": [1, 2], "canteen": [3], "ground": [4]}
+
+
+def _reading(at: datetime, temperature=30.0, humidity=50.0, aqi=60, co2=500) -> dict:
+    return {
+        "timestamp": at.isoformat(),
+        "temperature": temperature,
+        "humidity": humidity,
+        "aqi": aqi,
+        "co2": co2,
+    }
+
+
+def _history(count: int, **values) -> list[dict]:
+    """``count`` stored readings, 10 s apart, the last one 10 s before ``NOW``."""
+    start = NOW - timedelta(seconds=10 * count)
+    return [
+        {**_reading(start + timedelta(seconds=10 * i), **values), "quality": "ok"}
+        for i in range(count)
+    ]
+
+
+def _tick(incoming: dict[int, dict], histories=None, **snapshot) -> dict:
+    histories = histories or {}
+    sensors = [
+        SensorSnapshot(s_id, f"S{s_id}", histories.get(s_id, []), None, {})
+        for s_id in (1, 2, 3, 4)
+    ]
+    return compute_tick(
+        TickSnapshot(
+            now=NOW,
+            seed=1,
+            sensors=sensors,
+            zones=ZONES,
+            map_view_mode="Streets",
+            incoming=incoming,
+            simulate=False,
+            **snapshot,
+        ),
+        BASE_VALUES,
+        ALERT_THRESHOLDS,
+    )
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        ({}, []),
+        ({"temperature": 34}, [("TEMPERATURE", "warning", 33)]),
+        ({"temperature": 38}, [("TEMPERATURE", "critical", 37)]),
+        ({"aqi": 100}, []),
+        ({"aqi": 151, "co2": 950}, [("AQI", "critical", 150), ("CO2", "warning", 900)]),
+        ({"humidity": 80}, [("HUMIDITY", "warning", 75)]),
+        ({"humidity": 90}, [("HUMIDITY", "critical", 85)]),
+        ({"humidity": 20}, [("HUMIDITY", "warning", 25)]),
+        ({"humidity": 10}, [("HUMIDITY", "critical", 15)]),
+    ],
+)
+def test_alert_thresholds(values, expected):
+    alerts = check_alerts("S1", _reading(NOW, **values), ALERT_THRESHOLDS, NOW)
+    assert [(a["parameter"], a["level"], a["threshold"]) for a in alerts] == expected
+
+
+def test_critical_alerts_make_the_sensor_glow():
+    result = _tick({1: _reading(NOW, aqi=160), 2: _reading(NOW, aqi=120)})
+    assert [a["level"] for a in result.updates[1].alerts] == ["critical"]
+    assert result.updates[1].is_glowing and not result.updates[2].is_glowing
+    assert result.updates[1].alerts[0]["timestamp"] == NOW.isoformat()
+
+
+def test_outliers_are_replaced_and_keep_their_raw_value():
+    history = {1: _history(10, temperature=30.0), 2: _history(10, temperature=30.0)}
+    result = _tick(
+        {1: _reading(NOW, temperature=55.0), 2: _reading(NOW, temperature=30.5)}, history
+    )
+    spike, normal = result.updates[1].reading, result.updates[2].reading
+    assert spike["quality"] == "outlier" and spike["temperature"] == 30.0
+    assert spike["raw"][0] == 55.0
+    # A flagged spike raises no temperature alert.
+    assert result.updates[1].alerts == []
+    assert normal["quality"] == "ok" and normal["temperature"] == 30.5
+
+
+def test_trusted_readings_skip_the_outlier_test():
+    history = {1: _history(10, aqi=60)}
+    result = _tick({1: _reading(NOW, aqi=155)}, history, trusted={1})
+    assert result.updates[1].reading["aqi"] == 155
+    assert result.updates[1].reading["quality"] == "ok"
+
+
+def test_out_of_range_values_are_clamped():
+    result = _tick({1: _reading(NOW, humidity=130.0, co2=100)})
+    reading = result.updates[1].reading
+    assert (reading["humidity"], reading["co2"]) == (100.0, 250)
+    assert reading["quality"] == "clamped"
+
+
+def test_gaps_are_filled_with_interpolated_readings():
+    history = _history(10, aqi=60)
+    # The last report was 40 s ago at a 10 s interval: three readings are missing.
+    result = _tick({1: _reading(NOW, aqi=80)}, {1: history[:-3]})
+    filled = result.updates[1].filled
+    assert [r["aqi"] for r in filled] == [65, 70, 75]
+    assert {r["quality"] for r in filled} == {"interpolated"}
+    assert filled[0]["timestamp"] == (NOW - timedelta(seconds=30)).isoformat()
+
+
+def test_zone_aggregates_average_live_sensors_and_grey_out_offline_zones():
+    gate = {
+        1: _reading(NOW, aqi=40, temperature=30.0),
+        2: _reading(NOW, aqi=81, temperature=31.5),
+    }
+    result = _tick(gate, {3: _history(3, aqi=170), 4: _history(3, aqi=200)}, offline={4})
+    assert result.zones["gate"] == {
+        "avg_aqi": 60, "avg_temp": 30.75, "color": PALETTES["zone"][1]
+    }
+    # Without a new reading a zone keeps its sensor's last stored one ...
+    assert result.zones["canteen"]["avg_aqi"] == 170
+    assert result.zones["canteen"]["color"] == PALETTES["zone"][3]
+    # ... unless the sensor is offline, which greys the zone out.
+    assert result.zones["ground"] == {"color": OFFLINE_COLOR}
+
+
+def test_zones_without_readings_are_left_out():
+    assert zone_aggregates({"canteen": [3], "empty": []}, {}, offline={5}) == {}
+
+
+def test_forecast_starts_once_the_history_is_long_enough():
+    short = _tick({1: _reading(NOW)}, {1: _history(9)})
+    assert short.updates[1].predicted_temp is None
+    rising = [
+        {**r, "temperature": 20.0 + i, "aqi": 50 + i}
+        for i, r in enumerate(_history(20))
+    ]
+    result = _tick({1: _reading(NOW, temperature=40.0, aqi=70)}, {1: rising})
+    update = result.updates[1]
+    # One degree and one AQI point per tick, extrapolated a day (144 ticks)
+    # past the end of the 21-reading history.
+    assert update.predicted_temp == pytest.approx(20.0 + 21 + 144, abs=0.5)
+    assert update.predicted_aqi == pytest.approx(50 + 21 + 144, abs=0.5)
+
+
+def test_simulated_readings_are_seeded():
+    def simulated():
+        snapshot = TickSnapshot(
+            now=NOW,
+            seed=7,
+            sensors=[SensorSnapshot(1, "S1", [], None, {})],
+            zones={},
+            map_view_mode="Streets",
+        )
+        return compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS).updates[1].reading
+
+    assert simulated() == simulated()
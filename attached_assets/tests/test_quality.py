@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.pipeline import (
+    ALERT_THRESHOLDS,
+    BASE_VALUES,
+    SENSOR_PERIOD_S,
+    SensorSnapshot,
+    TickSnapshot,
+    compute_tick,
+)
+from app.quality import CLAMPED, HAMPEL_WINDOW, OK, OUTLIER, clean
+
+START = datetime(2026, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def _reading(t: int, aqi: int) -> dict:
+    return {
+        "timestamp": (START + timedelta(seconds=t * SENSOR_PERIOD_S)).isoformat(),
+        "temperature": 25.0,
+        "humidity": 50.0,
+        "aqi": aqi,
+        "co2": 450,
+    }
+
+
+def _feed(aqis: list[int], trusted: set[int] = frozenset()) -> tuple[list[dict], list[dict]]:
+    """Stores ``aqis`` one tick at a time; returns the history and every alert."""
+    history, alerts = [], []
+    for t, aqi in enumerate(aqis):
+        incoming = _reading(t, aqi)
+        snapshot = TickSnapshot(
+            now=datetime.fromisoformat(incoming["timestamp"]),
+            seed=t,
+            sensors=[SensorSnapshot(1, "Main Gate", list(history), None, {})],
+            zones={},
+            map_view_mode="Streets",
+            incoming={1: incoming},
+            simulate=False,
+            trusted=set(trusted) if t == len(aqis) - 1 else set(),
+        )
+        update = compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS).updates[1]
+        history.extend(update.filled)
+        history.append(update.reading)
+        alerts.extend(update.alerts)
+    return history, alerts
+
+
+def test_clean_clamps_out_of_range_values():
+    values = np.array([[25.0, 150.0, 60.0, 450.0]])
+    cleaned = clean(values, np.empty((1, 0, 4)))
+    assert cleaned.values[0, 1] == 100.0
+    assert cleaned.flags[0] == CLAMPED
+
+
+def test_clean_rejects_a_spike_against_the_window():
+    window = np.tile([25.0, 50.0, 80.0, 450.0], (1, HAMPEL_WINDOW, 1))
+    cleaned = clean(np.array([[25.0, 50.0, 300.0, 450.0]]), window)
+    assert cleaned.values[0, 2] == 80.0
+    assert cleaned.raw[0, 2] == 300.0
+    assert cleaned.flags[0] == OUTLIER
+
+
+def test_trusted_readings_skip_the_outlier_test():
+    window = np.tile([25.0, 50.0, 80.0, 450.0], (1, HAMPEL_WINDOW, 1))
+    cleaned = clean(np.array([[25.0, 50.0, 300.0, 450.0]]), window, trusted=np.array([True]))
+    assert cleaned.values[0, 2] == 300.0
+    assert cleaned.flags[0] == OK
+
+
+def test_single_spike_is_stored_as_the_median():
+    history, alerts = _feed([80] * 10 + [200] + [80] * 5)
+    spike = history[10]
+    assert spike["quality"] == "outlier"
+    assert spike["aqi"] == 80
+    assert spike["raw"][2] == 200
+    assert not [a for a in alerts if a["parameter"] == "AQI"]
+    assert all(r["quality"] == "ok" for r in history[11:])
+
+
+def test_sustained_step_is_accepted_and_alerts():
+    history, alerts = _feed([80] * 10 + [200] * 30)
+    step = history[10:]
+    # Rejected only until the step makes up half of the raw window.
+    settle = HAMPEL_WINDOW // 2 + 1
+    assert all(r["quality"] == "outlier" for r in step[:settle])
+    assert all(r["aqi"] == 200 and r["quality"] == "ok" for r in step[settle:])
+    assert [a for a in alerts if a["parameter"] == "AQI"]
+
+
+def test_demo_spike_is_stored_and_alerts():
+    history, alerts = _feed([80] * 10 + [155], trusted={1})
+    assert history[-1]["aqi"] == 155
+    assert any(a["parameter"] == "AQI" for a in alerts)
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.dispersion import DispersionModel
+from app.registry import REGISTRY
+from app.scenarios import ScenarioEngine
+
+
+@pytest.fixture
+def engine():
+    engine = ScenarioEngine(REGISTRY, DispersionModel(REGISTRY), draws=200, workers=1)
+    yield engine
+    engine.close()
+
+
+def _evaluate(engine: ScenarioEngine, *args, **kwargs):
+    return asyncio.run(engine.evaluate(*args, **kwargs))
+
+
+def test_results_are_reused_only_under_the_same_baseline(engine):
+    first = _evaluate(engine, 2.1, 223.0, baseline=("simulator", 0))
+    # Wind within the same rounding bucket hits the cache.
+    again = _evaluate(engine, 1.9, 228.0, baseline=("simulator", 0))
+    assert [a is b for a, b in zip(first, again)] == [True] * len(first)
+    moved_on = _evaluate(engine, 2.1, 223.0, baseline=("simulator", 1))
+    assert not any(a is b for a, b in zip(first, moved_on))
+
+
+def test_close_stops_the_pool_and_evaluate_restarts_it(engine):
+    _evaluate(engine, 2.0, 180.0)
+    pool = engine._pool
+    engine.close()
+    assert engine._pool is None
+    with pytest.raises(RuntimeError):
+        pool.submit(print)
+    assert len(_evaluate(engine, 3.0, 90.0)) == len(engine.scenarios)
+    assert engine._pool is not None and engine._pool is not pool
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from app.scheduler import FixedRateScheduler
+
+
+def _run(scheduler: FixedRateScheduler, seconds: float):
+    async def main():
+        loop = asyncio.get_running_loop()
+        stop = loop.time() + seconds
+        await scheduler.run(lambda: loop.time() < stop)
+
+    asyncio.run(main())
+
+
+def test_missed_ticks_are_coalesced_into_one_run():
+    scheduler = FixedRateScheduler()
+    runs = []
+
+    async def tick():
+        runs.append(time.monotonic())
+
+    async def stall():
+        time.sleep(0.25)  # Blocks the event loop for five ``tick`` periods.
+
+    job = scheduler.add_job("tick", 0.05, tick)
+    scheduler.add_job("stall", 10, stall, priority=1)
+    _run(scheduler, 0.5)
+    assert job.skipped >= 3
+    # Missed ticks are dropped, not replayed in a burst once the loop is free.
+    assert min(b - a for a, b in zip(runs, runs[1:])) > 0.02
+    assert 8 <= job.runs + job.skipped <= 11
+
+
+def test_an_overrunning_job_never_runs_twice_at_once():
+    scheduler = FixedRateScheduler()
+    running = peak = 0
+
+    async def slow():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    job = scheduler.add_job("slow", 0.02, slow)
+    _run(scheduler, 0.3)
+    assert peak == 1
+    assert job.overruns > 0
+    assert job.runs < 0.3 / 0.02
+
+
+def test_jobs_due_together_start_in_priority_order():
+    scheduler = FixedRateScheduler()
+    started = []
+
+    def record(name):
+        async def callback():
+            started.append(name)
+
+        return callback
+
+    scheduler.add_job("weather", 0.1, record("weather"), priority=2)
+    scheduler.add_job("sensors", 0.1, record("sensors"), priority=0)
+    scheduler.add_job("agents", 0.1, record("agents"), priority=1)
+    _run(scheduler, 0.05)
+    assert started == ["sensors", "agents", "weather"]
+
+
+def test_a_failing_job_keeps_its_schedule():
+    scheduler = FixedRateScheduler()
+
+    async def fail():
+        raise RuntimeError("boom")
+
+    job = scheduler.add_job("fail", 0.02, fail)
+    _run(scheduler, 0.15)
+    assert job.runs >= 5
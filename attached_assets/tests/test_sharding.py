@@ -0,0 +1,147 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.pipeline import (
+    ALERT_THRESHOLDS,
+    BASE_VALUES,
+    SensorSnapshot,
+    TickSnapshot,
+    compute_tick,
+)
+from app.sharding import ShardedSimulation, shutdown_pool
+
+SENSORS = list(range(1, 13))
+ZONES = {"north": [1, 2, 3, 4], "south": [5, 6, 7, 8], "east": [9, 10, 11, 12]}
+NAMES = {sensor_id: f"Sensor {sensor_id}" for sensor_id in SENSORS}
+START = datetime(2025, 3, 1, 9, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def engine():
+    engine = ShardedSimulation(SENSORS, np.zeros((len(SENSORS), 4)), ZONES, workers=2)
+    yield engine
+    engine.close()
+    shutdown_pool()
+
+
+def _pushed(rng: random.Random, now: datetime) -> dict[int, dict]:
+    """Readings around the alert thresholds, with the odd spike for the outlier test."""
+    readings = {}
+    for sensor_id in SENSORS:
+        spike = rng.random() < 0.1
+        readings[sensor_id] = {
+            "timestamp": now.isoformat(),
+            "temperature": round(rng.uniform(28, 36) + (15 if spike else 0), 2),
+            "humidity": round(rng.uniform(12, 88), 2),
+            "aqi": rng.randint(60, 170),
+            "co2": rng.randint(450, 1300),
+        }
+    return readings
+
+
+class _Feed:
+    """The parts of a shared feed a tick reads and ``_commit_tick`` writes."""
+
+    def __init__(self):
+        self.sensors = {
+            sensor_id: {
+                "readings": [], "alerts": [], "is_glowing": False,
+                "predicted_temp": 0.0, "predicted_aqi": 0.0,
+            }
+            for sensor_id in SENSORS
+        }
+
+    def tick(self, now: datetime, incoming: dict[int, dict]):
+        snapshot = TickSnapshot(
+            now=now,
+            seed=0,
+            sensors=[
+                SensorSnapshot(
+                    id=sensor_id,
+                    name=NAMES[sensor_id],
+                    readings=list(sensor["readings"]),
+                    latest_alert=sensor["alerts"][0] if sensor["alerts"] else None,
+                    loc_factor={},
+                )
+                for sensor_id, sensor in self.sensors.items()
+            ],
+            zones=ZONES,
+            map_view_mode="Streets",
+            incoming=incoming,
+            simulate=False,
+        )
+        result = compute_tick(snapshot, BASE_VALUES, ALERT_THRESHOLDS)
+        for sensor_id, update in result.updates.items():
+            sensor = self.sensors[sensor_id]
+            sensor["readings"] = (sensor["readings"] + update.filled + [update.reading])[-100:]
+            sensor["alerts"] = (update.alerts[::-1] + sensor["alerts"])[:10]
+            sensor["is_glowing"] = update.is_glowing
+            if update.predicted_temp is not None:
+                sensor["predicted_temp"] = update.predicted_temp
+                sensor["predicted_aqi"] = update.predicted_aqi
+        return result
+
+
+def _sharded_tick(engine: ShardedSimulation, now: datetime, incoming: dict[int, dict]):
+    result = asyncio.run(
+        engine.tick(now, 0, BASE_VALUES, ALERT_THRESHOLDS, incoming=incoming)
+    )
+    return engine.to_tick_result(result, NAMES, ALERT_THRESHOLDS, "Streets")
+
+
+def _assert_same(sharded, unsharded):
+    assert sharded.updates.keys() == unsharded.updates.keys()
+    for sensor_id, expected in unsharded.updates.items():
+        got = sharded.updates[sensor_id]
+        for metric in ("temperature", "humidity", "aqi", "co2"):
+            assert got.reading[metric] == pytest.approx(expected.reading[metric], abs=0.01)
+        assert got.reading["quality"] == expected.reading["quality"]
+        assert [
+            (a["parameter"], a["level"], a["threshold"], a["value"]) for a in got.alerts
+        ] == [
+            (a["parameter"], a["level"], a["threshold"], a["value"]) for a in expected.alerts
+        ]
+        assert (got.is_glowing, got.color) == (expected.is_glowing, expected.color)
+        assert got.predicted_temp == pytest.approx(expected.predicted_temp, abs=0.05)
+        assert got.predicted_aqi == pytest.approx(expected.predicted_aqi, abs=0.05)
+    assert sharded.zones.keys() == unsharded.zones.keys()
+    for zone_id, expected in unsharded.zones.items():
+        got = sharded.zones[zone_id]
+        assert (got["avg_aqi"], got["color"]) == (expected["avg_aqi"], expected["color"])
+        assert got["avg_temp"] == pytest.approx(expected["avg_temp"], abs=0.01)
+
+
+def test_sharded_and_unsharded_ticks_agree(engine):
+    rng = random.Random(5)
+    feed = _Feed()
+    flagged = set()
+    for k in range(15):
+        now = START + timedelta(seconds=10 * k)
+        incoming = _pushed(rng, now)
+        unsharded = feed.tick(now, incoming)
+        _assert_same(_sharded_tick(engine, now, incoming), unsharded)
+        flagged |= {u.reading["quality"] for u in unsharded.updates.values()}
+    # The run exercised the outlier test and the forecast, not just plain readings.
+    assert "outlier" in flagged
+    assert unsharded.updates[1].predicted_temp is not None
+
+
+def test_a_stale_engine_reloads_the_feed_history(engine):
+    rng = random.Random(9)
+    feed = _Feed()
+    for k in range(20):
+        now = START + timedelta(seconds=10 * k)
+        incoming = _pushed(rng, now)
+        if k < 12:
+            # Ticks computed without the engine, as during a replay.
+            feed.tick(now, incoming)
+            engine.reset()
+            continue
+        if engine.stale:
+            engine.load(feed.sensors)
+        unsharded = feed.tick(now, incoming)
+        _assert_same(_sharded_tick(engine, now, incoming), unsharded)
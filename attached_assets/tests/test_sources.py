@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+from app import sources
+from app.sources import resolve_target
+
+
+@pytest.fixture
+def recordings(tmp_path, monkeypatch):
+    monkeypatch.setattr(sources, "RECORDINGS_DIR", str(tmp_path))
+    (tmp_path / "day.csv").write_text("timestamp,sensor_id\n")
+    (tmp_path / "notes.txt").write_text("")
+    return tmp_path
+
+
+def test_replay_resolves_inside_recordings_dir(recordings):
+    assert resolve_target("replay", "day.csv") == os.path.realpath(recordings / "day.csv")
+
+
+@pytest.mark.parametrize(
+    "target", ["missing.csv", "notes.txt", "../day.csv", "/etc/passwd", "sub/../../x.csv"]
+)
+def test_replay_rejects_other_files(recordings, target):
+    with pytest.raises(ValueError):
+        resolve_target("replay", target)
+
+
+def test_gateway_must_be_allow_listed(monkeypatch):
+    monkeypatch.setenv("CITIPULSE_GATEWAYS", "http://gw.local/readings, http://gw2/r")
+    assert resolve_target("gateway", "http://gw2/r") == "http://gw2/r"
+    with pytest.raises(ValueError):
+        resolve_target("gateway", "http://169.254.169.254/latest/meta-data")
+
+
+def test_unknown_source_is_rejected():
+    assert resolve_target("simulator", "anything") == ""
+    with pytest.raises(ValueError):
+        resolve_target("ftp", "x")
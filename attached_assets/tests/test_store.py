@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from app import store as store_module
+from app.store import FeedStore, SharedFeed, deep_sizeof, feed_key
+
+
+class _Engine:
+    def __init__(self):
+        self.closed = self.resets = 0
+
+    def close(self):
+        self.closed += 1
+
+    def reset(self):
+        self.resets += 1
+
+
+def test_sessions_on_one_source_share_a_feed():
+    store = FeedStore()
+    key = feed_key("simulator", "", 60)
+    a = store.acquire(key, "a")
+    b = store.acquire(feed_key("simulator", "", 60.0), "b")
+    assert a is b
+    assert set(a.sessions) == {"a", "b"}
+    assert store.acquire(feed_key("replay", "day.csv", 60), "c") is not a
+    assert len(store) == 2
+
+
+def test_last_release_frees_the_feed_and_closes_its_engine():
+    store = FeedStore()
+    feed = store.acquire("k", "a")
+    store.acquire("k", "a")
+    store.acquire("k", "b")
+    feed.engine = engine = _Engine()
+    store.release("k", "a")
+    assert store.get("k") is feed and not engine.closed
+    store.release("k", "b")
+    store.release("k", "b")
+    assert store.get("k") is None
+    assert engine.closed == 1 and feed.engine is None
+
+
+def test_close_frees_every_feed():
+    store = FeedStore()
+    engines = []
+    for key in ("x", "y"):
+        store.acquire(key, "a").engine = engine = _Engine()
+        engines.append(engine)
+    store.close()
+    assert len(store) == 0
+    assert [e.closed for e in engines] == [1, 1]
+
+
+def test_commit_bumps_the_version_and_notifies_listeners():
+    store = FeedStore()
+    seen = []
+    store.add_listener(seen.append)
+    feed = store.acquire("k", "a")
+    store.commit(feed)
+    assert feed.version == 1 and seen == [feed]
+
+
+def test_a_job_is_claimed_once_per_period():
+    feed = SharedFeed("k")
+    assert feed.claim("sensors", 5)
+    assert not feed.claim("sensors", 5)
+    assert feed.claim("moving_objects", 1)
+
+
+@pytest.mark.parametrize("sessions", [1, 10, 50])
+def test_interleaved_sessions_keep_the_job_at_its_period(monkeypatch, sessions):
+    rng = random.Random(sessions)
+    feed = SharedFeed("k")
+    # Every session's scheduler fires each 10 s at its own phase, with jitter.
+    firings = sorted(
+        phase + k * 10 + rng.uniform(0, 0.3)
+        for phase in (rng.uniform(0, 10) for _ in range(sessions))
+        for k in range(100)
+    )
+    runs = []
+    for now in firings:
+        monkeypatch.setattr(store_module.time, "monotonic", lambda: now)
+        if feed.claim("sensors", 10):
+            runs.append(now)
+    gaps = [b - a for a, b in zip(runs, runs[1:])]
+    assert len(runs) >= 98
+    assert sum(gaps) / len(gaps) == pytest.approx(10, abs=0.1)
+    assert min(gaps) > 8
+
+
+def test_a_job_that_fell_behind_resyncs_without_a_burst(monkeypatch):
+    feed = SharedFeed("k")
+    clock = iter([0.0, 35.0, 35.5, 43.5, 45.0])
+    monkeypatch.setattr(store_module.time, "monotonic", lambda: next(clock))
+    assert [feed.claim("sensors", 10) for _ in range(5)] == [
+        True, True, False, False, True
+    ]
+
+
+def test_take_pauses_jobs_until_given_back():
+    feed = SharedFeed("k")
+    feed.engine = engine = _Engine()
+    assert feed.take("replay")
+    assert not feed.take("fast_forward")
+    assert not feed.claim("sensors", 5)
+    assert feed.claim("moving_objects", 1)
+    feed.reset_engine()
+    feed.give_back()
+    assert feed.owner == "" and engine.resets == 1
+    assert feed.claim("sensors", 5)
+
+
+def test_session_bytes_leave_out_the_shared_containers():
+    feed = SharedFeed("k")
+    feed.sensors[1] = {"readings": [{"aqi": i} for i in range(100)]}
+    # Only the list holding the session's values is counted, not the history.
+    assert feed.session_bytes([feed.sensors]) < 100 < deep_sizeof(feed.sensors)
+    own = {"page": "Map"}
+    assert feed.session_bytes([feed.sensors, own]) > deep_sizeof(own)
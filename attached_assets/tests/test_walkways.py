@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from app.walkways import WALKWAYS, WalkwayGraph, distance_m
+
+# A square with one diagonal: a-b-c is the short way round, a-d-c the long one.
+NODES = {
+    "a": (20.0400, 73.8500),
+    "b": (20.0405, 73.8500),
+    "c": (20.0405, 73.8505),
+    "d": (20.0390, 73.8515),
+    "e": (20.0420, 73.8520),
+}
+EDGES = [("a", "b"), ("b", "c"), ("a", "d"), ("d", "c"), ("c", "e")]
+DEMAND = {("a", "c"): 1, ("a", "e"): 1}
+
+
+def _is_walkable(graph: WalkwayGraph, points) -> bool:
+    """Every consecutive pair of points is joined by an edge of the graph."""
+    by_point = {point: name for name, point in graph.nodes.items()}
+    path = [by_point[p] for p in points]
+    return all(
+        any(n == b for n, _ in graph.adjacency[a]) for a, b in zip(path, path[1:])
+    )
+
+
+def test_routes_take_the_shortest_path():
+    graph = WalkwayGraph(NODES, EDGES, DEMAND)
+    route = graph.route("a", "c")
+    assert route.points == (NODES["a"], NODES["b"], NODES["c"])
+    assert route.length == pytest.approx(
+        distance_m(NODES["a"], NODES["b"]) + distance_m(NODES["b"], NODES["c"])
+    )
+    assert graph.route("e", "a").points == (
+        NODES["e"], NODES["c"], NODES["b"], NODES["a"]
+    )
+
+
+def test_only_demanded_pairs_are_precomputed():
+    graph = WalkwayGraph(NODES, EDGES, DEMAND)
+    assert graph.origins == ["a", "c", "e"]
+    with pytest.raises(KeyError):
+        graph.route("b", "d")
+
+
+def test_disconnected_demand_is_rejected():
+    with pytest.raises(ValueError, match="No walkway"):
+        WalkwayGraph({**NODES, "f": (20.05, 73.86)}, EDGES, {("a", "f"): 1})
+
+
+def test_campus_routes_follow_the_walkways():
+    rng = random.Random(3)
+    for _ in range(50):
+        origin = WALKWAYS.sample_origin(rng)
+        route = WALKWAYS.route(origin, WALKWAYS.sample_destination(origin, rng))
+        assert _is_walkable(WALKWAYS, route.points)
+        assert list(route.cumulative) == sorted(route.cumulative)
+
+
+def test_position_interpolates_along_the_route():
+    route = WalkwayGraph(NODES, EDGES, DEMAND).route("a", "c")
+    first = route.cumulative[1]
+    assert route.position_at(-1) == NODES["a"]
+    assert route.position_at(route.length + 1) == NODES["c"]
+    assert route.position_at(first) == pytest.approx(NODES["b"])
+    lat, lng = route.position_at(first / 2)
+    assert lat == pytest.approx((NODES["a"][0] + NODES["b"][0]) / 2)
+    assert lng == pytest.approx(NODES["a"][1])
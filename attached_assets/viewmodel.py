@@ -0,0 +1,115 @@
+"""Dashboard view model, shared by the session state and the kiosk broadcast.
+
+Pure functions of a feed's sensors and alerts. ``CitiPulseState``'s dashboard
+computed vars call them for each session, and ``app.broadcast`` calls
+``dashboard_view`` once per tick for all the kiosks on a feed.
+"""
+
+from datetime import datetime, timedelta
+
+from app.aqi import LABELS, PALETTES, category_of
+from app.registry import REGISTRY
+
+# Latest alerts a kiosk lists; the interactive dashboard only shows the count.
+KIOSK_ALERTS = 8
+
+
+def campus_average(sensors: dict[int, dict], key: str) -> float:
+    """Mean latest ``key`` over the online Campus sensors that have readings."""
+    campus_sensors = [
+        s
+        for sensor_id in REGISTRY.ids_of_type("Campus")
+        if (s := sensors.get(sensor_id)) and s["readings"] and s["online"]
+    ]
+    if not campus_sensors:
+        return 0.0
+    total_value = sum((s["readings"][-1][key] for s in campus_sensors))
+    return round(total_value / len(campus_sensors), 1)
+
+
+def green_index(aqi: int, temp: float, co2: int) -> int:
+    """Campus Green Index: AQI, temperature and CO2 scores weighted 2:1:1."""
+    aqi_score = max(0, 100 - aqi)
+    temp_score = 100 if 18 <= temp <= 28 else max(0, 100 - abs(temp - 23) * 5)
+    co2_score = max(0, 100 - (co2 - 400) / 10)
+    cgi = int(aqi_score * 0.5 + temp_score * 0.25 + co2_score * 0.25)
+    return max(0, min(100, cgi))
+
+
+def green_index_color(cgi: int) -> str:
+    if cgi > 75:
+        return "#10B981"
+    elif cgi > 50:
+        return "#FBBF24"
+    else:
+        return "#F97316"
+
+
+def aqi_band(aqi: int) -> dict[str, str]:
+    """Category label and dashboard colours of an AQI value."""
+    code = int(category_of(aqi))
+    return {
+        "label": LABELS[code],
+        "gradient": PALETTES["gradient"][code],
+        "text": PALETTES["text"][code],
+        "color": PALETTES["sensor"][code],
+    }
+
+
+def campus_insight(sensors: dict[int, dict], now: datetime) -> str:
+    """Generates a dynamic insight text based on data trends."""
+    if not sensors or not any((s["readings"] for s in sensors.values())):
+        return "Awaiting data for insights..."
+    campus_sensors = [
+        s
+        for sensor_id in REGISTRY.ids_of_type("Campus")
+        if (s := sensors.get(sensor_id)) and len(s["readings"]) > 2
+    ]
+    if not campus_sensors:
+        return "Insufficient data for trend analysis."
+    current_aqi = int(campus_average(sensors, "aqi"))
+    yesterday_aqi_sum = 0
+    count = 0
+    one_day_ago = (now - timedelta(days=1)).timestamp()
+    for sensor in campus_sensors:
+        for reading in sensor["readings"]:
+            reading_time = datetime.fromisoformat(reading["timestamp"]).timestamp()
+            if abs(reading_time - one_day_ago) < 3600:
+                yesterday_aqi_sum += reading["aqi"]
+                count += 1
+                break
+    if count == 0:
+        return f"Campus AQI is currently {current_aqi}. Keep monitoring for trends."
+    yesterday_avg_aqi = yesterday_aqi_sum / count
+    change = (current_aqi - yesterday_avg_aqi) / yesterday_avg_aqi * 100
+    if abs(change) < 5:
+        return f"AQI is stable at {current_aqi}, similar to yesterday."
+    elif change > 0:
+        return f"AQI has risen by {abs(change):.0f}% to {current_aqi} compared to yesterday."
+    else:
+        return f"AQI has improved by {abs(change):.0f}% to {current_aqi} since yesterday!"
+
+
+def dashboard_view(
+    sensors: dict[int, dict], alerts: list[dict], last_updated: str, now: datetime
+) -> dict:
+    """Everything the Dashboard page shows, as one JSON-ready dict."""
+    aqi = int(campus_average(sensors, "aqi"))
+    temp = campus_average(sensors, "temperature")
+    co2 = int(campus_average(sensors, "co2"))
+    cgi = green_index(aqi, temp, co2)
+    return {
+        "campus_avg_aqi": aqi,
+        "campus_avg_temp": temp,
+        "campus_avg_humidity": campus_average(sensors, "humidity"),
+        "campus_avg_co2": co2,
+        "campus_aqi_band": aqi_band(aqi),
+        "campus_green_index": cgi,
+        "cgi_color": green_index_color(cgi),
+        "campus_insights": campus_insight(sensors, now),
+        "total_sensors": len(sensors),
+        "sensors_online": sum(1 for s in sensors.values() if s["online"]),
+        "critical_alerts_count": sum(1 for a in alerts if a["level"] == "critical"),
+        "alerts": alerts[:KIOSK_ALERTS],
+        "last_updated": last_updated,
+    }
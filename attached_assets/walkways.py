@@ -0,0 +1,162 @@
+"""Campus walkway/road graph with precomputed routes and zone demand.
+
+Agents walk between zone anchors along the graph. Shortest paths between
+every pair of anchors are computed once (Dijkstra) when the graph is built, so
+re-routing an agent at runtime is a dictionary lookup and interpolating its
+position is a bisect over the route's cumulative lengths.
+"""
+
+import bisect
+import heapq
+import math
+import random
+from dataclasses import dataclass
+from itertools import accumulate
+
+# Junctions of the campus walkway and road network (lat, lng).
+WALKWAY_NODES = {
+    "main_gate": (20.0419, 73.8499),
+    "engg_building": (20.0406, 73.8498),
+    "canteen": (20.0405, 73.8505),
+    "ground": (20.0422, 73.8512),
+    "central": (20.0413, 73.8505),
+    "east_junction": (20.0406, 73.8517),
+    "east_road": (20.0401, 73.8534),
+    "south_west": (20.0396, 73.849),
+    "west_road": (20.0407, 73.8474),
+}
+WALKWAY_EDGES = [
+    ("main_gate", "engg_building"),
+    ("engg_building", "canteen"),
+    ("main_gate", "central"),
+    ("central", "canteen"),
+    ("central", "ground"),
+    ("ground", "east_junction"),
+    ("canteen", "east_junction"),
+    ("east_junction", "east_road"),
+    ("engg_building", "south_west"),
+    ("south_west", "west_road"),
+    ("main_gate", "west_road"),
+]
+# Relative trip demand between origin and destination anchors; trips are
+# assumed symmetric. Roads at the campus edge act as entry/exit points.
+OD_DEMAND = {
+    ("main_gate", "engg_building"): 8,
+    ("main_gate", "canteen"): 4,
+    ("main_gate", "ground"): 2,
+    ("engg_building", "canteen"): 6,
+    ("engg_building", "ground"): 2,
+    ("canteen", "ground"): 3,
+    ("east_road", "ground"): 2,
+    ("east_road", "canteen"): 2,
+    ("west_road", "main_gate"): 5,
+    ("west_road", "engg_building"): 1,
+}
+
+# Walking and driving speeds along the graph.
+AGENT_SPEED_MPS = {"person": 1.4, "vehicle": 5.0}
+
+
+def distance_m(a: tuple[float, float], b: tuple[float, float]) -> float:
+    """Equirectangular distance in metres, accurate at campus scale."""
+    mean_lat = math.radians((a[0] + b[0]) / 2)
+    dy = (b[0] - a[0]) * 110_540
+    dx = (b[1] - a[1]) * 111_320 * math.cos(mean_lat)
+    return math.hypot(dx, dy)
+
+
+@dataclass(frozen=True)
+class Route:
+    points: tuple[tuple[float, float], ...]
+    cumulative: tuple[float, ...]
+
+    @property
+    def length(self) -> float:
+        return self.cumulative[-1]
+
+    def position_at(self, distance: float) -> tuple[float, float]:
+        """(lat, lng) after walking ``distance`` metres along the route."""
+        if distance <= 0 or len(self.points) == 1:
+            return self.points[0]
+        if distance >= self.length:
+            return self.points[-1]
+        i = bisect.bisect_right(self.cumulative, distance) - 1
+        span = self.cumulative[i + 1] - self.cumulative[i]
+        t = (distance - self.cumulative[i]) / span if span else 0.0
+        (lat0, lng0), (lat1, lng1) = self.points[i], self.points[i + 1]
+        return lat0 + (lat1 - lat0) * t, lng0 + (lng1 - lng0) * t
+
+
+class WalkwayGraph:
+    def __init__(
+        self,
+        nodes: dict[str, tuple[float, float]],
+        edges: list[tuple[str, str]],
+        demand: dict[tuple[str, str], float],
+    ):
+        self.nodes = nodes
+        self.adjacency: dict[str, list[tuple[str, float]]] = {n: [] for n in nodes}
+        for a, b in edges:
+            d = distance_m(nodes[a], nodes[b])
+            self.adjacency[a].append((b, d))
+            self.adjacency[b].append((a, d))
+        destinations: dict[str, dict[str, float]] = {}
+        for (a, b), weight in demand.items():
+            destinations.setdefault(a, {})[b] = weight
+            destinations.setdefault(b, {})[a] = weight
+        self.origins = sorted(destinations)
+        self._origin_cum = list(
+            accumulate(sum(destinations[o].values()) for o in self.origins)
+        )
+        self._destinations = {
+            origin: (list(targets), list(accumulate(targets.values())))
+            for origin, targets in destinations.items()
+        }
+        self._routes = {
+            (origin, target): self._route(origin, target)
+            for origin, (targets, _) in self._destinations.items()
+            for target in targets
+        }
+
+    def _shortest_path(self, source: str, target: str) -> list[str]:
+        dist = {source: 0.0}
+        previous: dict[str, str] = {}
+        heap = [(0.0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node == target:
+                break
+            if d > dist[node]:
+                continue
+            for neighbour, weight in self.adjacency[node]:
+                nd = d + weight
+                if nd < dist.get(neighbour, math.inf):
+                    dist[neighbour] = nd
+                    previous[neighbour] = node
+                    heapq.heappush(heap, (nd, neighbour))
+        if target not in dist:
+            raise ValueError(f"No walkway between {source} and {target}")
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        return path[::-1]
+
+    def _route(self, source: str, target: str) -> Route:
+        points = tuple(self.nodes[n] for n in self._shortest_path(source, target))
+        cumulative = [0.0]
+        for a, b in zip(points, points[1:]):
+            cumulative.append(cumulative[-1] + distance_m(a, b))
+        return Route(points, tuple(cumulative))
+
+    def route(self, origin: str, destination: str) -> Route:
+        return self._routes[(origin, destination)]
+
+    def sample_origin(self, rng: random.Random) -> str:
+        return rng.choices(self.origins, cum_weights=self._origin_cum)[0]
+
+    def sample_destination(self, origin: str, rng: random.Random) -> str:
+        targets, cum_weights = self._destinations[origin]
+        return rng.choices(targets, cum_weights=cum_weights)[0]
+
+
+WALKWAYS = WalkwayGraph(WALKWAY_NODES, WALKWAY_EDGES, OD_DEMAND)